@@ -1,7 +1,23 @@
 __version__ = '0.0.13'
 
-from asynceth.jsonrpc import JsonRPCClient
-from asynceth.contract import Contract
-from asynceth.contract.transaction import TransactionResponse
+# the contract and transport modules pull in heavy dependencies, so they are
+# only imported when first accessed
+_lazy_imports = {
+    "JsonRPCClient": "asynceth.jsonrpc.client",
+    "Contract": "asynceth.contract.contract",
+    "TransactionResponse": "asynceth.contract.transaction",
+}
+
+def __getattr__(name):
+    module = _lazy_imports.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_imports))
 
 __all__ = ["JsonRPCClient", "Contract", "TransactionResponse"]
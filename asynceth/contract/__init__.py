@@ -1,4 +1,18 @@
-from asynceth.contract.contract import Contract
-from asynceth.contract.transaction import TransactionResponse
+_lazy_imports = {
+    "Contract": "asynceth.contract.contract",
+    "TransactionResponse": "asynceth.contract.transaction",
+}
+
+def __getattr__(name):
+    module = _lazy_imports.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_imports))
 
 __all__ = ['Contract', 'TransactionResponse']
@@ -0,0 +1,130 @@
+"""A content addressed on-disk cache of solc output, so compiling the same
+sources with the same compiler and settings again skips the compiler.
+
+Entries are keyed by the hashes of the compiled source and every source
+it (transitively) imports, the full solc version string and the compiler
+settings."""
+
+import collections
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+IMPORT_RE = re.compile(r'''^\s*import\s+(?:[^'";]*?\s+from\s+)?["']([^"']+)["']''', re.MULTILINE)
+
+def _default_directory():
+    directory = os.environ.get('ASYNCETH_SOLC_CACHE')
+    if directory:
+        return directory
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'asynceth', 'solc')
+
+def _resolve_import(path, importer, cwd):
+    if path.startswith('./') or path.startswith('../'):
+        return os.path.normpath(os.path.join(os.path.dirname(importer), path))
+    return os.path.normpath(path)
+
+def source_hashes(filename, cwd, sourcecode=None):
+    """returns {path: sha256} for `filename` (relative to `cwd`) and all the
+    sources it imports. `sourcecode` is used for the contents of `filename`
+    if given (i.e. for sources passed to solc on stdin). Imports that can't
+    be read hash to None"""
+    hashes = {}
+    pending = [(filename, sourcecode)]
+    while pending:
+        path, source = pending.pop()
+        if path in hashes:
+            continue
+        if source is None:
+            try:
+                with open(os.path.join(cwd, path), 'rb') as f:
+                    source = f.read()
+            except OSError:
+                hashes[path] = None
+                continue
+        elif isinstance(source, str):
+            source = source.encode('utf-8')
+        hashes[path] = hashlib.sha256(source).hexdigest()
+        for imported in IMPORT_RE.findall(source.decode('utf-8', errors='replace')):
+            pending.append((_resolve_import(imported, path, cwd), None))
+    return hashes
+
+class CompilationCache:
+    """Caches the contracts compiled from a source file, in `directory`
+    (defaults to $ASYNCETH_SOLC_CACHE, or asynceth/solc in the user's cache
+    directory) and in memory for the `max_memory_entries` most recently
+    used entries.
+
+    Entries are kept serialized, so every `get` returns a new copy which
+    callers are free to modify"""
+
+    def __init__(self, directory=None, max_memory_entries=256):
+        self.directory = directory or _default_directory()
+        self.max_memory_entries = max_memory_entries
+        self._memory = collections.OrderedDict()
+
+    def _remember(self, key, serialized):
+        self._memory[key] = serialized
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def key(self, version, settings, hashes):
+        """returns the cache key, or None if the sources can't be cached"""
+        if any(value is None for value in hashes.values()):
+            return None
+        description = json.dumps({'version': version, 'settings': settings, 'sources': hashes},
+                                 sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key):
+        """returns the {name: {'abi', 'bin', 'bin-runtime'}} contracts
+        stored for `key`, or None"""
+        serialized = self._memory.get(key)
+        if serialized is not None:
+            self._memory.move_to_end(key)
+            return json.loads(serialized)
+        try:
+            with open(self._path(key), 'r') as f:
+                serialized = f.read()
+            contracts = json.loads(serialized)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, serialized)
+        return contracts
+
+    def put(self, key, contracts):
+        serialized = json.dumps(contracts)
+        self._remember(key, serialized)
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # written to a temporary file first so concurrent readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(serialized)
+            os.replace(tmp_path, path)
+        except OSError:
+            # the cache is best effort
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        self._memory.clear()
+
+_default_cache = None
+
+def default_compilation_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CompilationCache()
+    return _default_cache
@@ -1,14 +1,52 @@
 import asyncio
-import ethereum.abi
-import rlp
+import functools
 import json
 
-from ethereum.utils import encode_hex, decode_hex, privtoaddr, zpad, encode_int
-from eth_abi import encode_abi, decode_abi
+from eth_abi import encode_abi, decode_abi, decode_single
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.encoding import TupleEncoder
+from eth_abi.exceptions import DecodingError
+from eth_abi.registry import registry
 from asynceth.contract.utils import compile_solidity
-from ethereum.abi import normalize_name, method_id, event_id
-
-from asynceth.contract.transaction import TransactionResponse, Transaction
+from asynceth.crypto import keccak256, private_key_to_address
+from asynceth.utils import decode_hex, address_to_bytes
+
+from asynceth.contract.simulation import Call
+from asynceth.contract.transaction import TransactionResponse, prepare_transaction, send_transaction
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.jsonrpc.revert import RevertReason, decode_revert_reason, error_reason
+from asynceth.jsonrpc.snapshot import BlockSnapshot
+
+TYPE_ALIASES = {
+    'int': 'int256',
+    'uint': 'uint256',
+    'fixed': 'fixed128x18',
+    'ufixed': 'ufixed128x18',
+}
+
+def canonical_type(name):
+    """Replaces type aliases (e.g. `uint`) with their canonical type"""
+    base = name.split('[', 1)[0]
+    if base in TYPE_ALIASES:
+        return TYPE_ALIASES[base] + name[len(base):]
+    return name
+
+def normalize_name(name):
+    """Returns the function/event name without any parameter list"""
+    if '(' in name:
+        return name[:name.find('(')]
+    return name
+
+def method_signature(name, encode_types):
+    return '{}({})'.format(name, ','.join(canonical_type(type_) for type_ in encode_types))
+
+def method_id(name, encode_types):
+    """Returns the 4 byte function selector as an int"""
+    return int.from_bytes(keccak256(method_signature(name, encode_types))[:4], 'big')
+
+def event_id(name, encode_types):
+    """Returns the event topic (topics[0]) as an int"""
+    return int.from_bytes(keccak256(method_signature(name, encode_types)), 'big')
 
 def process_abi_type(type_abi):
     """Converts `tuple` (i.e struct) types into the (type1,type2,type3) form"""
@@ -20,7 +58,82 @@ def process_abi_type(type_abi):
         return type_str
     return type_abi['type']
 
-class ContractTranslator(ethereum.abi.ContractTranslator):
+def split_tuple_type(type_str):
+    """Returns the component types of a (type1,type2,type3) tuple type"""
+    components = []
+    depth = 0
+    start = 1
+    for i in range(1, len(type_str) - 1):
+        char = type_str[i]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            components.append(type_str[start:i])
+            start = i + 1
+    if len(type_str) > 2:
+        components.append(type_str[start:-1])
+    return components
+
+def _convert_address(arg):
+    if isinstance(arg, str):
+        return address_to_bytes(arg)
+    return arg
+
+def _convert_int(arg):
+    if isinstance(arg, str):
+        return int(arg, 16)
+    return arg
+
+def argument_converter(type_str):
+    """Returns a function converting a value of the abi type `type_str` (as
+    produced by `process_abi_type`) into what eth_abi expects, i.e. hex
+    string addresses into bytes and hex string ints into ints, including
+    inside arrays and tuples. Returns None if values of the type are never
+    converted"""
+    if type_str.endswith(']'):
+        item_converter = argument_converter(type_str[:type_str.rindex('[')])
+        if item_converter is None:
+            return None
+        return lambda arg: [item_converter(item) for item in arg]
+    if type_str.startswith('('):
+        converters = [argument_converter(component) for component in split_tuple_type(type_str)]
+        if all(converter is None for converter in converters):
+            return None
+        return lambda arg: tuple(value if converter is None else converter(value)
+                                 for converter, value in zip(converters, arg))
+    if type_str == 'address':
+        return _convert_address
+    if type_str.startswith('uint') or type_str.startswith('int'):
+        return _convert_int
+    return None
+
+@functools.lru_cache(maxsize=1024)
+def _result_decoder(decode_types):
+    return TupleDecoder(decoders=[registry.get_decoder(type_str) for type_str in decode_types])
+
+def decode_call_result(decode_types, result):
+    """Decodes the `eth_call` result (a hex string or bytes) of a function
+    with the output types `decode_types`. Returns the single value if there
+    is only a single output, or None if the result is empty.
+
+    This is a plain function so large results can be decoded in a process
+    pool (see `Contract`'s `decode_executor`)"""
+    result = decode_hex(result)
+    if not result:
+        return None
+    # the stream shares the result's buffer rather than copying it
+    decoded = _result_decoder(tuple(decode_types))(ContextFramesBytesIO(result))
+    # decode string results
+    decoded = [val.decode('utf-8') if isinstance(val, bytes) and type == 'string' else val
+               for val, type in zip(decoded, decode_types)]
+    # return the single value if there is only a single return value
+    if len(decoded) == 1:
+        return decoded[0]
+    return decoded
+
+class ContractTranslator:
     def __init__(self, contract_interface):
         if isinstance(contract_interface, str):
             contract_interface = json.dumps(contract_interface)
@@ -29,6 +142,11 @@ class ContractTranslator(ethereum.abi.ContractTranslator):
         self.constructor_data = None
         self.function_data = {}
         self.event_data = {}
+        # custom errors by selector
+        self.error_data = {}
+        # argument validators and encoders, compiled on first use
+        self._validators = {}
+        self._encoders = {}
 
         for description in contract_interface:
             entry_type = description.get('type', 'function')
@@ -85,6 +203,13 @@ class ContractTranslator(ethereum.abi.ContractTranslator):
                     'anonymous': description.get('anonymous', False),
                 }
 
+            elif entry_type == 'error':
+                normalized_name = normalize_name(description['name'])
+                self.error_data[method_id(normalized_name, encode_types).to_bytes(4, 'big')] = {
+                    'name': normalized_name,
+                    'types': encode_types,
+                }
+
             elif entry_type == 'constructor':
                 if self.constructor_data is not None:
                     raise ValueError('Only one constructor is supported.')
@@ -103,19 +228,87 @@ class ContractTranslator(ethereum.abi.ContractTranslator):
             else:
                 raise ValueError('Unknown type {}'.format(description['type']))
 
+    def argument_validator(self, function_name):
+        """Returns a function taking the arguments of `function_name` and
+        returning them converted as needed by `argument_converter`. The
+        converters of each function are only built once"""
+        validator = self._validators.get(function_name)
+        if validator is None:
+            if function_name not in self.function_data:
+                raise ValueError('Unkown function {}'.format(function_name))
+            converters = [argument_converter(type_str)
+                          for type_str in self.function_data[function_name]['encode_types']]
+
+            def validator(args):
+                return [arg if converter is None else converter(arg) for converter, arg in zip(converters, args)]
+            self._validators[function_name] = validator
+        return validator
+
     def encode_function_call(self, function_name, args):
-        if function_name not in self.function_data:
-            raise ValueError('Unkown function {}'.format(function_name))
-        description = self.function_data[function_name]
-        function_selector = zpad(encode_int(description['prefix']), 4)
-        arguments = encode_abi(description['encode_types'], args)
-        return function_selector + arguments
+        encoder = self._encoders.get(function_name)
+        if encoder is None:
+            if function_name not in self.function_data:
+                raise ValueError('Unkown function {}'.format(function_name))
+            description = self.function_data[function_name]
+            # the same as encode_abi, without looking up the encoders on every call
+            encoder = (description['prefix'].to_bytes(4, 'big'),
+                       TupleEncoder(encoders=[registry.get_encoder(type_str) for type_str in description['encode_types']]))
+            self._encoders[function_name] = encoder
+        function_selector, arguments_encoder = encoder
+        return function_selector + arguments_encoder(args)
 
     def decode_function_result(self, function_name, data):
         description = self.function_data[function_name]
-        arguments = decode_abi(description['decode_types'], data)
+        arguments = _result_decoder(tuple(description['decode_types']))(ContextFramesBytesIO(data))
         return arguments
 
+    def encode_constructor_arguments(self, args):
+        if self.constructor_data is None:
+            raise ValueError("The contract interface didn't have a constructor")
+        return encode_abi(self.constructor_data['encode_types'], args)
+
+    def decode_error(self, data):
+        """Decodes revert data into a `RevertReason`, using the contract's
+        custom errors as well as `Error(string)` and `Panic(uint256)`"""
+        data = decode_hex(data)
+        error = self.error_data.get(data[:4])
+        if error is None:
+            return decode_revert_reason(data)
+        try:
+            args = decode_abi(error['types'], data[4:])
+        except DecodingError:
+            return RevertReason(None, (), data)
+        return RevertReason(error['name'], tuple(args), data)
+
+    def decode_event(self, log_topics, log_data):
+        """Returns a dict of the event's arguments, plus its name as
+        `_event_type`. Topics may be ints, bytes or hex strings.
+
+        Anonymous events are not supported."""
+        log_topics = [int.from_bytes(decode_hex(topic), 'big') if not isinstance(topic, int) else topic
+                      for topic in log_topics]
+        if isinstance(log_data, str):
+            log_data = decode_hex(log_data)
+        if not len(log_topics) or log_topics[0] not in self.event_data:
+            raise ValueError('Unknown log type')
+        event = self.event_data[log_topics[0]]
+
+        unindexed_types = [type_ for type_, indexed in zip(event['types'], event['indexed']) if not indexed]
+        unindexed_args = list(decode_abi(unindexed_types, log_data))
+
+        # topics[n] is the nth indexed argument
+        indexed_count = 1
+        result = {}
+        for name, type_, indexed in zip(event['names'], event['types'], event['indexed']):
+            if indexed:
+                value = decode_single(type_, log_topics[indexed_count].to_bytes(32, 'big'))
+                indexed_count += 1
+            else:
+                value = unindexed_args.pop(0)
+            result[name] = value
+        result['_event_type'] = event['name']
+        return result
+
 class ContractMethod:
 
     def __init__(self, name, contract):
@@ -129,10 +322,40 @@ class ContractMethod:
     def jsonrpc(self):
         return self.contract.jsonrpc
 
-    async def estimate_gas(self, *args, value=0, nonce=None, gasprice=None):
+    def decode_error(self, error):
+        """sets the `reason` of a `JsonRPCError`, decoding the contract's
+        custom errors"""
+        if isinstance(error, JsonRPCError):
+            error.reason = error_reason(error, self.contract.translator.decode_error)
+        return error
+
+    async def _decode_errors(self, awaitable):
+        try:
+            return await awaitable
+        except JsonRPCError as e:
+            self.decode_error(e)
+            raise
+
+    def _decode_bulk_errors(self, future):
+        # chained so the result is only available once errors are decoded
+        decoded = asyncio.get_event_loop().create_future()
+
+        def done(future):
+            if decoded.cancelled():
+                return
+            if future.cancelled():
+                decoded.cancel()
+            elif future.exception() is not None:
+                decoded.set_exception(self.decode_error(future.exception()))
+            else:
+                decoded.set_result(future.result())
+        future.add_done_callback(done)
+        return decoded
+
+    async def estimate_gas(self, *args, value=0, nonce=None, gasprice=None, validate=True):
         if self.is_constant:
             return 0
-        validated_args = self.validate_arguments(*args)
+        validated_args = self.validate_arguments(*args) if validate else args
         data = self.contract.translator.encode_function_call(self.name, validated_args)
         kwargs = {}
         if nonce is not None:
@@ -140,54 +363,90 @@ class ContractMethod:
         if gasprice is not None:
             kwargs['gasprice'] = gasprice
 
-        return await self.jsonrpc.eth_estimateGas(
-            self.contract.signer_address, self.contract.address, data=data, value=value, **kwargs)
+        return await self._decode_errors(self.jsonrpc.eth_estimateGas(
+            self.contract.signer_address, self.contract.address, data=data, value=value, **kwargs))
 
-    def data(self, *args):
-        validated_args = self.validate_arguments(*args)
+    def data(self, *args, validate=True):
+        """validate: convert hex string arguments (see `validate_arguments`),
+        pass False when the arguments are already bytes/ints"""
+        validated_args = self.validate_arguments(*args) if validate else args
         return self.contract.translator.encode_function_call(self.name, validated_args)
 
+    def decode_result(self, result):
+        return decode_call_result(self.contract.translator.function_data[self.name]['decode_types'], result)
+
+    async def _decode_in_executor(self, awaitable):
+        result = await awaitable
+        # a hex string, with 2 characters per byte
+        if len(result) < 2 * self.contract.decode_threshold:
+            return self.decode_result(result)
+        return await asyncio.get_event_loop().run_in_executor(
+            self.contract.decode_executor, decode_call_result,
+            self.contract.translator.function_data[self.name]['decode_types'], result)
+
+    def candidate(self, *args, value=0, from_address=None, validate=True):
+        """returns a `Call` of this method for `asynceth.contract.simulation.simulate`"""
+        return Call(self.contract.address, self.data(*args, validate=validate), value=value,
+                    from_address=from_address or self.contract.signer_address, method=self)
+
     def validate_arguments(self, *args):
-        validated_args = []
-        for (type, name), arg in zip(self.contract.translator.function_data[self.name]['signature'], args):
-            if type == 'address' and isinstance(arg, str):
-                validated_args.append(decode_hex(arg))
-            elif (type.startswith("uint") or type.startswith("int")) and isinstance(arg, str):
-                validated_args.append(int(arg, 16))
-            else:
-                validated_args.append(arg)
-        return validated_args
+        """converts hex string addresses and ints in the arguments (including
+        inside arrays and tuples) into the values eth_abi expects"""
+        return self.contract.translator.argument_validator(self.name)(args)
+
+    def __call__(self, *args, startgas=None, gasprice=None, value=0, nonce=None, network_id=None, bulk=None, block=None,
+                 max_fee_per_gas=None, max_priority_fee_per_gas=None, eip1559=False, use_ledger=None, validate=True):
+        """block: the block to use for constant calls, either a block number
+        (defaults to "latest") or a `BlockSnapshot` from `JsonRPCClient.at_block`
+
+        eip1559: send an EIP-1559 transaction, with any fees not given
+        suggested by the client's `fee_oracle`. Implied when either of
+        `max_fee_per_gas` and `max_priority_fee_per_gas` are given
 
-    def __call__(self, *args, startgas=None, gasprice=None, value=0, nonce=None, network_id=None, bulk=None):
-        validated_args = self.validate_arguments(*args)
+        use_ledger: take the signer's nonce and balance, the gas estimate
+        and the chain id from the client's `ledger` (see
+        `prepare_transaction`). Defaults to the value given to `set_signer`
+
+        validate: convert hex string arguments (see `validate_arguments`),
+        pass False to skip this when the arguments are already bytes/ints"""
+        validated_args = self.validate_arguments(*args) if validate else args
 
         data = self.contract.translator.encode_function_call(self.name, validated_args)
 
         if self.is_constant:
 
-            def result_processor(result):
-                result = decode_hex(result)
-                if result:
-                    decoded = self.contract.translator.decode_function_result(self.name, result)
-                    # decode string results
-                    decoded = [val.decode('utf-8') if isinstance(val, bytes) and type == 'string' else val
-                               for val, type in zip(decoded, self.contract.translator.function_data[self.name]['decode_types'])]
-                    # return the single value if there is only a single return value
-                    if len(decoded) == 1:
-                        return decoded[0]
-                    return decoded
-                return None
-
-            if bulk is not None:
-                return bulk.eth_call(
+            if self.contract.decode_executor is not None:
+                # results are decoded once they're returned, see `_decode_in_executor`
+                result_processor = None
+            else:
+                result_processor = self.decode_result
+
+            if isinstance(block, BlockSnapshot):
+                if bulk is not None:
+                    raise Exception("Cannot use a block snapshot within a bulk call")
+                call = block.eth_call(
                     from_address=self.contract.signer_address or '',
                     to_address=self.contract.address,
                     data=data, result_processor=result_processor)
-            # async
-            return self.jsonrpc.eth_call(
-                from_address=self.contract.signer_address or '',
-                to_address=self.contract.address,
-                data=data, result_processor=result_processor)
+            else:
+                if block is None:
+                    block = "latest"
+                if bulk is not None:
+                    future = bulk.eth_call(
+                        from_address=self.contract.signer_address or '',
+                        to_address=self.contract.address,
+                        data=data, block=block, result_processor=result_processor)
+                    if result_processor is None:
+                        return asyncio.ensure_future(self._decode_errors(self._decode_in_executor(future)))
+                    return self._decode_bulk_errors(future)
+                # async
+                call = self.jsonrpc.eth_call(
+                    from_address=self.contract.signer_address or '',
+                    to_address=self.contract.address,
+                    data=data, block=block, result_processor=result_processor)
+            if result_processor is None:
+                call = self._decode_in_executor(call)
+            return self._decode_errors(call)
 
         if bulk is not None:
             raise Exception("Cannot call non-constant function within a bulk call")
@@ -196,70 +455,35 @@ class ContractMethod:
             raise Exception("Cannot call non-constant function without a signer")
 
         # async
-        return self._async__call__(data=data, startgas=startgas, gasprice=gasprice, value=value, nonce=nonce, network_id=network_id)
+        return self._decode_errors(self._async__call__(data=data, startgas=startgas, gasprice=gasprice, value=value, nonce=nonce, network_id=network_id,
+                                   max_fee_per_gas=max_fee_per_gas, max_priority_fee_per_gas=max_priority_fee_per_gas,
+                                   eip1559=eip1559,
+                                   use_ledger=self.contract.use_ledger if use_ledger is None else use_ledger))
 
-    async def _async__call__(self, *, data, startgas=None, gasprice=None, value=0, nonce=None, network_id=None):
+    async def _async__call__(self, *, data, startgas=None, gasprice=None, value=0, nonce=None, network_id=None,
+                             max_fee_per_gas=None, max_priority_fee_per_gas=None, eip1559=False, use_ledger=False):
 
-        bulk = self.jsonrpc.bulk()
-        if nonce is None:
-            nonce = bulk.eth_getTransactionCount(self.contract.signer_address)
-        else:
-            nonce_future = asyncio.get_event_loop().create_future()
-            nonce_future.set_result(nonce)
-            nonce = nonce_future
-
-        balance = bulk.eth_getBalance(self.contract.signer_address)
-
-        if gasprice is None:
-            gasprice = bulk.eth_gasPrice()
-        else:
-            gasprice_future = asyncio.get_event_loop().create_future()
-            gasprice_future.set_result(gasprice)
-            gasprice = gasprice_future
-
-        if startgas is None:
-            startgas = bulk.eth_estimateGas(
-                self.contract.signer_address, self.contract.address,
-                data=data, value=value)
-        else:
-            startgas_future = asyncio.get_event_loop().create_future()
-            startgas_future.set_result(startgas)
-            startgas = startgas_future
-
-        if network_id is None:
-            network_id = bulk.net_version()
-        else:
-            if isinstance(network_id, int):
-                network_id = str(network_id)
-            network_id_future = asyncio.get_event_loop().create_future()
-            network_id_future.set_result(network_id)
-            network_id = network_id_future
-
-        await bulk.execute()
-        nonce = await nonce
-        balance = await balance
-        gasprice = await gasprice
-        startgas = await startgas
-        network_id = int(await network_id)
-
-        if startgas == 50000000 or startgas is None:
-            raise Exception("Unable to estimate startgas")
+        tx = await prepare_transaction(
+            self.jsonrpc, self.contract.private_key, self.contract.signer_address, self.contract.address, data,
+            value=value, nonce=nonce, gasprice=gasprice, startgas=startgas, network_id=network_id,
+            max_fee_per_gas=max_fee_per_gas, max_priority_fee_per_gas=max_priority_fee_per_gas, eip1559=eip1559,
+            use_ledger=use_ledger)
 
-        if balance < (startgas * gasprice):
-            raise Exception("Given account doesn't have enough funds")
-
-        tx = Transaction(nonce, gasprice, startgas, self.contract.address, value, data, 0, 0, 0)
-        tx = tx.sign(self.contract.private_key, network_id=network_id)
-        tx_encoded = '0x' + encode_hex(rlp.encode(tx, Transaction))
-
-        tx_hash = await self.jsonrpc.eth_sendRawTransaction(tx_encoded)
-        return TransactionResponse(self.jsonrpc, tx_hash, nonce)
+        tx_hash = await send_transaction(self.jsonrpc, tx, self.contract.signer_address, use_ledger)
+        return TransactionResponse(self.jsonrpc, tx_hash, tx.nonce)
 
 class Contract:
 
-    def __init__(self, jsonrpc, abi, name=None, cwd=None, bytecode=None, address=None, solc='solc', optimize=True, optimize_runs=None, no_optimize_yul=False):
+    def __init__(self, jsonrpc, abi, name=None, cwd=None, bytecode=None, address=None, solc='solc', optimize=True, optimize_runs=None, no_optimize_yul=False,
+                 cache=True, decode_executor=None, decode_threshold=16384):
+        """decode_executor: a `concurrent.futures` executor used to decode the
+        results of constant calls that are at least `decode_threshold` bytes
+        long, so decoding large results (e.g. arrays of structs) doesn't
+        block the event loop. With a `ProcessPoolExecutor` the hex result is
+        sent to the worker and converted there"""
         if isinstance(abi, str):
-            abi, bytecode = compile_solidity(abi, cwd=cwd, name=name, solc=solc, optimize=optimize, optimize_runs=optimize_runs, no_optimize_yul=no_optimize_yul)
+            abi, bytecode = compile_solidity(abi, cwd=cwd, name=name, solc=solc, optimize=optimize, optimize_runs=optimize_runs, no_optimize_yul=no_optimize_yul,
+                                             cache=cache)
         self.abi = abi
         self.bytecode = bytecode
         self.jsonrpc = jsonrpc
@@ -268,17 +492,25 @@ class Contract:
         self.address = address
         self.private_key = None
         self.signer_address = None
+        self.use_ledger = False
+        self.decode_executor = decode_executor
+        self.decode_threshold = decode_threshold
 
-    def set_signer(self, private_key):
+    def set_signer(self, private_key, use_ledger=False):
+        """use_ledger: send transactions using the client's `ledger` by default"""
         if isinstance(private_key, str):
             private_key = decode_hex(private_key)
         if not isinstance(private_key, bytes) or len(private_key) != 32:
             raise Exception("Invalid private key")
         self.private_key = private_key
-        self.signer_address = '0x' + encode_hex(privtoaddr(private_key))
+        self.signer_address = '0x' + private_key_to_address(private_key).hex()
+        self.use_ledger = use_ledger
         return self
 
-    async def deploy(self, *constructor_data, private_key=None, gasprice=None, startgas=None, nonce=None, value=0, network_id=None):
+    async def deploy(self, *constructor_data, private_key=None, gasprice=None, startgas=None, nonce=None, value=0, network_id=None,
+                     max_fee_per_gas=None, max_priority_fee_per_gas=None, eip1559=False, use_ledger=None):
+        if use_ledger is None:
+            use_ledger = self.use_ledger
         if private_key is None and self.private_key is None:
             raise Exception("Missing private key")
         elif private_key is None:
@@ -294,62 +526,17 @@ class Contract:
             constructor_call = self.translator.encode_constructor_arguments(constructor_data)
             bytecode += constructor_call
 
-        bulk = self.jsonrpc.bulk()
-        if nonce is None:
-            nonce = bulk.eth_getTransactionCount(self.signer_address)
-        else:
-            nonce_future = asyncio.get_event_loop().create_future()
-            nonce_future.set_result(nonce)
-            nonce = nonce_future
-
-        balance = bulk.eth_getBalance(self.signer_address)
-
-        if gasprice is None:
-            gasprice = bulk.eth_gasPrice()
-        else:
-            gasprice_future = asyncio.get_event_loop().create_future()
-            gasprice_future.set_result(gasprice)
-            gasprice = gasprice_future
-
-        if startgas is None:
-            startgas = bulk.eth_estimateGas(
-                self.signer_address, '',
-                data=bytecode, value=value)
-        else:
-            startgas_future = asyncio.get_event_loop().create_future()
-            startgas_future.set_result(startgas)
-            startgas = startgas_future
-
-        if network_id is None:
-            network_id = bulk.net_version()
-        else:
-            if isinstance(network_id, int):
-                network_id = str(network_id)
-            network_id_future = asyncio.get_event_loop().create_future()
-            network_id_future.set_result(network_id)
-            network_id = network_id_future
-
-        await bulk.execute()
-        nonce = await nonce
-        balance = await balance
-        gasprice = await gasprice
-        startgas = await startgas
-        network_id = int(await network_id)
-
-        if startgas == 50000000 or startgas is None:
-            raise Exception("Unable to estimate startgas")
-
-        if balance < (startgas * gasprice):
-            raise Exception("Given account doesn't have enough funds")
-
-        tx = Transaction(nonce, gasprice, startgas, b'', value, bytecode, 0, 0, 0)
-        tx = tx.sign(private_key)
-
-        tx_encoded = '0x' + encode_hex(rlp.encode(tx, Transaction))
+        # NOTE: legacy deployments are signed without EIP-155 replay protection
+        sender = '0x' + private_key_to_address(private_key).hex()
+        tx = await prepare_transaction(
+            self.jsonrpc, private_key, sender, '', bytecode,
+            value=value, nonce=nonce, gasprice=gasprice, startgas=startgas, network_id=network_id,
+            max_fee_per_gas=max_fee_per_gas, max_priority_fee_per_gas=max_priority_fee_per_gas, eip1559=eip1559,
+            eip155=False, use_ledger=use_ledger)
 
-        self.address = '0x' + encode_hex(tx.creates)
+        self.address = '0x' + tx.creates.hex()
 
-        tx_hash = await self.jsonrpc.eth_sendRawTransaction(tx_encoded)
+        tx_hash = await send_transaction(self.jsonrpc, tx, sender, use_ledger)
 
         while True:
             resp = await self.jsonrpc.eth_getTransactionByHash(tx_hash)
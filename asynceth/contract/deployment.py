@@ -0,0 +1,272 @@
+import asyncio
+import time
+
+from asynceth.contract.transaction import DynamicFeeTransaction, Transaction, contract_address
+from asynceth.crypto import private_key_to_address
+from asynceth.utils import decode_hex
+
+class DeploymentError(Exception):
+    """Raised when some of the transactions in a wave of deployments
+    couldn't be sent. `sent` are the deployments that were broadcast (and
+    may still be mined) and `errors` maps the names of the ones that failed
+    to their errors"""
+
+    def __init__(self, sent, errors):
+        super().__init__("Failed to send deployments {} (sent: {})".format(
+            ", ".join("'{}': {}".format(name, error) for name, error in errors.items()),
+            ", ".join("'{}'".format(deployment.name) for deployment in sent) or "none"))
+        self.sent = sent
+        self.errors = errors
+
+class Deployment:
+    """A contract to deploy as part of a `DeploymentPlan`. Constructor
+    arguments may be other `Deployment`s, which are replaced by their
+    address"""
+
+    def __init__(self, name, contract, args, value=0, startgas=None):
+        self.name = name
+        self.contract = contract
+        self.args = args
+        self.value = value
+        self.startgas = startgas
+        self.nonce = None
+        self.address = None
+        self.tx_hash = None
+        self.deployed = False
+
+    @property
+    def dependencies(self):
+        dependencies = []
+
+        def find(arg):
+            if isinstance(arg, Deployment):
+                if arg not in dependencies:
+                    dependencies.append(arg)
+            elif isinstance(arg, (list, tuple)):
+                for item in arg:
+                    find(item)
+        find(self.args)
+        return dependencies
+
+    def data(self):
+        """the creation bytecode, with the addresses of dependencies filled in"""
+
+        def resolve(arg):
+            if isinstance(arg, Deployment):
+                if arg.address is None:
+                    raise Exception("Deployment '{}' has no address yet".format(arg.name))
+                return decode_hex(arg.address)
+            elif isinstance(arg, list):
+                return [resolve(item) for item in arg]
+            elif isinstance(arg, tuple):
+                return tuple(resolve(item) for item in arg)
+            return arg
+        data = self.contract.bytecode
+        if self.args:
+            data += self.contract.translator.encode_constructor_arguments([resolve(arg) for arg in self.args])
+        return data
+
+class DeploymentPlan:
+    """Deploys a set of contracts, which may depend on each other, from a
+    single account:
+
+        plan = DeploymentPlan(jsonrpc, private_key)
+        token = plan.add("token", Contract(jsonrpc, "Token.sol"), "Token", 18)
+        plan.add("exchange", Contract(jsonrpc, "Exchange.sol"), token)
+        contracts = await plan.deploy()
+
+    Contracts are given sequential nonces in dependency order, so their
+    addresses are known before they're sent, and every deployment whose
+    dependencies have been sent is broadcast together without waiting for
+    the dependencies to be mined. Only deployments whose gas can't be
+    estimated until their dependencies exist (e.g. constructors calling
+    them) wait for them to be mined.
+
+    Once everything is sent the code of all the contracts is checked with
+    a single bulk `eth_getCode` per block until they are all deployed.
+    Legacy transactions are signed without EIP-155 replay protection, as
+    in `Contract.deploy`."""
+
+    def __init__(self, jsonrpc, private_key, *, gasprice=None, max_fee_per_gas=None, max_priority_fee_per_gas=None,
+                 eip1559=False, poll_interval=0.5, timeout=None):
+        if isinstance(private_key, str):
+            private_key = decode_hex(private_key)
+        if not isinstance(private_key, bytes) or len(private_key) != 32:
+            raise Exception("Invalid private key")
+        self.jsonrpc = jsonrpc
+        self.private_key = private_key
+        self.sender = '0x' + private_key_to_address(private_key).hex()
+        self.dynamic_fee = eip1559 or max_fee_per_gas is not None or max_priority_fee_per_gas is not None
+        if self.dynamic_fee and gasprice is not None:
+            raise ValueError("gasprice cannot be used with EIP-1559 fees")
+        self.gasprice = gasprice
+        self.max_fee_per_gas = max_fee_per_gas
+        self.max_priority_fee_per_gas = max_priority_fee_per_gas
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.deployments = {}
+
+    def add(self, name, contract, *args, value=0, startgas=None):
+        """adds the `Contract` `contract` (with its bytecode) to the plan,
+        returning the `Deployment` to use as an argument of other contracts"""
+        if name in self.deployments:
+            raise ValueError("Duplicate deployment '{}'".format(name))
+        if not contract.bytecode:
+            raise ValueError("Contract '{}' has no bytecode".format(name))
+        deployment = Deployment(name, contract, args, value=value, startgas=startgas)
+        self.deployments[name] = deployment
+        return deployment
+
+    def _order(self):
+        order = []
+        visiting = set()
+
+        def visit(deployment):
+            if deployment in order:
+                return
+            if deployment.name in visiting:
+                raise ValueError("Circular dependency on deployment '{}'".format(deployment.name))
+            if self.deployments.get(deployment.name) is not deployment:
+                raise ValueError("Deployment '{}' is not part of this plan".format(deployment.name))
+            visiting.add(deployment.name)
+            for dependency in deployment.dependencies:
+                visit(dependency)
+            visiting.discard(deployment.name)
+            order.append(deployment)
+        for deployment in self.deployments.values():
+            visit(deployment)
+        return order
+
+    async def _fees(self):
+        bulk = self.jsonrpc.bulk()
+        nonce = bulk.eth_getTransactionCount(self.sender, "pending")
+        balance = bulk.eth_getBalance(self.sender, "pending")
+        gasprice = chain_id = None
+        if self.dynamic_fee:
+            chain_id = bulk.eth_chainId()
+        elif self.gasprice is None:
+            gasprice = bulk.eth_gasPrice()
+        if self.dynamic_fee and (self.max_fee_per_gas is None or self.max_priority_fee_per_gas is None):
+            _, (max_fee, priority_fee) = await asyncio.gather(
+                bulk.execute(), self.jsonrpc.fee_oracle.fees(self.max_priority_fee_per_gas))
+            self.max_fee_per_gas = self.max_fee_per_gas or max_fee
+            self.max_priority_fee_per_gas = priority_fee
+        else:
+            await bulk.execute()
+        if gasprice is not None:
+            self.gasprice = await gasprice
+        return await nonce, await balance, (await chain_id) if chain_id is not None else None
+
+    async def _estimate(self, deployments):
+        bulk = self.jsonrpc.bulk()
+        futures = [bulk.eth_estimateGas(self.sender, None, data=deployment.data(), value=deployment.value)
+                   if deployment.startgas is None else None
+                   for deployment in deployments]
+        await bulk.execute()
+        estimates = []
+        for deployment, future in zip(deployments, futures):
+            if future is None:
+                estimates.append((deployment.startgas, None))
+            elif future.exception() is not None:
+                estimates.append((None, future.exception()))
+            else:
+                startgas = future.result()
+                if startgas == 50000000:
+                    estimates.append((None, Exception("Unable to estimate startgas")))
+                else:
+                    estimates.append((startgas, None))
+        return estimates
+
+    def _sign(self, deployment, nonce, startgas, chain_id):
+        if self.dynamic_fee:
+            tx = DynamicFeeTransaction(chain_id, nonce, self.max_priority_fee_per_gas, self.max_fee_per_gas,
+                                       startgas, '', deployment.value, deployment.data())
+            return tx.sign(self.private_key)
+        tx = Transaction(nonce, self.gasprice, startgas, '', deployment.value, deployment.data())
+        return tx.sign(self.private_key)
+
+    async def _wait_for_code(self, deployments, deadline, wait_for_all=True):
+        last_block = None
+        while True:
+            block_number = await self.jsonrpc.eth_blockNumber()
+            if block_number != last_block:
+                last_block = block_number
+                waiting = [deployment for deployment in deployments if not deployment.deployed]
+                bulk = self.jsonrpc.bulk()
+                # both at the same block, so a block landing in between can't
+                # make a deployment look mined without code
+                futures = [bulk.eth_getCode(deployment.address, block_number) for deployment in waiting]
+                mined_nonce = bulk.eth_getTransactionCount(self.sender, block_number)
+                await bulk.execute()
+                mined_nonce = await mined_nonce
+                deployed = False
+                for deployment, future in zip(waiting, futures):
+                    if (await future) not in ('0x', '0x0', ''):
+                        deployment.deployed = deployed = True
+                        deployment.contract.address = deployment.address
+                    elif deployment.nonce < mined_nonce:
+                        raise Exception("Failed to deploy contract '{}': resulting address '{}' has no code".format(
+                            deployment.name, deployment.address))
+                if all(deployment.deployed for deployment in deployments) or (deployed and not wait_for_all):
+                    return
+            if deadline is not None and time.monotonic() > deadline:
+                raise asyncio.TimeoutError("Timed out waiting for contracts to be deployed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def deploy(self):
+        """deploys all the contracts, returning {name: Contract} once all
+        of them have code"""
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        pending = self._order()
+        nonce, balance, chain_id = await self._fees()
+        sent = []
+        while pending:
+            ready = [deployment for deployment in pending
+                     if all(dependency.tx_hash is not None for dependency in deployment.dependencies)]
+            estimates = await self._estimate(ready)
+            to_send = []
+            for deployment, (startgas, error) in zip(ready, estimates):
+                if startgas is not None:
+                    to_send.append((deployment, startgas))
+                elif all(dependency.deployed for dependency in deployment.dependencies):
+                    raise error
+            if not to_send:
+                # estimates that failed may need their dependencies to be mined
+                await self._wait_for_code(sent, deadline, wait_for_all=False)
+                continue
+
+            cost = sum(startgas * (self.max_fee_per_gas if self.dynamic_fee else self.gasprice) + deployment.value
+                       for deployment, startgas in to_send)
+            if balance < cost:
+                raise Exception("Given account doesn't have enough funds")
+            balance -= cost
+
+            bulk = self.jsonrpc.bulk()
+            futures = []
+            # the addresses are known from the nonces before anything is mined
+            for deployment, startgas in to_send:
+                deployment.nonce = nonce
+                deployment.address = '0x' + contract_address(self.sender, nonce).hex()
+                nonce += 1
+                tx = self._sign(deployment, deployment.nonce, startgas, chain_id)
+                futures.append(bulk.eth_sendRawTransaction(tx.encode()))
+            await bulk.execute()
+            # nonces were assigned without the client's ledger
+            if self.sender in self.jsonrpc.ledger.accounts:
+                self.jsonrpc.ledger.invalidate(self.sender)
+            # later nonces are broadcast even if an earlier one fails, so
+            # every outcome is collected before raising
+            errors = {}
+            for (deployment, _), future in zip(to_send, futures):
+                if future.exception() is not None:
+                    errors[deployment.name] = future.exception()
+                    continue
+                deployment.tx_hash = future.result()
+                sent.append(deployment)
+                pending.remove(deployment)
+            if errors:
+                raise DeploymentError([deployment for deployment, _ in to_send if deployment.tx_hash is not None],
+                                      errors)
+
+        await self._wait_for_code(sent, deadline)
+        return {name: deployment.contract for name, deployment in self.deployments.items()}
@@ -0,0 +1,105 @@
+from asynceth.jsonrpc.errors import JsonRPCError
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+class Call:
+    """A candidate call to simulate. If `method` (a `ContractMethod`) is
+    given the result of the call is decoded using the contract's ABI"""
+
+    def __init__(self, to, data, *, value=0, from_address=None, method=None):
+        self.to = to
+        self.data = data
+        self.value = value
+        self.from_address = from_address
+        self.method = method
+
+class Simulation:
+    """The result of simulating a `Call`: `gas` is the gas estimate,
+    `result` the (decoded) result of `eth_call`, `access_list` and
+    `access_list_gas` the result of `eth_createAccessList`, and `reason`
+    the `RevertReason` if the call reverted. Anything that wasn't
+    requested, or failed, is None, with the first error in `error`"""
+
+    def __init__(self, call):
+        self.call = call
+        self.gas = None
+        self.result = None
+        self.access_list = None
+        self.access_list_gas = None
+        self.reason = None
+        self.error = None
+
+    @property
+    def reverted(self):
+        return self.reason is not None
+
+    def _set_error(self, error):
+        if self.error is None:
+            self.error = error
+        if self.reason is None and isinstance(error, JsonRPCError):
+            if self.call.method is not None:
+                # decodes the contract's custom errors
+                self.call.method.decode_error(error)
+            self.reason = error.reason
+
+def _outcome(future):
+    if future is None:
+        return None, None
+    error = future.exception()
+    if error is not None:
+        return None, error
+    return future.result(), None
+
+async def simulate(jsonrpc, calls, *, block="latest", from_address=None, estimate_gas=True,
+                   call=True, access_lists=True):
+    """Simulates the candidate `calls` with a single bulk request of
+    `eth_estimateGas`, `eth_call` and `eth_createAccessList` for each call,
+    returning a `Simulation` for each of them in the same order.
+
+    Calls without a `from_address` are sent from `from_address`, or the
+    zero address if that isn't given either."""
+    bulk = jsonrpc.bulk()
+    requests = []
+    for candidate in calls:
+        sender = candidate.from_address or from_address or ZERO_ADDRESS
+        estimate_future = call_future = access_list_future = None
+        if estimate_gas:
+            estimate_future = bulk.eth_estimateGas(sender, candidate.to, data=candidate.data, value=candidate.value)
+        if call:
+            call_future = bulk.eth_call(
+                from_address=sender, to_address=candidate.to, data=candidate.data, value=candidate.value,
+                block=block)
+        if access_lists:
+            access_list_future = bulk.eth_createAccessList(
+                sender, candidate.to, block=block, data=candidate.data, value=candidate.value)
+        requests.append((candidate, estimate_future, call_future, access_list_future))
+    await bulk.execute()
+
+    simulations = []
+    for candidate, estimate_future, call_future, access_list_future in requests:
+        simulation = Simulation(candidate)
+        simulation.gas, error = _outcome(estimate_future)
+        if error is not None:
+            simulation._set_error(error)
+        result, error = _outcome(call_future)
+        if error is not None:
+            simulation._set_error(error)
+        elif result is not None and candidate.method is not None:
+            # decoded here so that a result that can't be decoded only fails its own call
+            try:
+                simulation.result = candidate.method.decode_result(result)
+            except Exception as e:
+                simulation._set_error(e)
+        else:
+            simulation.result = result
+        access_list, error = _outcome(access_list_future)
+        if error is not None:
+            simulation._set_error(error)
+        elif access_list is not None:
+            if access_list.get('error'):
+                # geth reports reverts in the result rather than as an error
+                simulation._set_error(JsonRPCError(None, 3, access_list['error'], access_list.get('data')))
+            simulation.access_list = access_list.get('accessList')
+            simulation.access_list_gas = access_list.get('gasUsed')
+        simulations.append(simulation)
+    return simulations
@@ -1,39 +1,260 @@
 import asyncio
 
-import rlp
-import ethereum.transactions
-from ethereum import utils
-from ethereum.utils import normalize_key, ecsign
-from ethereum.transactions import unsigned_tx_from_tx, UnsignedTransaction
-
-# NOTE: this is to hotfix a bug in pyethereum's signing functions
-# fixed in https://github.com/ethereum/pyethereum/commit/d962694be03686a8e5c1d7459ae272b70a5c9f77
-# but not yet included in a release
-class Transaction(ethereum.transactions.Transaction):
-    def sign(self, key, network_id=None):
-        """Sign this transaction with a private key.
+from asynceth.crypto import keccak256, ecsign, private_key_to_address
+from asynceth.utils import decode_hex
 
-        A potentially already existing signature would be overridden.
-        """
-        if network_id is None:
-            rawhash = utils.sha3(rlp.encode(unsigned_tx_from_tx(self), UnsignedTransaction))
-        else:
-            assert 1 <= network_id < 2**63 - 18
-            rlpdata = rlp.encode(rlp.infer_sedes(self).serialize(self)[
-                                 :-3] + [network_id, b'', b''])
-            rawhash = utils.sha3(rlpdata)
+def _length_prefix(length, offset):
+    if length < 56:
+        return bytes([offset + length])
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([offset + 55 + len(length_bytes)]) + length_bytes
+
+def rlp_encode(item):
+    """RLP encodes bytes, non-negative ints and (nested) lists of them"""
+    if isinstance(item, int):
+        item = item.to_bytes((item.bit_length() + 7) // 8, 'big')
+    if isinstance(item, (bytes, bytearray)):
+        if len(item) == 1 and item[0] < 0x80:
+            return bytes(item)
+        return _length_prefix(len(item), 0x80) + bytes(item)
+    if isinstance(item, (list, tuple)):
+        payload = b''.join([rlp_encode(element) for element in item])
+        return _length_prefix(len(payload), 0xc0) + payload
+    raise TypeError("Cannot RLP encode {}".format(type(item)))
+
+def contract_address(sender, nonce):
+    """the address of a contract created by `sender` with the given nonce"""
+    return keccak256(rlp_encode([decode_hex(sender), nonce]))[12:]
 
-        key = normalize_key(key)
+class Transaction:
+    """A legacy transaction, signed with EIP-155 replay protection when
+    given a `network_id`"""
+
+    def __init__(self, nonce, gasprice, startgas, to, value, data, v=0, r=0, s=0):
+        self.nonce = nonce
+        self.gasprice = gasprice
+        self.startgas = startgas
+        self.to = decode_hex(to) if to else b''
+        self.value = value
+        self.data = decode_hex(data) if data else b''
+        self.v = v
+        self.r = r
+        self.s = s
+        self._sender = None
+
+    def _fields(self):
+        return [self.nonce, self.gasprice, self.startgas, self.to, self.value, self.data]
+
+    def signing_hash(self, network_id=None):
+        if network_id is None:
+            return keccak256(rlp_encode(self._fields()))
+        if not 1 <= network_id < 2 ** 63 - 18:
+            raise ValueError("Invalid network id")
+        return keccak256(rlp_encode(self._fields() + [network_id, b'', b'']))
 
-        v, r, s = ecsign(rawhash, key)
+    def sign(self, key, network_id=None):
+        """returns a copy of this transaction signed with the private key"""
+        v, r, s = ecsign(self.signing_hash(network_id), key)
         if network_id is not None:
             v += 8 + network_id * 2
+        tx = Transaction(self.nonce, self.gasprice, self.startgas, self.to, self.value, self.data, v, r, s)
+        tx._sender = private_key_to_address(key)
+        return tx
+
+    @property
+    def sender(self):
+        return self._sender
+
+    @property
+    def creates(self):
+        """the address of the contract this transaction creates, if any"""
+        if self.to or self._sender is None:
+            return None
+        return contract_address(self._sender, self.nonce)
+
+    def encode(self):
+        """the raw signed transaction"""
+        return rlp_encode(self._fields() + [self.v, self.r, self.s])
+
+    @property
+    def hash(self):
+        return keccak256(self.encode())
+
+def _storage_key(key):
+    # storage keys may be given as quantities, e.g. "0x1"
+    if isinstance(key, str) and len(key) % 2:
+        key = '0x0' + key[2:] if key[:2] in ('0x', '0X') else '0' + key
+    return decode_hex(key).rjust(32, b'\x00')
+
+def _access_list(access_list):
+    """converts an access list in the jsonrpc format (as returned by
+    `eth_createAccessList`) or as (address, storage_keys) pairs to its RLP
+    form"""
+    rval = []
+    for entry in access_list or []:
+        if isinstance(entry, dict):
+            address, storage_keys = entry['address'], entry.get('storageKeys', [])
+        else:
+            address, storage_keys = entry
+        rval.append([decode_hex(address), [_storage_key(key) for key in storage_keys]])
+    return rval
+
+class DynamicFeeTransaction:
+    """An EIP-1559 (type 2) transaction"""
+
+    transaction_type = 2
+
+    def __init__(self, chain_id, nonce, max_priority_fee_per_gas, max_fee_per_gas, startgas, to, value, data,
+                 access_list=None, y_parity=0, r=0, s=0):
+        self.chain_id = chain_id
+        self.nonce = nonce
+        self.max_priority_fee_per_gas = max_priority_fee_per_gas
+        self.max_fee_per_gas = max_fee_per_gas
+        self.startgas = startgas
+        self.to = decode_hex(to) if to else b''
+        self.value = value
+        self.data = decode_hex(data) if data else b''
+        self.access_list = _access_list(access_list)
+        self.y_parity = y_parity
+        self.r = r
+        self.s = s
+        self._sender = None
+
+    def _fields(self):
+        return [self.chain_id, self.nonce, self.max_priority_fee_per_gas, self.max_fee_per_gas,
+                self.startgas, self.to, self.value, self.data, self.access_list]
+
+    def signing_hash(self):
+        return keccak256(bytes([self.transaction_type]) + rlp_encode(self._fields()))
+
+    def sign(self, key):
+        """returns a copy of this transaction signed with the private key"""
+        v, r, s = ecsign(self.signing_hash(), key)
+        tx = DynamicFeeTransaction(self.chain_id, self.nonce, self.max_priority_fee_per_gas, self.max_fee_per_gas,
+                                   self.startgas, self.to, self.value, self.data, None, v - 27, r, s)
+        tx.access_list = self.access_list
+        tx._sender = private_key_to_address(key)
+        return tx
+
+    @property
+    def sender(self):
+        return self._sender
+
+    @property
+    def creates(self):
+        """the address of the contract this transaction creates, if any"""
+        if self.to or self._sender is None:
+            return None
+        return contract_address(self._sender, self.nonce)
+
+    def encode(self):
+        """the raw signed transaction"""
+        return bytes([self.transaction_type]) + rlp_encode(self._fields() + [self.y_parity, self.r, self.s])
+
+    @property
+    def hash(self):
+        return keccak256(self.encode())
+
+async def prepare_transaction(jsonrpc, private_key, sender, to, data, *, value=0, nonce=None, gasprice=None,
+                              startgas=None, network_id=None, max_fee_per_gas=None,
+                              max_priority_fee_per_gas=None, eip1559=False, eip155=True, use_ledger=False):
+    """Builds and signs a transaction from `sender`, fetching any values
+    that aren't given with a single bulk request.
+
+    If `use_ledger` is True the sender's balance and nonce, the gas
+    estimate and the chain id are taken from the client's `ledger`
+    instead, only being fetched when they aren't known yet (or are out of
+    date), and the sender's balance is debited locally.
+
+    An EIP-1559 transaction is built if `eip1559` is True or either of
+    the EIP-1559 fees are given, using the client's `fee_oracle` for any
+    missing fees instead of `eth_gasPrice`. Otherwise a legacy transaction
+    is built, signed with EIP-155 replay protection unless `eip155` is
+    False."""
+    dynamic_fee = eip1559 or max_fee_per_gas is not None or max_priority_fee_per_gas is not None
+    if dynamic_fee and gasprice is not None:
+        raise ValueError("gasprice cannot be used with EIP-1559 fees")
+
+    ledger = jsonrpc.ledger if use_ledger else None
+    bulk = jsonrpc.bulk()
+    nonce_future = balance_future = gasprice_future = startgas_future = network_id_future = None
+    if ledger is None:
+        if nonce is None:
+            nonce_future = bulk.eth_getTransactionCount(sender)
+        balance_future = bulk.eth_getBalance(sender)
+    if gasprice is None and not dynamic_fee:
+        gasprice_future = bulk.eth_gasPrice()
+    if startgas is None and ledger is not None:
+        startgas = ledger.gas_estimate(to, data, value)
+    if startgas is None:
+        startgas_future = bulk.eth_estimateGas(sender, to, data=data, value=value)
+    if network_id is None and (dynamic_fee or eip155):
+        if ledger is not None:
+            network_id = ledger.chain_id
+            if network_id is None:
+                network_id_future = bulk.eth_chainId()
+        elif dynamic_fee:
+            network_id_future = bulk.eth_chainId()
+        else:
+            network_id_future = bulk.net_version()
+
+    pending = [bulk.execute()]
+    if ledger is not None:
+        pending.append(ledger.sync(sender))
+    if dynamic_fee and (max_fee_per_gas is None or max_priority_fee_per_gas is None):
+        pending.append(jsonrpc.fee_oracle.fees(max_priority_fee_per_gas))
+        suggested_max_fee, max_priority_fee_per_gas = (await asyncio.gather(*pending))[-1]
+        if max_fee_per_gas is None:
+            max_fee_per_gas = suggested_max_fee
+    else:
+        await asyncio.gather(*pending)
+    if nonce_future is not None:
+        nonce = await nonce_future
+    if balance_future is not None:
+        balance = await balance_future
+    if gasprice_future is not None:
+        gasprice = await gasprice_future
+    if startgas_future is not None:
+        startgas = await startgas_future
+    if network_id_future is not None:
+        network_id = await network_id_future
+    if network_id is not None:
+        network_id = int(network_id)
+
+    if startgas == 50000000 or startgas is None:
+        raise Exception("Unable to estimate startgas")
+
+    if ledger is not None:
+        if startgas_future is not None:
+            startgas = ledger.record_gas_estimate(to, data, value, startgas)
+        if network_id_future is not None:
+            ledger.chain_id = network_id
+        # debits the sender's balance and assigns the nonce
+        nonce = ledger.reserve(sender, startgas * (max_fee_per_gas if dynamic_fee else gasprice) + value, nonce)
+    elif dynamic_fee:
+        if balance < startgas * max_fee_per_gas + value:
+            raise Exception("Given account doesn't have enough funds")
+    elif balance < startgas * gasprice + value:
+        raise Exception("Given account doesn't have enough funds")
+
+    if dynamic_fee:
+        tx = DynamicFeeTransaction(network_id, nonce, max_priority_fee_per_gas, max_fee_per_gas,
+                                   startgas, to, value, data)
+        return tx.sign(private_key)
+
+    tx = Transaction(nonce, gasprice, startgas, to, value, data, 0, 0, 0)
+    return tx.sign(private_key, network_id=network_id if eip155 else None)
 
-        ret = self.copy(
-            v=v, r=r, s=s
-        )
-        ret._sender = utils.privtoaddr(key)
-        return ret
+async def send_transaction(jsonrpc, tx, sender=None, use_ledger=False):
+    """sends the signed transaction, returning its hash. If the transaction
+    was prepared using the client's `ledger`, the sender's ledger entry is
+    refreshed before it's next used if sending fails"""
+    try:
+        return await jsonrpc.eth_sendRawTransaction(tx.encode())
+    except Exception:
+        if use_ledger:
+            jsonrpc.ledger.invalidate(sender)
+        raise
 
 class TransactionResponse:
     def __init__(self, jsonrpc, hash, nonce=None):
@@ -1,21 +1,77 @@
 import os
-import regex
+import re
 import json
+import concurrent.futures
+import shutil
 import subprocess
-from ethereum.utils import decode_hex
+from asynceth.contract.cache import default_compilation_cache, source_hashes
+from asynceth.utils import decode_hex
 
-def compile_solidity(sourcecode, name=None, cwd=None, solc='solc', optimize=True, optimize_runs=None, no_optimize_yul=False):
+_solc_versions = {}
+
+def _solc_version_info(solc='solc', cwd=None):
+    # relative paths to solc are relative to cwd
+    if os.path.dirname(solc) and cwd is not None:
+        path = shutil.which(os.path.join(cwd, solc))
+    else:
+        path = shutil.which(solc)
+    key = None
+    if path is not None:
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+        if key in _solc_versions:
+            return _solc_versions[key]
 
     process = subprocess.Popen([solc, '--version'], cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     output, stderrdata = process.communicate()
     try:
-        m = regex.match(r"^Version: (?P<version>\d+\.\d+\.\d+).*$",
-                        output.decode('utf-8').split('\n')[1])
+        full_version = output.decode('utf-8').split('\n')[1]
+        m = re.match(r"^Version: (?P<version>\d+\.\d+\.\d+).*$", full_version)
         version = tuple([int(i) for i in m.group('version').split('.')])
     except:
         raise Exception("Unable to parse solc version")
 
-    args = [solc, '--allow-paths', '.', '--combined-json', 'bin,abi']
+    if key is not None:
+        _solc_versions[key] = (version, full_version)
+    return version, full_version
+
+def solc_version(solc='solc', cwd=None):
+    """returns the (major, minor, patch) version of `solc`, which is only
+    run once for as long as the binary doesn't change"""
+    return _solc_version_info(solc, cwd)[0]
+
+def compiler_settings(version, optimize=True, optimize_runs=None, no_optimize_yul=False):
+    """the settings that affect the compiler's output, used in cache keys"""
+    return {
+        'optimize': bool(optimize),
+        'optimize_runs': (optimize_runs or 200) if optimize else None,
+        'no_optimize_yul': bool(version >= (0, 6, 0) and no_optimize_yul),
+    }
+
+def _resolve_cache(cache):
+    if cache is True:
+        return default_compilation_cache()
+    return cache or None
+
+def _contract_output(contract):
+    abi = contract['abi']
+    # older versions of solc return the abi as a json string
+    if isinstance(abi, str):
+        abi = json.loads(abi)
+    return {'abi': abi, 'bin': contract['bin'], 'bin-runtime': contract.get('bin-runtime', '')}
+
+def compile_solidity(sourcecode, name=None, cwd=None, solc='solc', optimize=True, optimize_runs=None, no_optimize_yul=False,
+                     cache=True):
+    """Compiles `sourcecode` (a path relative to `cwd`, or solidity source)
+    returning the abi and bytecode of the contract called `name`, or the
+    first contract in the source.
+
+    `cache` is True to use the default `CompilationCache`, a
+    `CompilationCache` or False to always run the compiler."""
+
+    version, full_version = _solc_version_info(solc, cwd)
+
+    args = [solc, '--allow-paths', '.', '--combined-json', 'bin,bin-runtime,abi']
 
     if optimize:
         args.append('--optimize')
@@ -37,31 +93,149 @@ def compile_solidity(sourcecode, name=None, cwd=None, solc='solc', optimize=True
 
     args.append(filename)
 
-    process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    output, stderrdata = process.communicate(input=sourcecode)
-    try:
-        output = json.loads(output)
-    except json.JSONDecodeError:
-        if output and stderrdata:
-            output += b'\n' + stderrdata
-        elif stderrdata:
-            output = stderrdata
-        raise Exception("Failed to compile source: {}\n{}\n{}".format(filename, ' '.join(args), output.decode('utf-8')))
+    cache = _resolve_cache(cache)
+    key = contracts = None
+    if cache is not None:
+        settings = compiler_settings(version, optimize, optimize_runs, no_optimize_yul)
+        key = cache.key(full_version, settings, source_hashes(filename, cwd, sourcecode))
+        if key is not None:
+            contracts = cache.get(key)
 
-    contract = None
-    try:
-        for key in output['contracts']:
-            if key.startswith(filename + ':'):
-                if name is not None and not key.endswith(':' + name):
-                    continue
-                contract = output['contracts'][key]
-                break
-    except KeyError:
-        raise
+    if contracts is None:
+        if isinstance(sourcecode, str):
+            sourcecode = sourcecode.encode('utf-8')
+        process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, stderrdata = process.communicate(input=sourcecode)
+        try:
+            output = json.loads(output)
+        except json.JSONDecodeError:
+            if output and stderrdata:
+                output += b'\n' + stderrdata
+            elif stderrdata:
+                output = stderrdata
+            raise Exception("Failed to compile source: {}\n{}\n{}".format(filename, ' '.join(args), output.decode('utf-8')))
+
+        contracts = {}
+        for contract_key, contract in output['contracts'].items():
+            path, _, contract_name = contract_key.rpartition(':')
+            if path == filename:
+                contracts[contract_name] = _contract_output(contract)
+        if key is not None:
+            cache.put(key, contracts)
+
+    if name is not None:
+        contract = contracts.get(name)
+    else:
+        contract = next(iter(contracts.values()), None)
     if contract is None:
         raise Exception("Unexpected compiler output: unable to find contract in result")
 
-    abi = json.loads(contract['abi'])
+    abi = contract['abi']
     data = decode_hex(contract['bin'])
 
     return abi, data
+
+def _standard_json_input(sources, cwd, version, optimize, optimize_runs, no_optimize_yul):
+    contents = {}
+    for filename in sources:
+        for path in source_hashes(filename, cwd):
+            if path in contents:
+                continue
+            try:
+                with open(os.path.join(cwd, path), 'r') as f:
+                    contents[path] = {'content': f.read()}
+            except OSError as e:
+                if path == filename:
+                    raise FileNotFoundError("Unable to read source '{}': {}".format(path, e.strerror or e))
+                # missing imports are left for solc to report
+    optimizer = {'enabled': bool(optimize), 'runs': optimize_runs or 200}
+    if optimize and version >= (0, 6, 0) and no_optimize_yul:
+        optimizer['details'] = {'yul': False}
+    return {
+        'language': 'Solidity',
+        'sources': contents,
+        'settings': {
+            'optimizer': optimizer,
+            'outputSelection': {'*': {'*': ['abi', 'evm.bytecode.object', 'evm.deployedBytecode.object']}},
+        },
+    }
+
+def _compile_standard_json(solc, cwd, input_json):
+    args = [solc, '--allow-paths', '.', '--standard-json']
+    process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, stderrdata = process.communicate(input=json.dumps(input_json).encode('utf-8'))
+    try:
+        output = json.loads(output)
+    except json.JSONDecodeError:
+        raise Exception("Failed to compile sources: {}\n{}\n{}".format(
+            ', '.join(input_json['sources']), ' '.join(args), (output or stderrdata).decode('utf-8')))
+    errors = [error.get('formattedMessage') or error.get('message')
+              for error in output.get('errors', []) if error.get('severity') == 'error']
+    if errors:
+        raise Exception("Failed to compile sources: {}\n{}".format(', '.join(input_json['sources']), '\n'.join(errors)))
+
+    results = {}
+    for path, contracts in output.get('contracts', {}).items():
+        results[path] = {name: {'abi': contract['abi'],
+                                'bin': contract['evm']['bytecode']['object'],
+                                'bin-runtime': contract['evm']['deployedBytecode']['object']}
+                         for name, contract in contracts.items()}
+    return results
+
+def compile_contracts(sources, cwd=None, solc='solc', optimize=True, optimize_runs=None, no_optimize_yul=False,
+                      cache=True, workers=None):
+    """Compiles the source files `sources` (paths relative to `cwd`) with
+    solc's `--standard-json` mode, returning {path: {name: contract}} for
+    every contract defined in them, with each contract being a dict of
+    `abi`, `bin` (the bytecode) and `bin-runtime` (the deployed bytecode)
+    as hex strings.
+
+    Sources found in the compilation cache (see `compile_solidity`) are not
+    compiled again, and everything compiled is added to the cache. All the
+    other sources are compiled in a single solc invocation, or split
+    between `workers` concurrent invocations."""
+
+    version, full_version = _solc_version_info(solc, cwd)
+    if cwd is None:
+        cwd = "."
+    cwd = os.path.abspath(cwd)
+    sources = [os.path.normpath(source) for source in sources]
+
+    cache = _resolve_cache(cache)
+    settings = compiler_settings(version, optimize, optimize_runs, no_optimize_yul)
+    results = {}
+    missing = []
+    for source in sources:
+        if cache is not None:
+            key = cache.key(full_version, settings, source_hashes(source, cwd))
+            contracts = cache.get(key) if key is not None else None
+            if contracts is not None:
+                results[source] = contracts
+                continue
+        missing.append(source)
+
+    if missing:
+        if workers is None or workers <= 1 or len(missing) == 1:
+            chunks = [missing]
+        else:
+            chunks = [missing[i::workers] for i in range(min(workers, len(missing)))]
+        inputs = [_standard_json_input(chunk, cwd, version, optimize, optimize_runs, no_optimize_yul)
+                  for chunk in chunks]
+        if len(inputs) == 1:
+            outputs = [_compile_standard_json(solc, cwd, inputs[0])]
+        else:
+            # each invocation runs in its own solc process
+            with concurrent.futures.ThreadPoolExecutor(len(inputs)) as executor:
+                outputs = list(executor.map(lambda input_json: _compile_standard_json(solc, cwd, input_json), inputs))
+
+        for chunk, output in zip(chunks, outputs):
+            for path, contracts in output.items():
+                # imported sources are cached as well
+                if cache is not None:
+                    key = cache.key(full_version, settings, source_hashes(path, cwd))
+                    if key is not None:
+                        cache.put(key, contracts)
+            for source in chunk:
+                results[source] = output.get(source, {})
+
+    return {source: results[source] for source in sources}
@@ -0,0 +1,163 @@
+"""keccak256 and secp256k1 signing.
+
+Uses pysha3 or pycryptodome for keccak256 and coincurve for signing when
+they are available, falling back to eth_hash and a pure python
+implementation of secp256k1 otherwise."""
+
+import functools
+import hashlib
+import hmac
+
+try:
+    from sha3 import keccak_256 as _keccak_256
+
+    def _keccak(data):
+        return _keccak_256(data).digest()
+except ImportError:
+    try:
+        from Crypto.Hash import keccak as _pycryptodome_keccak
+
+        def _keccak(data):
+            return _pycryptodome_keccak.new(data=data, digest_bits=256).digest()
+    except ImportError:
+        from eth_hash.auto import keccak as _keccak
+
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+def keccak256(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return _keccak(data)
+
+# secp256k1 curve parameters
+P = 2 ** 256 - 2 ** 32 - 977
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+     0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+
+def _jacobian_double(p):
+    x, y, z = p
+    if y == 0:
+        return (0, 0, 0)
+    ysq = (y * y) % P
+    s = (4 * x * ysq) % P
+    m = (3 * x * x) % P
+    nx = (m * m - 2 * s) % P
+    ny = (m * (s - nx) - 8 * ysq * ysq) % P
+    nz = (2 * y * z) % P
+    return (nx, ny, nz)
+
+def _jacobian_add(p, q):
+    if p[1] == 0:
+        return q
+    if q[1] == 0:
+        return p
+    u1 = (p[0] * q[2] ** 2) % P
+    u2 = (q[0] * p[2] ** 2) % P
+    s1 = (p[1] * q[2] ** 3) % P
+    s2 = (q[1] * p[2] ** 3) % P
+    if u1 == u2:
+        if s1 != s2:
+            return (0, 0, 1)
+        return _jacobian_double(p)
+    h = u2 - u1
+    r = s2 - s1
+    h2 = (h * h) % P
+    h3 = (h * h2) % P
+    u1h2 = (u1 * h2) % P
+    nx = (r * r - h3 - 2 * u1h2) % P
+    ny = (r * (u1h2 - nx) - s1 * h3) % P
+    nz = (h * p[2] * q[2]) % P
+    return (nx, ny, nz)
+
+def _multiply(point, n):
+    result = (0, 0, 1)
+    addend = (point[0], point[1], 1)
+    while n:
+        if n & 1:
+            result = _jacobian_add(result, addend)
+        addend = _jacobian_double(addend)
+        n >>= 1
+    if result[1] == 0:
+        raise ValueError("Point at infinity")
+    z = pow(result[2], P - 2, P)
+    return ((result[0] * z ** 2) % P, (result[1] * z ** 3) % P)
+
+def _deterministic_k(msghash, key):
+    """RFC 6979 nonce generation (as used by libsecp256k1)"""
+    h1 = (int.from_bytes(msghash, 'big') % N).to_bytes(32, 'big')
+    v = b'\x01' * 32
+    k = b'\x00' * 32
+    k = hmac.new(k, v + b'\x00' + key + h1, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    k = hmac.new(k, v + b'\x01' + key + h1, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    while True:
+        v = hmac.new(k, v, hashlib.sha256).digest()
+        candidate = int.from_bytes(v, 'big')
+        if 1 <= candidate < N:
+            return candidate
+        k = hmac.new(k, v + b'\x00', hashlib.sha256).digest()
+        v = hmac.new(k, v, hashlib.sha256).digest()
+
+def _python_ecsign(msghash, key):
+    d = int.from_bytes(key, 'big')
+    if not 1 <= d < N:
+        raise ValueError("Invalid private key")
+    k = _deterministic_k(msghash, key)
+    rx, ry = _multiply(G, k)
+    r = rx % N
+    s = (pow(k, N - 2, N) * (int.from_bytes(msghash, 'big') + r * d)) % N
+    recid = (ry & 1) | (2 if rx >= N else 0)
+    # use the low s value (EIP-2)
+    if s > N // 2:
+        s = N - s
+        recid ^= 1
+    return 27 + recid, r, s
+
+def _python_public_key(key):
+    d = int.from_bytes(key, 'big')
+    if not 1 <= d < N:
+        raise ValueError("Invalid private key")
+    x, y = _multiply(G, d)
+    return x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
+
+# creating a coincurve key derives its public key, which costs as much as
+# signing, so keys are reused for signers sending many transactions
+@functools.lru_cache(maxsize=256)
+def _coincurve_private_key(key):
+    return coincurve.PrivateKey(key)
+
+def _coincurve_ecsign(msghash, key):
+    signature = _coincurve_private_key(key).sign_recoverable(msghash, hasher=None)
+    return 27 + signature[64], int.from_bytes(signature[0:32], 'big'), int.from_bytes(signature[32:64], 'big')
+
+def _coincurve_public_key(key):
+    return _coincurve_private_key(key).public_key.format(compressed=False)[1:]
+
+if coincurve is not None:
+    _ecsign = _coincurve_ecsign
+    _public_key = _coincurve_public_key
+else:
+    _ecsign = _python_ecsign
+    _public_key = _python_public_key
+
+def ecsign(msghash, key):
+    """signs the 32 byte `msghash` with the private `key`, returning
+    (v, r, s) with v being 27 or 28"""
+    if len(msghash) != 32:
+        raise ValueError("msghash must be 32 bytes")
+    if len(key) != 32:
+        raise ValueError("Invalid private key")
+    return _ecsign(msghash, key)
+
+def private_key_to_public_key(key):
+    """returns the 64 byte uncompressed public key (without the 0x04 prefix)"""
+    return _public_key(key)
+
+@functools.lru_cache(maxsize=256)
+def private_key_to_address(key):
+    return keccak256(private_key_to_public_key(key))[12:]
@@ -1,4 +1,7 @@
-
-from asynceth.jsonrpc.client import JsonRPCClient
+def __getattr__(name):
+    if name == "JsonRPCClient":
+        from asynceth.jsonrpc.client import JsonRPCClient
+        return JsonRPCClient
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 __all__ = ['JsonRPCClient']
@@ -3,6 +3,7 @@ import asyncio
 import weakref
 
 from asynceth.jsonrpc.errors import HTTPError
+from asynceth.jsonrpc.transport import DEFAULT_TRANSPORT
 
 class HTTPClient:
 
@@ -15,7 +16,7 @@ class HTTPClient:
 
     def __new__(cls, force_instance=False, **kwargs):
         loop = asyncio.get_event_loop()
-        if force_instance:
+        if force_instance or kwargs.get('transport') is not None:
             instance_cache = None
         else:
             instance_cache = cls._async_clients()
@@ -30,12 +31,20 @@ class HTTPClient:
         instance.initialise(**kwargs)
         return instance
 
-    def initialise(self, *, max_clients=100, connect_timeout=None, verify_ssl=True):
+    def initialise(self, *, max_clients=100, connect_timeout=None, verify_ssl=True, transport=None):
+        if transport is None:
+            transport = DEFAULT_TRANSPORT
         connector = aiohttp.TCPConnector(
-            limit=max_clients)
+            limit=max_clients,
+            limit_per_host=transport.limit_per_host,
+            keepalive_timeout=transport.keepalive_timeout,
+            use_dns_cache=transport.dns_cache_ttl is not None,
+            ttl_dns_cache=transport.dns_cache_ttl)
         self._verify_ssl = verify_ssl
         timeout = aiohttp.ClientTimeout(connect=connect_timeout)
-        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=timeout,
+            headers={"Accept-Encoding": transport.accept_encoding})
 
     async def fetch(self, url, *, method="GET", headers=None, body=None, request_timeout=None):
         fn = getattr(self._session, method.lower())
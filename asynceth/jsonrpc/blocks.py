@@ -0,0 +1,59 @@
+import re
+
+from asynceth.utils import parse_int
+
+class BlockBundle:
+    """A block along with the receipts of all its transactions and/or
+    its logs.
+
+    When the receipts were fetched the logs are taken from them rather
+    than requested separately."""
+
+    def __init__(self, block, receipts=None, logs=None):
+        self.block = block
+        self.receipts = receipts
+        self._logs = logs
+
+    @property
+    def number(self):
+        return parse_int(self.block['number'])
+
+    @property
+    def hash(self):
+        return self.block['hash']
+
+    @property
+    def transactions(self):
+        return self.block['transactions']
+
+    @property
+    def logs(self):
+        if self._logs is None and self.receipts is not None:
+            self._logs = [log for receipt in self.receipts for log in receipt['logs']]
+        return self._logs
+
+    def is_consistent(self):
+        """checks that the receipts and logs all belong to this block, i.e.
+        the block wasn't reorged while they were being fetched"""
+        block_hash = self.hash
+        if self.receipts is not None:
+            if len(self.receipts) != len(self.transactions):
+                return False
+            if any(receipt is None or receipt['blockHash'] != block_hash for receipt in self.receipts):
+                return False
+        if self._logs is not None:
+            if any(log['blockHash'] != block_hash for log in self._logs):
+                return False
+        return True
+
+# e.g. "Method not found", "the method eth_getBlockReceipts does not exist/is
+# not available" or "method not supported", but not "header not found"
+METHOD_NOT_FOUND_RE = re.compile(
+    r"\bmethod\b.*\b(not found|does not exist|is not available|not supported)|\bunsupported method\b",
+    re.IGNORECASE)
+
+def is_method_not_found(error):
+    """checks if a `JsonRPCError` indicates the node doesn't support the method"""
+    if error.code == -32601:
+        return True
+    return METHOD_NOT_FOUND_RE.search(error.message or "") is not None
@@ -4,25 +4,37 @@ import random
 import logging
 import time
 
-from asynceth.jsonrpc.errors import JsonRPCError, HTTPError
-from asynceth.utils import parse_int, validate_hex_int, validate_block_param
+from asynceth.jsonrpc.errors import (
+    JsonRPCError, HTTPError, ConcurrencyLimitExceeded, CircuitOpenError, RateLimitExceeded)
+from asynceth.jsonrpc.limiter import AdaptiveConcurrencyLimiter, request_kind
+from asynceth.jsonrpc.retry import RetryPolicy, CircuitBreaker
+from asynceth.jsonrpc.hedging import Hedging
+from asynceth.jsonrpc.concurrency import map_concurrently
+from asynceth.jsonrpc.blocks import BlockBundle, is_method_not_found
+from asynceth.jsonrpc.snapshot import BlockSnapshot
+from asynceth.jsonrpc.fees import FeeOracle
+from asynceth.jsonrpc.ledger import Ledger
+from asynceth.utils import parse_int, validate_hex_int, validate_block_param, decode_hex
 from asynceth.jsonrpc.middleware import Middleware
+from asynceth.jsonrpc.transport import select_http_client
 
-logging.basicConfig()
 JSONRPC_LOG = logging.getLogger("asynceth.jsonrpc.client")
 
-# select which client to use
-try:
-    # if aiohttp is available, prefer that
-    import aiohttp
-    from asynceth.jsonrpc.aiohttp_client import HTTPClient
-    JSONRPC_LOG.debug("using aiohttp jsonrpc client")
-except:
-    try:
-        from asynceth.jsonrpc.tornado_client import HTTPClient
-        JSONRPC_LOG.debug("using tornado jsonrpc client")
-    except:
-        raise ModuleNotFoundError("JsonRPCClient requires either aiohttp or tornado")
+_default_http_client = None
+
+def default_http_client():
+    """the http client used when no `client_cls` or `transport` is given
+    (aiohttp if available, then tornado, then httpx), selected on first use
+    so importing this module doesn't import any of them"""
+    global _default_http_client
+    if _default_http_client is None:
+        _default_http_client = select_http_client()
+    return _default_http_client
+
+def __getattr__(name):
+    if name == "HTTPClient":
+        return default_http_client()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 JSON_RPC_VERSION = "2.0"
 
@@ -35,35 +47,128 @@ def is_retryable_error(message):
         return True
     return False
 
+def is_retryable_exception(error):
+    """transport errors and http error statuses, as opposed to e.g. a
+    malformed response body, which would most likely fail the same way
+    again"""
+    return isinstance(error, (HTTPError, OSError, asyncio.TimeoutError))
+
+BLOCK_TRACE_METHODS = ("trace_block", "trace_replayBlockTransactions", "debug_traceBlockByNumber")
+
+def _trace_types(vmTrace, trace, stateDiff):
+    trace_type = []
+    if vmTrace:
+        trace_type.append('vmTrace')
+    if trace:
+        trace_type.append('trace')
+    if stateDiff:
+        trace_type.append('stateDiff')
+    return trace_type
+
+def _debug_trace_options(disableStorage, disableMemory, disableStack, tracer, timeout):
+    kwargs = {}
+    if disableStorage is not None:
+        kwargs['disableStorage'] = disableStorage
+    if disableMemory is not None:
+        kwargs['disableMemory'] = disableMemory
+    if disableStack is not None:
+        kwargs['disableStack'] = disableStack
+    if tracer is not None:
+        kwargs['tracer'] = tracer
+    if timeout is not None:
+        kwargs['timeout'] = str(timeout)
+    return kwargs
+
+# http statuses that suggest the node is overloaded
+OVERLOAD_STATUSES = (429, 502, 503, 504, 599)
+
 class JsonRPCClient:
 
     def __init__(self, url, *, should_retry=True, log=None,
                  max_clients=500, bulk_mode=False, connect_timeout=5.0, request_timeout=30.0,
-                 client_cls=None, **kwargs):
+                 client_cls=None, concurrency_limiter=None, retry_policy=None,
+                 circuit_breaker=None, rate_limiter=None, hedging=None, transport=None, **kwargs):
+        """url: the url of the node, or a list of urls to fail over to in order
+
+        concurrency_limiter: None (default) to only rely on `max_clients`,
+        True to use an `AdaptiveConcurrencyLimiter` bounded by `max_clients`, or
+        a limiter instance (which may be shared between clients)
+
+        retry_policy: a `RetryPolicy` controlling the backoff, number of
+        attempts and retry budget used when `should_retry` is True
+
+        circuit_breaker: True to track each url with a `CircuitBreaker`, or
+        a function returning a new `CircuitBreaker`, to fail fast when the
+        node is down
+
+        rate_limiter: a `RateLimiter` applied to every url, or a dict
+        mapping urls to their own `RateLimiter`
+
+        hedging: True or a `Hedging` instance to send a second request for
+        slow reads to the next url (or the same url if there is only one)
+
+        transport: a `TransportProfile` with connection settings (http2,
+        compression, keepalive etc), also used to pick the http client when
+        `client_cls` isn't given"""
 
         if 'middleware' in kwargs:
             self.middleware = kwargs.pop('middleware')
         else:
             self.middleware = Middleware()
 
-        self._url = url
+        if isinstance(url, (list, tuple)):
+            if len(url) == 0:
+                raise ValueError("At least one url is required")
+            self._urls = list(url)
+        else:
+            self._urls = [url]
+        self._url = self._urls[0]
         self._max_clients = max_clients
         self._request_timeout = request_timeout
         self._connect_timeout = connect_timeout
+        if transport is not None:
+            kwargs['transport'] = transport
         if client_cls:
             self._client_cls = client_cls
             self._httpclient = client_cls(max_clients=self._max_clients,
                                           connect_timeout=self._connect_timeout, **kwargs)
         else:
             self._client_cls = None
-            self._httpclient = HTTPClient(max_clients=self._max_clients,
-                                          connect_timeout=self._connect_timeout, **kwargs)
+            http_client_cls = default_http_client() if transport is None else select_http_client(transport)
+            self._httpclient = http_client_cls(max_clients=self._max_clients,
+                                               connect_timeout=self._connect_timeout, **kwargs)
         self._client_kwargs = kwargs
+        if concurrency_limiter is True:
+            concurrency_limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=min(20, max_clients), max_limit=max_clients)
+        self._concurrency_limiter = concurrency_limiter or None
         if log is None:
             self.log = JSONRPC_LOG
         else:
             self.log = log
         self.should_retry = should_retry
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker
+        if circuit_breaker:
+            self._circuit_breakers = {url: circuit_breaker() for url in self._urls}
+        else:
+            self._circuit_breakers = None
+        if rate_limiter is None or isinstance(rate_limiter, dict):
+            self._rate_limiters = rate_limiter
+        else:
+            self._rate_limiters = {url: rate_limiter for url in self._urls}
+        if hedging is True:
+            hedging = Hedging()
+        self._hedging = hedging or None
+        self._fee_oracle = None
+        self._ledger = None
+        # None until we know whether the node supports eth_getBlockReceipts
+        self._block_receipts_supported = None
+        # the client a bulk was created from, which owns the http client
+        self._parent = None
         self._bulk_mode = bulk_mode
         self._bulk_futures = {}
         self._bulk_data = []
@@ -99,32 +204,76 @@ class JsonRPCClient:
     async def _execute_single(self, data, result_processor, request_timeout=None):
         if request_timeout is None:
             request_timeout = self._request_timeout
+        self.retry_policy.record_request()
+        if self.middleware.before_request:
+            data = await self.middleware.run_before_request(data)
+        if self._hedging is not None and data['method'] in self._hedging.methods:
+            execute = self._execute_hedged
+        else:
+            execute = self._execute_single_attempts
+        context = self.middleware.start_request(data, self._url)
+        if context is None:
+            return await execute(data, result_processor, request_timeout, None)
+        try:
+            result = await execute(data, result_processor, request_timeout, context)
+        except BaseException as e:
+            self.middleware.end_request(context, exception=e)
+            raise
+        self.middleware.end_request(context, response=context.response)
+        return result
+
+    async def _execute_hedged(self, data, result_processor, request_timeout, context):
+        """sends a second request to the next url if the first is slower
+        than usual, returning the first successful result"""
+        hedging = self._hedging
+        hedging.record_request()
+        method = data['method']
+        start = time.time()
+        primary = asyncio.ensure_future(self._execute_single_attempts(
+            data, result_processor, request_timeout, context))
+        tasks = [primary]
+        try:
+            delay = hedging.delay(method)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and hedging.try_hedge():
+                    if context is not None:
+                        context.hedged = True
+                    tasks.append(asyncio.ensure_future(self._execute_single_attempts(
+                        data, result_processor, request_timeout - delay, None, url_offset=1)))
+            pending = tasks
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    # when the hedge wins the primary's latency is at least this
+                    hedging.record(method, time.time() - start)
+                    return succeeded[0].result()
+                if error is None:
+                    error = next(iter(done)).exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _execute_single_attempts(self, data, result_processor, request_timeout, context, url_offset=0):
         # NOTE: letting errors fall through here for now as it means
         # there is something drastically wrong with the jsonrpc server
         # which means something probably needs to be fixed
         req_start = time.time()
         retries = 0
-        for fn in self.middleware.before_request:
-            res = fn(data)
-            if asyncio.iscoroutine(res):
-                res = await res
-            if res is not None:
-                data = res
         while True:
             try:
-                resp = await self._httpclient.fetch(
-                    self._url,
-                    method="POST",
-                    body=data,
-                    request_timeout=request_timeout
-                )
-            except concurrent.futures.CancelledError:
+                rval = await self._post(data, request_timeout, context, retries + url_offset)
+            except (concurrent.futures.CancelledError, ConcurrencyLimitExceeded, CircuitOpenError, RateLimitExceeded):
                 raise
             except Exception as e:
-                if self.should_retry and isinstance(e, HTTPError) and (e.status == 599 or e.status == 502):
-                    # always retry after 599
-                    pass
-                elif not self.should_retry or time.time() - req_start >= request_timeout:
+                if not is_retryable_exception(e):
+                    raise
+                delay = self._retry_delay(retries, req_start, request_timeout)
+                if delay is None:
                     raise
                 if retries == 0:
                     logger = self.log.exception
@@ -133,17 +282,14 @@ class JsonRPCClient:
                 logger("Error in JsonRPCClient._fetch ({}, {}) \"{}\" attempt {}".format(
                     data['method'], data['params'], str(e), retries))
                 retries += 1
-                await asyncio.sleep(random.random())
+                self.middleware.retry_request(context, e)
+                await asyncio.sleep(delay)
                 continue
 
-            rval = await resp.json(content_type=None)
-
-            for fn in self.middleware.after_request:
-                res = fn(data, rval)
-                if asyncio.iscoroutine(res):
-                    res = await res
-                if res is not None:
-                    rval = res
+            if self.middleware.after_request:
+                rval = await self.middleware.run_after_request(data, rval)
+            if context is not None:
+                context.response = rval
 
             # verify the id we got back is the same as what we passed
             if data['id'] != rval['id']:
@@ -154,9 +300,11 @@ class JsonRPCClient:
                 # the nodes haven't all synced to the current block yet
                 # TODO: this is only supported by parity: geth returns "<nil>" when the block number if too high
                 if 'message' in rval['error'] and is_retryable_error(rval['error']['message']):
-                    retries += 1
-                    if self.should_retry and time.time() - req_start < request_timeout:
-                        await asyncio.sleep(random.random())
+                    delay = self._retry_delay(retries, req_start, request_timeout)
+                    if delay is not None:
+                        retries += 1
+                        self.middleware.retry_request(context)
+                        await asyncio.sleep(delay)
                         continue
                 raise JsonRPCError(rval['id'], rval['error']['code'],
                                    rval['error']['message'],
@@ -166,8 +314,96 @@ class JsonRPCClient:
                 return result_processor(rval['result'])
             return rval['result']
 
-    def close(self):
-        return self._httpclient.close()
+    def _retry_delay(self, retries, req_start, request_timeout):
+        """returns how long to wait before the next attempt, or None if the
+        request should not be retried"""
+        if not self.should_retry:
+            return None
+        if time.time() - req_start >= request_timeout:
+            return None
+        if not self.retry_policy.should_retry(retries + 1):
+            return None
+        return self.retry_policy.delay(retries)
+
+    def _select_url(self, retries=0):
+        """picks the url to use for the next attempt, rotating through the
+        urls on retries and skipping any whose circuit is open"""
+        if self._circuit_breakers is None:
+            return self._urls[retries % len(self._urls)]
+        for i in range(len(self._urls)):
+            url = self._urls[(retries + i) % len(self._urls)]
+            if self._circuit_breakers[url].allow_request():
+                return url
+        raise CircuitOpenError(self._urls)
+
+    async def _post(self, data, request_timeout, context=None, retries=0):
+        url = self._select_url(retries)
+        if context is not None:
+            context.url = url
+        limiter = self._concurrency_limiter
+        breaker = self._circuit_breakers[url] if self._circuit_breakers is not None else None
+        rate_limiter = self._rate_limiters.get(url) if self._rate_limiters is not None else None
+        if limiter is None and breaker is None and rate_limiter is None:
+            resp = await self._httpclient.fetch(
+                url,
+                method="POST",
+                body=data,
+                request_timeout=request_timeout
+            )
+            return await resp.json(content_type=None)
+
+        start_time = None
+        try:
+            if rate_limiter is not None:
+                await rate_limiter.acquire(data)
+            if limiter is not None:
+                start_time = await limiter.acquire()
+        except BaseException:
+            if breaker is not None:
+                breaker.record_cancelled()
+            raise
+        try:
+            resp = await self._httpclient.fetch(
+                url,
+                method="POST",
+                body=data,
+                request_timeout=request_timeout
+            )
+            rval = await resp.json(content_type=None)
+        except HTTPError as e:
+            overloaded = e.status in OVERLOAD_STATUSES or e.status >= 500
+            if limiter is not None:
+                limiter.release(start_time, dropped=overloaded, kind=request_kind(data))
+            if breaker is not None:
+                if overloaded:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            raise
+        except Exception:
+            if limiter is not None:
+                limiter.release(start_time, kind=request_kind(data))
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            # cancelled requests don't say anything about the node
+            if limiter is not None:
+                limiter.release(start_time, ignore=True)
+            if breaker is not None:
+                breaker.record_cancelled()
+            raise
+        if limiter is not None:
+            limiter.release(start_time, kind=request_kind(data))
+        if breaker is not None:
+            breaker.record_success()
+        return rval
+
+    async def close(self):
+        if self._parent is not None:
+            # the http client belongs to the parent
+            return
+        await self._httpclient.close()
 
     def eth_getBalance(self, address, block="latest"):
 
@@ -200,9 +436,32 @@ class JsonRPCClient:
             hexkwargs['value'] = "0x0"
         return self._fetch("eth_estimateGas", [hexkwargs], parse_int)
 
-    def eth_sendRawTransaction(self, tx):
+    def eth_createAccessList(self, source_address, target_address, block="latest", **kwargs):
+
+        source_address = validate_hex_int(source_address)
+        block = validate_block_param(block)
+        hexkwargs = {"from": source_address}
+
+        if target_address:
+            target_address = validate_hex_int(target_address)
+            hexkwargs["to"] = target_address
+
+        for k, value in kwargs.items():
+            if k == 'gasprice' or k == 'gas_price':
+                k = 'gasPrice'
+            hexkwargs[k] = validate_hex_int(value)
+
+        def result_processor(result):
+            if result is not None and 'gasUsed' in result:
+                result['gasUsed'] = parse_int(result['gasUsed'])
+            return result
+
+        return self._fetch("eth_createAccessList", [hexkwargs, block], result_processor)
+
+    def eth_sendRawTransaction(self, tx, as_bytes=False):
+        """as_bytes: return the transaction hash as bytes"""
         tx = validate_hex_int(tx)
-        return self._fetch("eth_sendRawTransaction", [tx])
+        return self._fetch("eth_sendRawTransaction", [tx], decode_hex if as_bytes else None)
 
     def eth_getTransactionReceipt(self, tx):
 
@@ -218,11 +477,112 @@ class JsonRPCClient:
 
         return self._fetch("eth_blockNumber", [], parse_int)
 
+    def _observe_block(self, block):
+        # keeps the fee oracle and ledger (if they're in use) up to date with
+        # the blocks fetched through the client
+        if block is not None and block.get('number') is not None:
+            root = self._parent or self
+            if root._fee_oracle is not None:
+                root._fee_oracle.observe_block(block)
+            if root._ledger is not None:
+                root._ledger.observe_block(block)
+        return block
+
     def eth_getBlockByNumber(self, number, with_transactions=True):
 
         number = validate_block_param(number)
 
-        return self._fetch("eth_getBlockByNumber", [number, with_transactions])
+        return self._fetch("eth_getBlockByNumber", [number, with_transactions], self._observe_block)
+
+    def eth_getBlockByHash(self, block_hash, with_transactions=True):
+
+        block_hash = validate_hex_int(block_hash, 32)
+
+        return self._fetch("eth_getBlockByHash", [block_hash, with_transactions], self._observe_block)
+
+    def eth_getBlockReceipts(self, block):
+
+        block = validate_block_param(block)
+
+        return self._fetch("eth_getBlockReceipts", [block])
+
+    async def fetch_block_bundle(self, number, *, receipts=True, logs=False):
+        """Fetches a block with its full transactions and the receipts of all
+        its transactions as a `BlockBundle`, or None if the block doesn't
+        exist yet.
+
+        This is a single bulk request when the node supports
+        `eth_getBlockReceipts`, otherwise the receipts are fetched with a
+        second bulk request. If `receipts` is False and `logs` is True the
+        block's logs are fetched in the same bulk request instead."""
+        number = parse_int(number)
+        if number is None:
+            raise TypeError("number must be a block number")
+        block_param = validate_block_param(number)
+        # whether eth_getBlockReceipts is supported is shared with bulk clients
+        root = self._parent or self
+        req_start = time.time()
+        retries = 0
+        while True:
+            bulk = self.bulk()
+            block_future = bulk.eth_getBlockByNumber(block_param, True)
+            receipts_future = logs_future = None
+            if receipts and root._block_receipts_supported is not False:
+                receipts_future = bulk.eth_getBlockReceipts(block_param)
+            if logs and not receipts:
+                logs_future = bulk._fetch("eth_getLogs", [{"fromBlock": block_param, "toBlock": block_param}])
+            await bulk.execute()
+            # mark all exceptions as retrieved before raising any of them
+            for future in (block_future, receipts_future, logs_future):
+                if future is not None:
+                    future.exception()
+
+            block = block_future.result()
+            if block is None:
+                return None
+            receipt_list = None
+            if receipts_future is not None:
+                error = receipts_future.exception()
+                if error is None:
+                    receipt_list = receipts_future.result()
+                    root._block_receipts_supported = True
+                elif isinstance(error, JsonRPCError) and is_method_not_found(error):
+                    root._block_receipts_supported = False
+                else:
+                    raise error
+            if receipts and receipt_list is None:
+                receipt_list = await self._fetch_transaction_receipts(block)
+            log_list = logs_future.result() if logs_future is not None else None
+
+            bundle = BlockBundle(block, receipt_list, log_list)
+            if bundle.is_consistent():
+                return bundle
+            # the block changed between requests (i.e. a reorg), try again
+            delay = self._retry_delay(retries, req_start, self._request_timeout)
+            if delay is None:
+                raise Exception("Unable to fetch a consistent bundle for block {}".format(number))
+            retries += 1
+            await asyncio.sleep(delay)
+
+    async def _fetch_transaction_receipts(self, block):
+        if len(block['transactions']) == 0:
+            return []
+        bulk = self.bulk()
+        futures = [bulk.eth_getTransactionReceipt(tx['hash'] if isinstance(tx, dict) else tx)
+                   for tx in block['transactions']]
+        await bulk.execute()
+        return list(await asyncio.gather(*futures))
+
+    async def fetch_block_bundles(self, blocks, *, prefetch=4, receipts=True, logs=False):
+        """Yields a `BlockBundle` (or None if the block doesn't exist) for
+        each block number in `blocks` (e.g. a `range`) in order, fetching up
+        to `prefetch` upcoming blocks concurrently"""
+
+        async def fetch(number):
+            return await self.fetch_block_bundle(number, receipts=receipts, logs=logs)
+
+        async for _, bundle in map_concurrently(fetch, blocks, concurrency=prefetch):
+            yield bundle
 
     def eth_newFilter(self, *, fromBlock=None, toBlock=None, address=None, topics=None):
 
@@ -260,16 +620,24 @@ class JsonRPCClient:
 
         return self._fetch("eth_uninstallFilter", [filter_id])
 
-    def eth_getCode(self, address, block="latest"):
+    def eth_getCode(self, address, block="latest", as_bytes=False):
 
         address = validate_hex_int(address)
         block = validate_block_param(block)
-        return self._fetch("eth_getCode", [address, block])
+        return self._fetch("eth_getCode", [address, block], decode_hex if as_bytes else None)
+
+    def eth_getStorageAt(self, address, position, block="latest", as_bytes=False):
+
+        address = validate_hex_int(address)
+        position = validate_hex_int(position)
+        block = validate_block_param(block)
+        return self._fetch("eth_getStorageAt", [address, position, block], decode_hex if as_bytes else None)
 
     async def _eth_getLogs_with_block_number_validation(self, kwargs):
         req_start = time.time()
         from_block = parse_int(kwargs.get('fromBlock', None))
         to_block = parse_int(kwargs.get('toBlock', None))
+        retries = 0
         while True:
             bulk = self.bulk()
             bn_future = bulk.eth_blockNumber()
@@ -277,8 +645,10 @@ class JsonRPCClient:
             await bulk.execute()
             bn = bn_future.result()
             if (from_block and bn < from_block) or (to_block and bn < to_block):
-                if self.should_retry and time.time() - req_start < self._request_timeout:
-                    await asyncio.sleep(random.random())
+                delay = self._retry_delay(retries, req_start, self._request_timeout)
+                if delay is not None:
+                    retries += 1
+                    await asyncio.sleep(delay)
                     continue
                 raise JsonRPCError(None, -32000, "Unknown block number", None)
             return lg_future.result()
@@ -313,7 +683,11 @@ class JsonRPCClient:
         else:
             return self._fetch("eth_getLogs", [kwargs])
 
-    def eth_call(self, *, to_address, from_address=None, gas=None, gasprice=None, value=None, data=None, block="latest", result_processor=None):
+    def eth_call(self, *, to_address, from_address=None, gas=None, gasprice=None, value=None, data=None, block="latest", result_processor=None,
+                 as_bytes=False):
+        """Addresses and data may be given as bytes or hex strings. The
+        result is returned as a hex string, or bytes if `as_bytes` is True
+        (unless a `result_processor` is given)"""
 
         to_address = validate_hex_int(to_address)
         block = validate_block_param(block)
@@ -330,12 +704,54 @@ class JsonRPCClient:
         if data:
             callobj['data'] = validate_hex_int(data)
 
+        if as_bytes and result_processor is None:
+            result_processor = decode_hex
         return self._fetch("eth_call", [callobj, block], result_processor)
 
     def eth_gasPrice(self):
 
         return self._fetch("eth_gasPrice", [], parse_int)
 
+    def eth_maxPriorityFeePerGas(self):
+
+        return self._fetch("eth_maxPriorityFeePerGas", [], parse_int)
+
+    def eth_feeHistory(self, block_count, newest_block="latest", reward_percentiles=None):
+
+        block_count = validate_hex_int(block_count)
+        newest_block = validate_block_param(newest_block)
+
+        return self._fetch("eth_feeHistory", [block_count, newest_block, reward_percentiles or []])
+
+    def eth_chainId(self):
+
+        return self._fetch("eth_chainId", [], parse_int)
+
+    @property
+    def fee_oracle(self):
+        """the `FeeOracle` used for EIP-1559 fees, shared with bulk clients"""
+        root = self._parent or self
+        if root._fee_oracle is None:
+            root._fee_oracle = FeeOracle(root)
+        return root._fee_oracle
+
+    @fee_oracle.setter
+    def fee_oracle(self, fee_oracle):
+        (self._parent or self)._fee_oracle = fee_oracle
+
+    @property
+    def ledger(self):
+        """the `Ledger` of sender balances, nonces and gas estimates used
+        when sending with `use_ledger`, shared with bulk clients"""
+        root = self._parent or self
+        if root._ledger is None:
+            root._ledger = Ledger(root)
+        return root._ledger
+
+    @ledger.setter
+    def ledger(self, ledger):
+        (self._parent or self)._ledger = ledger
+
     def trace_transaction(self, transaction_hash):
 
         return self._fetch("trace_transaction", [transaction_hash])
@@ -346,32 +762,61 @@ class JsonRPCClient:
 
     def trace_replayTransaction(self, transaction_hash, *, vmTrace=False, trace=True, stateDiff=False):
 
-        trace_type = []
-        if vmTrace:
-            trace_type.append('vmTrace')
-        if trace:
-            trace_type.append('trace')
-        if stateDiff:
-            trace_type.append('stateDiff')
-
+        trace_type = _trace_types(vmTrace, trace, stateDiff)
         return self._fetch("trace_replayTransaction", [transaction_hash, trace_type])
 
+    def trace_block(self, block):
+
+        block = validate_block_param(block)
+        return self._fetch("trace_block", [block])
+
+    def trace_replayBlockTransactions(self, block, *, vmTrace=False, trace=True, stateDiff=False):
+
+        block = validate_block_param(block)
+        trace_type = _trace_types(vmTrace, trace, stateDiff)
+        return self._fetch("trace_replayBlockTransactions", [block, trace_type])
+
     def debug_traceTransaction(self, transaction_hash, *, disableStorage=None, disableMemory=None, disableStack=None,
                                fullStorage=None, tracer=None, timeout=None):
-        kwargs = {}
-        if disableStorage is not None:
-            kwargs['disableStorage'] = disableStorage
-        if disableMemory is not None:
-            kwargs['disableMemory'] = disableMemory
-        if disableStack is not None:
-            kwargs['disableStack'] = disableStack
-        if tracer is not None:
-            kwargs['tracer'] = tracer
-        if timeout is not None:
-            kwargs['timeout'] = str(timeout)
-
+        kwargs = _debug_trace_options(disableStorage, disableMemory, disableStack, tracer, timeout)
         return self._fetch("debug_traceTransaction", [transaction_hash, kwargs])
 
+    def debug_traceBlockByNumber(self, block, *, disableStorage=None, disableMemory=None, disableStack=None,
+                                 tracer=None, timeout=None):
+        block = validate_block_param(block)
+        kwargs = _debug_trace_options(disableStorage, disableMemory, disableStack, tracer, timeout)
+        return self._fetch("debug_traceBlockByNumber", [block, kwargs])
+
+    def debug_traceBlockByHash(self, block_hash, *, disableStorage=None, disableMemory=None, disableStack=None,
+                               tracer=None, timeout=None):
+        block_hash = validate_hex_int(block_hash, 32)
+        kwargs = _debug_trace_options(disableStorage, disableMemory, disableStack, tracer, timeout)
+        return self._fetch("debug_traceBlockByHash", [block_hash, kwargs])
+
+    async def trace_blocks(self, from_block, to_block, *, method="trace_block", concurrency=4, ordered=True, **kwargs):
+        """Traces every block from `from_block` to `to_block` (inclusive)
+        using one of the block level trace methods (`trace_block`,
+        `trace_replayBlockTransactions` or `debug_traceBlockByNumber`),
+        with at most `concurrency` blocks being traced at once.
+
+        Yields `(block_number, traces)` as results come in, in block order
+        unless `ordered` is False. Extra keyword arguments are passed to
+        the trace method."""
+        if method not in BLOCK_TRACE_METHODS:
+            raise ValueError("Unsupported block trace method: {}".format(method))
+        trace_fn = getattr(self, method)
+        from_block = parse_int(from_block)
+        to_block = parse_int(to_block)
+        if from_block is None or to_block is None:
+            raise TypeError("from_block and to_block must be block numbers")
+
+        async def trace(block_number):
+            return await trace_fn(block_number, **kwargs)
+
+        async for block_number, traces in map_concurrently(
+                trace, range(from_block, to_block + 1), concurrency=concurrency, ordered=ordered):
+            yield block_number, traces
+
     def web3_clientVersion(self):
 
         return self._fetch("web3_clientVersion", [])
@@ -380,14 +825,23 @@ class JsonRPCClient:
 
         return self._fetch("net_version", [])
 
+    def at_block(self, block):
+        """Returns a `BlockSnapshot` that pins reads (including constant
+        contract calls made with `block=snapshot`) to the given block
+        number and caches their results"""
+        return BlockSnapshot(self, block)
+
     def bulk(self):
-        return JsonRPCClient(self._url, should_retry=self.should_retry, log=self.log,
-                             max_clients=self._max_clients, bulk_mode=True,
-                             request_timeout=self._request_timeout,
-                             connect_timeout=self._connect_timeout,
-                             client_cls=self._client_cls,
-                             middleware=self.middleware,
-                             **self._client_kwargs)
+        """returns a client in bulk mode which shares this client's http
+        client, middleware and settings (limiters, circuit breakers, retry
+        policy etc), so creating one is cheap"""
+        bulk = object.__new__(type(self))
+        bulk.__dict__.update(self.__dict__)
+        bulk._parent = self._parent or self
+        bulk._bulk_mode = True
+        bulk._bulk_futures = {}
+        bulk._bulk_data = []
+        return bulk
 
     async def execute(self):
         if not self._bulk_mode:
@@ -399,50 +853,19 @@ class JsonRPCClient:
         self._bulk_data = []
         futures = self._bulk_futures.copy()
         self._bulk_futures = {}
-        req_start = time.time()
-
-        for fn in self.middleware.before_request:
-            res = fn(data)
-            if asyncio.iscoroutine(res):
-                res = await res
-            if res is not None:
-                data = res
-
-        retries = 0
-        while True:
+        self.retry_policy.record_request()
+        if self.middleware.before_request:
+            data = await self.middleware.run_before_request(data)
+        context = self.middleware.start_request(data, self._url)
+        if context is None:
+            rvals = await self._execute_attempts(data, None)
+        else:
             try:
-                resp = await self._httpclient.fetch(
-                    self._url,
-                    method="POST",
-                    body=data,
-                    request_timeout=60.0 # higher request timeout than other operations
-                )
-            except concurrent.futures.CancelledError:
+                rvals = await self._execute_attempts(data, context)
+            except BaseException as e:
+                self.middleware.end_request(context, exception=e)
                 raise
-            except Exception as e:
-                if self.should_retry and isinstance(e, HTTPError) and (e.status == 599 or e.status == 502):
-                    # always retry after 599
-                    pass
-                elif not self.should_retry or time.time() - req_start >= self._request_timeout:
-                    # give up after the request timeout
-                    raise
-                if retries == 0:
-                    logger = self.log.exception
-                else:
-                    logger = self.log.error
-                logger("Error in JsonRPCClient.execute: retry {}".format(retries))
-                retries += 1
-                await asyncio.sleep(random.random())
-                continue
-            break
-
-        rvals = await resp.json()
-        for fn in self.middleware.after_request:
-            res = fn(data, rvals)
-            if asyncio.iscoroutine(res):
-                res = await res
-            if res is not None:
-                rvals = res
+            self.middleware.end_request(context, response=rvals)
 
         results = []
         for rval in rvals:
@@ -469,3 +892,34 @@ class JsonRPCClient:
                 future.set_exception(Exception("Unexpectedly missing result"))
 
         return results
+
+    async def _execute_attempts(self, data, context):
+        req_start = time.time()
+        retries = 0
+        while True:
+            try:
+                # higher request timeout than other operations
+                rvals = await self._post(data, 60.0, context, retries)
+            except (concurrent.futures.CancelledError, ConcurrencyLimitExceeded, CircuitOpenError, RateLimitExceeded):
+                raise
+            except Exception as e:
+                if not is_retryable_exception(e):
+                    raise
+                # give up after the request timeout, even if the node is unreachable
+                delay = self._retry_delay(retries, req_start, self._request_timeout)
+                if delay is None:
+                    raise
+                if retries == 0:
+                    logger = self.log.exception
+                else:
+                    logger = self.log.error
+                logger("Error in JsonRPCClient.execute: retry {}".format(retries))
+                retries += 1
+                self.middleware.retry_request(context, e)
+                await asyncio.sleep(delay)
+                continue
+            break
+
+        if self.middleware.after_request:
+            rvals = await self.middleware.run_after_request(data, rvals)
+        return rvals
@@ -0,0 +1,42 @@
+import asyncio
+import collections
+
+async def map_concurrently(fn, iterable, *, concurrency=4, ordered=True):
+    """Calls the coroutine function `fn` with each item of `iterable`,
+    keeping at most `concurrency` calls in flight, and yields
+    `(item, result)` pairs as they complete (in the order of `iterable`
+    if `ordered` is True).
+
+    Exceptions are raised when their result would be yielded, and
+    any calls still in flight are cancelled when the generator is closed."""
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    items = iter(iterable)
+    pending = collections.deque()
+
+    def fill():
+        while len(pending) < concurrency:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            pending.append((item, asyncio.ensure_future(fn(item))))
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                item, task = pending.popleft()
+                result = await task
+            else:
+                done, _ = await asyncio.wait([task for _, task in pending],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                index = next(i for i, (_, task) in enumerate(pending) if task in done)
+                item, task = pending[index]
+                del pending[index]
+                result = task.result()
+            fill()
+            yield item, result
+    finally:
+        for _, task in pending:
+            task.cancel()
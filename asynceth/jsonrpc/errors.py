@@ -1,5 +1,9 @@
 from http.client import responses
 
+from asynceth.jsonrpc.revert import error_reason
+
+_UNDECODED = object()
+
 class HTTPError(Exception):
     def __init__(self, status, message=None):
         self.status = status
@@ -17,6 +21,7 @@ class JsonRPCError(Exception):
         self.message = message
         self._data = data
         self.is_notification = is_notification
+        self._reason = _UNDECODED
 
     def format(self, request=None):
         if request:
@@ -43,6 +48,19 @@ class JsonRPCError(Exception):
             return self._data
         return {'message': self.message}
 
+    @property
+    def reason(self):
+        """the `RevertReason` decoded from the error's revert data
+        (`Error(string)` and `Panic(uint256)`, contracts also decode their
+        custom errors), or None if the error isn't a revert"""
+        if self._reason is _UNDECODED:
+            self._reason = error_reason(self)
+        return self._reason
+
+    @reason.setter
+    def reason(self, reason):
+        self._reason = reason
+
     def __str__(self):
         return "Json RPC Error ({}): {}{}".format(
             self.code, self.message,
@@ -59,3 +77,19 @@ class JsonRPCInternalError(JsonRPCError):
         super().__init__(request.get('id') if request else None,
                          -32603, "Internal Error", data,
                          'id' not in request if request else False)
+
+class ConcurrencyLimitExceeded(Exception):
+    def __init__(self, limit, queued):
+        super().__init__("Too many requests waiting on the concurrency limiter (limit {}, {} queued)".format(limit, queued))
+        self.limit = limit
+        self.queued = queued
+
+class CircuitOpenError(Exception):
+    def __init__(self, urls):
+        super().__init__("No available endpoints: circuit open for {}".format(", ".join(urls)))
+        self.urls = urls
+
+class RateLimitExceeded(Exception):
+    def __init__(self, delay):
+        super().__init__("Request would exceed the rate limit for {:.3f} seconds".format(delay))
+        self.delay = delay
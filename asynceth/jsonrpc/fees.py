@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from asynceth.utils import parse_int
+
+BASE_FEE_MAX_CHANGE_DENOMINATOR = 8
+ELASTICITY_MULTIPLIER = 2
+
+def next_base_fee(block):
+    """computes the base fee of the block after `block` as defined by EIP-1559"""
+    base_fee = parse_int(block['baseFeePerGas'])
+    gas_used = parse_int(block['gasUsed'])
+    gas_target = parse_int(block['gasLimit']) // ELASTICITY_MULTIPLIER
+    if gas_used == gas_target:
+        return base_fee
+    if gas_used > gas_target:
+        delta = max(base_fee * (gas_used - gas_target) // gas_target // BASE_FEE_MAX_CHANGE_DENOMINATOR, 1)
+        return base_fee + delta
+    delta = base_fee * (gas_target - gas_used) // gas_target // BASE_FEE_MAX_CHANGE_DENOMINATOR
+    return base_fee - delta
+
+class FeeOracle:
+    """Suggests EIP-1559 fees from `eth_feeHistory`, shared by all senders
+    using the same client (see `JsonRPCClient.fee_oracle`).
+
+    The fee history of the last `block_count` blocks is fetched at most
+    once per block (concurrent callers share the request): it is fresh
+    until a newer block is given to `observe_block`, which also updates the
+    base fee locally from the block header. The client calls it for the
+    blocks it fetches (`eth_getBlockByNumber`, `eth_getBlockByHash` and
+    `fetch_block_bundle`); applications that learn about blocks some other
+    way (e.g. subscriptions) should call it themselves. When no blocks have
+    been observed for `max_age` seconds, the history is instead fetched
+    every `max_age` seconds.
+
+    The suggested priority fee is the median of the `percentile` reward
+    paid in recent non-empty blocks (at least `min_priority_fee`), and the
+    max fee allows for the base fee rising by `base_fee_multiplier`."""
+
+    def __init__(self, jsonrpc, *, block_count=10, percentile=50, base_fee_multiplier=2,
+                 min_priority_fee=0, max_age=12.0):
+        self.jsonrpc = jsonrpc
+        self.block_count = block_count
+        self.percentile = percentile
+        self.base_fee_multiplier = base_fee_multiplier
+        self.min_priority_fee = min_priority_fee
+        self.max_age = max_age
+        self.block_number = None
+        self.base_fee = None
+        self.priority_fee = None
+        self._updated = None
+        self._pending = None
+        # the newest block known when the history was fetched
+        self._history_block = None
+        # when a newer block was last observed
+        self._observed = None
+
+    def _is_fresh(self):
+        if self._updated is None:
+            return False
+        now = time.monotonic()
+        if self._observed is not None and now - self._observed < self.max_age:
+            return self.block_number <= self._history_block
+        return now - self._updated < self.max_age
+
+    def observe_block(self, block):
+        """updates the base fee from a newly seen block header"""
+        number = parse_int(block['number'])
+        if block.get('baseFeePerGas') is None or (self.block_number is not None and number <= self.block_number):
+            return
+        self.block_number = number
+        self.base_fee = next_base_fee(block)
+        self._observed = time.monotonic()
+
+    async def _fetch_history(self):
+        history = await self.jsonrpc.eth_feeHistory(self.block_count, "latest", [self.percentile])
+        base_fees = [parse_int(fee) for fee in history['baseFeePerGas']]
+        ratios = history.get('gasUsedRatio', [])
+        rewards = sorted(parse_int(reward[0]) for reward, ratio in zip(history.get('reward') or [], ratios)
+                         if ratio > 0 and reward)
+        number = parse_int(history['oldestBlock']) + len(ratios) - 1
+        if self.block_number is None or number >= self.block_number:
+            self.block_number = number
+            # the last entry is the base fee of the next block
+            self.base_fee = base_fees[-1]
+        # a node lagging behind the observed blocks isn't asked again until
+        # another block is observed
+        self._history_block = self.block_number
+        if rewards:
+            self.priority_fee = max(self.min_priority_fee, rewards[len(rewards) // 2])
+        else:
+            self.priority_fee = self.min_priority_fee
+        self._updated = time.monotonic()
+
+    async def refresh(self):
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._fetch_history())
+        pending = self._pending
+        try:
+            await asyncio.shield(pending)
+        finally:
+            if self._pending is pending and pending.done():
+                self._pending = None
+
+    async def fees(self, max_priority_fee_per_gas=None):
+        """returns (max_fee_per_gas, max_priority_fee_per_gas), using the
+        given priority fee if there is one"""
+        if not self._is_fresh():
+            await self.refresh()
+        if max_priority_fee_per_gas is None:
+            max_priority_fee_per_gas = self.priority_fee
+        max_fee_per_gas = self.base_fee * self.base_fee_multiplier + max_priority_fee_per_gas
+        return max_fee_per_gas, max_priority_fee_per_gas
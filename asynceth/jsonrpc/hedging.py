@@ -0,0 +1,103 @@
+import collections
+import math
+
+from asynceth.jsonrpc.retry import RetryBudget
+
+# methods that only read state, and so are safe to send more than once
+HEDGEABLE_METHODS = frozenset([
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_estimateGas",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByHash",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getLogs",
+    "eth_getStorageAt",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "net_version",
+    "web3_clientVersion",
+])
+
+class LatencyTracker:
+    """Keeps the last `window` latencies of a method and caches the
+    requested percentile, recalculating it every `refresh` samples once
+    there are enough samples"""
+
+    def __init__(self, percentile, window=200, refresh=16):
+        self.percentile = percentile
+        self.refresh = refresh
+        self._samples = collections.deque(maxlen=window)
+        self._since_refresh = 0
+        self._value = None
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, latency):
+        self._samples.append(latency)
+        self._since_refresh += 1
+        if len(self._samples) <= self.refresh or self._since_refresh >= self.refresh:
+            self._since_refresh = 0
+            samples = sorted(self._samples)
+            index = max(0, math.ceil(len(samples) * self.percentile / 100) - 1)
+            self._value = samples[index]
+
+    @property
+    def value(self):
+        return self._value
+
+class Hedging:
+    """Configuration for hedged requests.
+
+    When a request for one of `methods` hasn't completed after the
+    `percentile` latency of recent requests for that method (bounded by
+    `min_delay` and `max_delay`), a duplicate request is sent to the next
+    url and whichever succeeds first is used.
+
+    No hedging happens until `min_samples` latencies have been recorded
+    for a method, unless `initial_delay` is given. `budget` limits the
+    fraction of requests that may be hedged (10% by default)."""
+
+    def __init__(self, *, percentile=95, min_delay=0.005, max_delay=None, initial_delay=None,
+                 min_samples=20, window=200, methods=HEDGEABLE_METHODS, budget=None):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.methods = frozenset(methods)
+        if budget is None:
+            budget = RetryBudget(ratio=0.1, min_retries_per_second=1.0)
+        self.budget = budget
+        self._trackers = {}
+
+    def _tracker(self, method):
+        tracker = self._trackers.get(method)
+        if tracker is None:
+            tracker = self._trackers[method] = LatencyTracker(self.percentile, window=self.window)
+        return tracker
+
+    def record(self, method, latency):
+        self._tracker(method).record(latency)
+
+    def delay(self, method):
+        """returns how long to wait before hedging, or None to not hedge"""
+        tracker = self._tracker(method)
+        if len(tracker) < self.min_samples:
+            return self.initial_delay
+        delay = max(self.min_delay, tracker.value)
+        if self.max_delay is not None:
+            delay = min(self.max_delay, delay)
+        return delay
+
+    def record_request(self):
+        self.budget.record_request()
+
+    def try_hedge(self):
+        return self.budget.try_withdraw()
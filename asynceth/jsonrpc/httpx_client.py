@@ -0,0 +1,51 @@
+import httpx
+
+from asynceth.jsonrpc.errors import HTTPError
+from asynceth.jsonrpc.transport import DEFAULT_TRANSPORT, _has_module
+
+class HTTPResponse:
+    def __init__(self, response):
+        self.status = response.status_code
+        self._response = response
+
+    async def json(self, *, encoding=None, loads=None, content_type=None):
+        if loads is not None:
+            return loads(self._response.content)
+        return self._response.json()
+
+class HTTPClient:
+
+    def __init__(self, *, max_clients=100, connect_timeout=None, verify_ssl=True, transport=None):
+        if transport is None:
+            transport = DEFAULT_TRANSPORT
+        limits = httpx.Limits(max_connections=max_clients,
+                              max_keepalive_connections=max_clients,
+                              keepalive_expiry=transport.keepalive_timeout)
+        self._client = httpx.AsyncClient(
+            http2=transport.http2 and _has_module("h2"),
+            limits=limits,
+            timeout=httpx.Timeout(None, connect=connect_timeout),
+            verify=verify_ssl,
+            headers={"Accept-Encoding": transport.accept_encoding})
+
+    async def fetch(self, url, *, method="GET", headers=None, body=None, request_timeout=None):
+        kwargs = {}
+        if isinstance(body, (dict, list)) and (headers is None or 'Content-Type' not in headers):
+            kwargs['json'] = body
+        elif body is not None:
+            kwargs['content'] = body
+        if request_timeout:
+            kwargs['timeout'] = httpx.Timeout(request_timeout)
+        try:
+            resp = await self._client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            # outside of the except block to avoid rethrow error message
+            error = e
+        else:
+            if resp.status_code < 200 or resp.status_code >= 300:
+                raise HTTPError(resp.status_code, message=resp.reason_phrase)
+            return HTTPResponse(resp)
+        raise HTTPError(599, message=str(error) or type(error).__name__)
+
+    async def close(self):
+        await self._client.aclose()
@@ -0,0 +1,147 @@
+import asyncio
+import collections
+import time
+
+from asynceth.utils import parse_int, decode_hex
+
+class AccountState:
+    """The locally tracked balance and next nonce of an account"""
+
+    def __init__(self, address):
+        self.address = address
+        self.balance = None
+        self.nonce = None
+        self.block_number = None
+        self._updated = None
+        self._pending = None
+        # whether the next refresh replaces the local nonce, rather than
+        # only moving it forward
+        self._reset = True
+
+    def is_stale(self, max_age, block_number):
+        if self._updated is None:
+            return True
+        if block_number is not None and (self.block_number is None or block_number > self.block_number):
+            return True
+        return max_age is not None and time.monotonic() - self._updated >= max_age
+
+    def invalidate(self):
+        """forces a refresh which takes the nonce from the node, e.g. after
+        a failed send"""
+        self._updated = None
+        self._reset = True
+
+    async def refresh(self, jsonrpc, block_number=None):
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._fetch(jsonrpc, block_number))
+        pending = self._pending
+        try:
+            await asyncio.shield(pending)
+        finally:
+            if self._pending is pending and pending.done():
+                self._pending = None
+
+    async def _fetch(self, jsonrpc, block_number):
+        reset = self._reset
+        self._reset = False
+        bulk = jsonrpc.bulk()
+        balance = bulk.eth_getBalance(self.address, "pending")
+        nonce = bulk.eth_getTransactionCount(self.address, "pending")
+        try:
+            await bulk.execute()
+            balance = await balance
+            nonce = await nonce
+        except BaseException:
+            self._reset = self._reset or reset
+            raise
+        self.balance = balance
+        # transactions reserved or in flight may not have reached the node
+        # yet, so their nonces aren't given out again
+        if reset or self.nonce is None:
+            self.nonce = nonce
+        else:
+            self.nonce = max(self.nonce, nonce)
+        self.block_number = block_number
+        self._updated = time.monotonic()
+
+class Ledger:
+    """Local state used to send transactions without any round trips
+    other than `eth_sendRawTransaction` (see `use_ledger` in contract
+    calls): the balance and nonce of each sender, gas estimates and the
+    chain id.
+
+    Balances are debited and nonces incremented locally on every send.
+    Accounts are refreshed from the node after `max_age` seconds, when
+    `observe_block` is given a newer block (the client calls it for the
+    blocks it fetches), or after a send fails. Only
+    refreshes after a failed send (`invalidate`) move the nonce backwards.
+
+    Gas estimates are cached by (contract, selector, calldata length,
+    whether value is sent), and multiplied by `gas_margin`."""
+
+    def __init__(self, jsonrpc, *, max_age=12.0, gas_margin=1.2, max_gas_estimates=10000):
+        self.jsonrpc = jsonrpc
+        self.max_age = max_age
+        self.gas_margin = gas_margin
+        self.max_gas_estimates = max_gas_estimates
+        self.chain_id = None
+        self.block_number = None
+        self.accounts = {}
+        self._gas_estimates = collections.OrderedDict()
+
+    def account(self, address):
+        address = address.lower()
+        account = self.accounts.get(address)
+        if account is None:
+            account = self.accounts[address] = AccountState(address)
+        return account
+
+    def observe_block(self, block):
+        number = parse_int(block['number']) if isinstance(block, dict) else parse_int(block)
+        if self.block_number is None or number > self.block_number:
+            self.block_number = number
+
+    async def sync(self, address):
+        """makes sure the account's balance and nonce are up to date"""
+        account = self.account(address)
+        if account.is_stale(self.max_age, self.block_number):
+            await account.refresh(self.jsonrpc, self.block_number)
+        return account
+
+    def reserve(self, address, cost, nonce=None):
+        """debits `cost` from the (synced) account, returning the nonce to
+        use. Raises if the account doesn't have enough funds"""
+        account = self.account(address)
+        if account.balance < cost:
+            raise Exception("Given account doesn't have enough funds")
+        account.balance -= cost
+        if nonce is None:
+            nonce = account.nonce
+        account.nonce = max(account.nonce, nonce + 1)
+        return nonce
+
+    def invalidate(self, address):
+        self.account(address).invalidate()
+
+    @staticmethod
+    def _gas_key(to, data, value):
+        data = decode_hex(data) if data else b''
+        to = to.lower() if isinstance(to, str) else '0x' + (to or b'').hex()
+        return (to, data[:4], len(data), bool(value))
+
+    def gas_estimate(self, to, data, value=0):
+        """returns the cached estimate (with margin) for a similar call, or None"""
+        key = self._gas_key(to, data, value)
+        estimate = self._gas_estimates.get(key)
+        if estimate is None:
+            return None
+        self._gas_estimates.move_to_end(key)
+        return int(estimate * self.gas_margin)
+
+    def record_gas_estimate(self, to, data, value, estimate):
+        key = self._gas_key(to, data, value)
+        self._gas_estimates[key] = max(estimate, self._gas_estimates.get(key, 0))
+        self._gas_estimates.move_to_end(key)
+        if len(self._gas_estimates) > self.max_gas_estimates:
+            self._gas_estimates.popitem(last=False)
+        return int(estimate * self.gas_margin)
@@ -0,0 +1,125 @@
+import asyncio
+import collections
+import time
+
+from asynceth.jsonrpc.errors import ConcurrencyLimitExceeded
+
+def request_kind(data):
+    """the key requests are compared by for latency: the method of single
+    requests, and the (rounded) size of bulk requests"""
+    if isinstance(data, list):
+        return "bulk:{}".format(len(data).bit_length())
+    if isinstance(data, dict):
+        return data.get('method')
+    return None
+
+class AdaptiveConcurrencyLimiter:
+    """Limits the number of requests in flight using AIMD (additive increase,
+    multiplicative decrease).
+
+    The limit grows by roughly one per round trip while the observed latency
+    stays within `latency_tolerance` times the lowest latency seen recently
+    for the same kind of request (see `request_kind`, so cheap and heavy
+    methods aren't compared with each other), and shrinks by `backoff_ratio`
+    whenever a request is dropped (timeout, connection error or overload
+    response) or the latency goes above that.
+
+    Requests that can't start are queued. Once `max_queue` requests are
+    waiting, `acquire` raises `ConcurrencyLimitExceeded` straight away so
+    callers can shed load instead of piling onto a slow node."""
+
+    def __init__(self, *, initial_limit=20, min_limit=1, max_limit=500,
+                 max_queue=1000, queue_timeout=None,
+                 latency_tolerance=2.0, backoff_ratio=0.9, min_latency_window=30.0):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected min_limit <= initial_limit <= max_limit")
+        self._limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.min_latency_window = min_latency_window
+        self._in_flight = 0
+        self._waiters = collections.deque()
+        # kind -> (lowest recent latency, when it was seen)
+        self._min_latencies = {}
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Waits for a free slot and returns the start time to be passed
+        back to `release`"""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return time.monotonic()
+        if len(self._waiters) >= self.max_queue:
+            raise ConcurrencyLimitExceeded(self.limit, len(self._waiters))
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if self.queue_timeout is None:
+                await waiter
+            else:
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove_waiter(waiter)
+            raise ConcurrencyLimitExceeded(self.limit, len(self._waiters))
+        except BaseException:
+            self._remove_waiter(waiter)
+            raise
+        # the slot was handed over by `_wake_waiters`
+        return time.monotonic()
+
+    def release(self, start_time, *, dropped=False, ignore=False, kind=None):
+        """Frees the slot taken by `acquire`. `dropped` indicates the request
+        failed in a way that suggests the node is overloaded, `ignore` skips
+        updating the limit (e.g. when the request was cancelled). `kind`
+        identifies the kind of request (see `request_kind`) whose latency
+        baseline the request's latency is compared with"""
+        self._in_flight -= 1
+        if not ignore:
+            self._update(time.monotonic() - start_time, dropped, kind)
+        self._wake_waiters()
+
+    def _remove_waiter(self, waiter):
+        if waiter.done() and not waiter.cancelled():
+            # the slot was handed to us after we gave up on it
+            self._in_flight -= 1
+            self._wake_waiters()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _wake_waiters(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def _update(self, latency, dropped, kind=None):
+        now = time.monotonic()
+        min_latency, min_latency_time = self._min_latencies.get(kind, (None, 0))
+        if min_latency is None or latency < min_latency or now - min_latency_time > self.min_latency_window:
+            min_latency = latency
+            self._min_latencies[kind] = (latency, now)
+        if dropped or latency > min_latency * self.latency_tolerance:
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        elif self._in_flight + 1 >= self._limit / 2:
+            # only grow when the current limit is actually being used
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
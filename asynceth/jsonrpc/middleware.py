@@ -1,5 +1,152 @@
+import asyncio
+import time
+
+class RequestContext:
+    """Details about a single request (or bulk request) handed to the
+    `on_request_start`, `on_request_retry` and `on_request_end` hooks.
+
+    Hooks are free to store their own state on the context (e.g. a span)."""
+
+    def __init__(self, data, url):
+        self.data = data
+        self.url = url
+        self.start_time = time.time()
+        self.end_time = None
+        self.attempts = 1
+        self.response = None
+        self.exception = None
+        self.hedged = False
+
+    @property
+    def is_bulk(self):
+        return isinstance(self.data, list)
+
+    @property
+    def method(self):
+        if self.is_bulk:
+            return "bulk"
+        return self.data['method']
+
+    @property
+    def duration(self):
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
 
 class Middleware:
+    """`before_request` and `after_request` functions may modify the
+    request data or response by returning a new value, and may be
+    coroutines.
+
+    `on_request_start`, `on_request_retry` and `on_request_end` functions
+    are called with a `RequestContext` and must be synchronous. They are
+    intended for timing and tracing, and nothing is allocated for them
+    unless at least one is registered."""
+
     def __init__(self):
         self.before_request = []
         self.after_request = []
+        self.on_request_start = []
+        self.on_request_retry = []
+        self.on_request_end = []
+
+    def add_hooks(self, hooks):
+        """Registers any of `on_request_start`, `on_request_retry` and
+        `on_request_end` that are defined on the given object"""
+        for name in ('on_request_start', 'on_request_retry', 'on_request_end'):
+            fn = getattr(hooks, name, None)
+            if fn is not None:
+                getattr(self, name).append(fn)
+        return hooks
+
+    def add_tracer(self, tracer, span_name="jsonrpc"):
+        return self.add_hooks(TracingHooks(tracer, span_name=span_name))
+
+    async def run_before_request(self, data):
+        for fn in self.before_request:
+            res = fn(data)
+            if asyncio.iscoroutine(res):
+                res = await res
+            if res is not None:
+                data = res
+        return data
+
+    async def run_after_request(self, data, rval):
+        for fn in self.after_request:
+            res = fn(data, rval)
+            if asyncio.iscoroutine(res):
+                res = await res
+            if res is not None:
+                rval = res
+        return rval
+
+    def start_request(self, data, url):
+        """returns None when there are no hooks registered"""
+        if not (self.on_request_start or self.on_request_retry or self.on_request_end):
+            return None
+        context = RequestContext(data, url)
+        for fn in self.on_request_start:
+            fn(context)
+        return context
+
+    def retry_request(self, context, exception=None):
+        if context is None:
+            return
+        context.exception = exception
+        for fn in self.on_request_retry:
+            fn(context)
+        context.attempts += 1
+        context.exception = None
+
+    def end_request(self, context, response=None, exception=None):
+        if context is None:
+            return
+        context.end_time = time.time()
+        context.response = response
+        context.exception = exception
+        for fn in self.on_request_end:
+            fn(context)
+
+class TracingHooks:
+    """Creates a span for every request using an OpenTelemetry style
+    tracer (i.e. anything with a compatible `start_span` method)"""
+
+    def __init__(self, tracer, span_name="jsonrpc"):
+        self.tracer = tracer
+        self.span_name = span_name
+        try:
+            from opentelemetry.trace import Status, StatusCode
+            self._error_status = Status(StatusCode.ERROR)
+        except ImportError:
+            self._error_status = None
+
+    def on_request_start(self, context):
+        attributes = {
+            "rpc.system": "jsonrpc",
+            "rpc.jsonrpc.version": "2.0",
+            "rpc.method": context.method,
+            "url.full": context.url,
+        }
+        if context.is_bulk:
+            attributes["rpc.jsonrpc.batch_size"] = len(context.data)
+        context.span = self.tracer.start_span(
+            "{} {}".format(self.span_name, context.method),
+            attributes=attributes,
+            start_time=int(context.start_time * 1e9))
+
+    def on_request_retry(self, context):
+        attributes = {"attempt": context.attempts, "url.full": context.url}
+        if context.exception is not None:
+            attributes["exception.message"] = str(context.exception)
+        context.span.add_event("retry", attributes=attributes)
+
+    def on_request_end(self, context):
+        span = context.span
+        span.set_attribute("rpc.jsonrpc.attempts", context.attempts)
+        if context.hedged:
+            span.set_attribute("rpc.jsonrpc.hedged", True)
+        if context.exception is not None:
+            span.record_exception(context.exception)
+            if self._error_status is not None:
+                span.set_status(self._error_status)
+        span.end(end_time=int(context.end_time * 1e9))
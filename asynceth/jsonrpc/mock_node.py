@@ -0,0 +1,563 @@
+"""An in-process jsonrpc node serving deterministic synthetic chain data,
+for load testing and benchmarking without a real ethereum node:
+
+    async with MockNode(block_number=1000, latency=0.005, http_error_rate=0.01) as node:
+        client = JsonRPCClient(node.url)
+        bundle = await client.fetch_block_bundle(10)
+
+Blocks, transactions, receipts and logs are generated from the block
+number, so the same node configuration always returns the same data."""
+
+import asyncio
+import collections
+import hashlib
+import inspect
+import json
+import random
+
+from aiohttp import web
+
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.jsonrpc.fees import next_base_fee
+
+UNKNOWN_BLOCK = "Unknown block number"
+UNKNOWN_FILTER_BLOCK = "One of the blocks specified in filter (fromBlock, toBlock or blockHash) cannot be found"
+
+def _invalid_params():
+    return JsonRPCError(None, -32602, "Invalid params", None)
+
+def _quantity(value):
+    """parses a hex quantity param"""
+    if isinstance(value, str) and value[:2] == "0x" and len(value) > 2:
+        try:
+            return int(value, 16)
+        except ValueError:
+            pass
+    raise _invalid_params()
+
+def _data(value):
+    """checks a hex data (e.g. address) param"""
+    if not isinstance(value, str) or value[:2] != "0x":
+        raise _invalid_params()
+    return value
+
+def _object(value):
+    if not isinstance(value, dict):
+        raise _invalid_params()
+    return value
+
+def _hash(*parts):
+    return "0x" + hashlib.sha256(":".join(str(p) for p in parts).encode('ascii')).hexdigest()
+
+def _address(*parts):
+    return _hash(*parts)[:42]
+
+class MockNode:
+    """`latency` is None, a number of seconds, or a function returning the
+    number of seconds to wait before answering each http request.
+
+    `error_rate` is the fraction of requests answered with a retryable
+    "Unknown block number" error, and `http_error_rate` the fraction of
+    http requests answered with `http_error_status`.
+
+    `block_time`, if given, mines a new block every `block_time` seconds
+    while the node is running.
+
+    `compression` compresses responses larger than `compression_threshold`
+    bytes for clients that accept it.
+
+    `reverts` maps function selectors ("0x" and 8 hex digits) to the revert
+    data returned by calls, gas estimates and access lists calling them.
+
+    The data of the last `max_cached_blocks` blocks requested is kept in
+    memory, along with the block and transaction hashes of the last
+    `max_known_blocks` blocks generated, which are the only hashes the
+    node can look up (like a pruned node)."""
+
+    def __init__(self, *, block_number=100, txs_per_block=4, logs_per_tx=2, num_contracts=4,
+                 chain_id=1, latency=None, error_rate=0.0, http_error_rate=0.0, http_error_status=503,
+                 block_time=None, supports_block_receipts=True, compression=False,
+                 compression_threshold=1024, max_cached_blocks=1024, max_known_blocks=65536, seed=0):
+        self.block_number = block_number
+        self.txs_per_block = txs_per_block
+        self.logs_per_tx = logs_per_tx
+        self.contracts = [_address("contract", i) for i in range(num_contracts)]
+        self.chain_id = chain_id
+        self.latency = latency
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.http_error_status = http_error_status
+        self.block_time = block_time
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.supports_block_receipts = supports_block_receipts
+        self.request_counts = collections.Counter()
+        self.http_request_count = 0
+        self.nonces = {}
+        self.sent_transactions = []
+        self.reverts = {}
+        self.max_cached_blocks = max_cached_blocks
+        self.max_known_blocks = max_known_blocks
+        self._blocks = collections.OrderedDict()
+        self._block_hashes = collections.OrderedDict()
+        self._tx_hashes = collections.OrderedDict()
+        self._random = random.Random(seed)
+        self._filters = {}
+        self._signatures = {}
+        self._runner = None
+        self._miner = None
+        self.url = None
+
+        self.methods = {
+            "eth_blockNumber": self.eth_blockNumber,
+            "eth_chainId": lambda: hex(self.chain_id),
+            "net_version": lambda: str(self.chain_id),
+            "web3_clientVersion": lambda: "asynceth-mock-node",
+            "eth_gasPrice": lambda: hex(2 * 10 ** 9),
+            "eth_maxPriorityFeePerGas": lambda: hex(10 ** 9),
+            "eth_feeHistory": self.eth_feeHistory,
+            "eth_getBalance": self.eth_getBalance,
+            "eth_getTransactionCount": self.eth_getTransactionCount,
+            "eth_getCode": self.eth_getCode,
+            "eth_getStorageAt": self.eth_getStorageAt,
+            "eth_call": self.eth_call,
+            "eth_estimateGas": self.eth_estimateGas,
+            "eth_createAccessList": self.eth_createAccessList,
+            "eth_sendRawTransaction": self.eth_sendRawTransaction,
+            "eth_getBlockByNumber": self.eth_getBlockByNumber,
+            "eth_getBlockByHash": self.eth_getBlockByHash,
+            "eth_getBlockReceipts": self.eth_getBlockReceipts,
+            "eth_getTransactionByHash": self.eth_getTransactionByHash,
+            "eth_getTransactionReceipt": self.eth_getTransactionReceipt,
+            "eth_getLogs": self.eth_getLogs,
+            "eth_newFilter": self.eth_newFilter,
+            "eth_newBlockFilter": self.eth_newBlockFilter,
+            "eth_newPendingTransactionFilter": self.eth_newBlockFilter,
+            "eth_getFilterChanges": self.eth_getFilterChanges,
+            "eth_getFilterLogs": self.eth_getFilterLogs,
+            "eth_uninstallFilter": self.eth_uninstallFilter,
+            "trace_block": self.trace_block,
+            "trace_replayBlockTransactions": self.trace_replayBlockTransactions,
+            "trace_transaction": self.trace_transaction,
+            "trace_replayTransaction": self.trace_replayTransaction,
+            "debug_traceBlockByNumber": self.debug_traceBlockByNumber,
+            "debug_traceTransaction": self.debug_traceTransaction,
+        }
+        if not supports_block_receipts:
+            del self.methods["eth_getBlockReceipts"]
+
+    # server
+
+    @property
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/', self.handle)
+        return app
+
+    async def start(self, host='127.0.0.1', port=0):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = "http://{}:{}/".format(host, port)
+        if self.block_time:
+            self._miner = asyncio.ensure_future(self._mine_forever())
+        return self.url
+
+    async def stop(self):
+        if self._miner is not None:
+            self._miner.cancel()
+            self._miner = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def _mine_forever(self):
+        while True:
+            await asyncio.sleep(self.block_time)
+            self.mine()
+
+    def mine(self, blocks=1):
+        self.block_number += blocks
+        return self.block_number
+
+    async def handle(self, request):
+        self.http_request_count += 1
+        if self.latency is not None:
+            delay = self.latency() if callable(self.latency) else self.latency
+            if delay:
+                await asyncio.sleep(delay)
+        if self.http_error_rate and self._random.random() < self.http_error_rate:
+            return web.Response(status=self.http_error_status)
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.json_response(JsonRPCError(None, -32700, "Parse error", None).format())
+        if isinstance(data, list):
+            if len(data) == 0:
+                return web.json_response(JsonRPCError(None, -32600, "Invalid Request", None).format())
+            results = [self.handle_request(req) for req in data]
+            result = [result for result in results if result is not None]
+        else:
+            result = self.handle_request(data)
+        response = web.Response(body=json.dumps(result, separators=(',', ':')).encode('utf-8'),
+                                content_type='application/json')
+        if self.compression and len(response.body) > self.compression_threshold:
+            response.enable_compression()
+        return response
+
+    def handle_request(self, req):
+        try:
+            if not isinstance(req, dict) or 'method' not in req:
+                raise JsonRPCError(None, -32600, "Invalid Request", None)
+            method = req['method']
+            self.request_counts[method] += 1
+            if method not in self.methods:
+                raise JsonRPCError(req.get('id'), -32601, "Method not found", None)
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise JsonRPCError(req.get('id'), -32000, UNKNOWN_BLOCK, None)
+            params = req.get('params', [])
+            if not isinstance(params, list):
+                raise _invalid_params()
+            fn = self.methods[method]
+            # only the number of params is checked here, the handlers check
+            # their values, so errors in the handlers aren't hidden
+            signature = self._signatures.get(fn)
+            if signature is None:
+                signature = self._signatures[fn] = inspect.signature(fn)
+            try:
+                signature.bind(*params)
+            except TypeError:
+                raise _invalid_params()
+            result = fn(*params)
+            if 'id' not in req:
+                return None
+            return {"jsonrpc": "2.0", "id": req['id'], "result": result}
+        except JsonRPCError as e:
+            return e.format(req if isinstance(req, dict) else None)
+
+    # synthetic chain data
+
+    def _block_param(self, block, error=UNKNOWN_BLOCK):
+        if block in (None, "latest", "pending"):
+            return self.block_number
+        if block == "earliest":
+            return 0
+        number = block if isinstance(block, int) else _quantity(block)
+        if number > self.block_number:
+            raise JsonRPCError(None, -32000, error, None)
+        return number
+
+    def _block(self, number):
+        try:
+            self._blocks.move_to_end(number)
+            return self._blocks[number]
+        except KeyError:
+            pass
+        block = self._blocks[number] = self._generate_block(number)
+        if len(self._blocks) > self.max_cached_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def _remember_hash(self, hashes, key, value, limit):
+        hashes[key] = value
+        hashes.move_to_end(key)
+        if len(hashes) > limit:
+            hashes.popitem(last=False)
+
+    def _generate_block(self, number):
+        block_hash = _hash("block", number)
+        self._remember_hash(self._block_hashes, block_hash, number, self.max_known_blocks)
+        transactions = []
+        receipts = []
+        for index in range(self.txs_per_block):
+            tx_hash = _hash("tx", number, index)
+            self._remember_hash(self._tx_hashes, tx_hash, (number, index),
+                                self.max_known_blocks * max(self.txs_per_block, 1))
+            contract = self.contracts[(number + index) % len(self.contracts)]
+            transactions.append({
+                "hash": tx_hash,
+                "nonce": hex(number),
+                "blockHash": block_hash,
+                "blockNumber": hex(number),
+                "transactionIndex": hex(index),
+                "from": _address("sender", index),
+                "to": contract,
+                "value": "0x0",
+                "gas": hex(100000),
+                "gasPrice": hex(10 ** 9),
+                "input": "0x",
+            })
+            logs = [{
+                "address": contract,
+                "topics": [_hash("topic", log_index), _hash("topic", number, index, log_index)],
+                "data": "0x" + "{:064x}".format(number * 1000 + index),
+                "blockHash": block_hash,
+                "blockNumber": hex(number),
+                "transactionHash": tx_hash,
+                "transactionIndex": hex(index),
+                "logIndex": hex(index * self.logs_per_tx + log_index),
+                "removed": False,
+            } for log_index in range(self.logs_per_tx)]
+            receipts.append({
+                "transactionHash": tx_hash,
+                "transactionIndex": hex(index),
+                "blockHash": block_hash,
+                "blockNumber": hex(number),
+                "from": _address("sender", index),
+                "to": contract,
+                "contractAddress": None,
+                "cumulativeGasUsed": hex(21000 * (index + 1)),
+                "gasUsed": hex(21000),
+                "status": "0x1",
+                "logs": logs,
+                "logsBloom": "0x" + "00" * 256,
+            })
+        block = {
+            "number": hex(number),
+            "hash": block_hash,
+            "parentHash": _hash("block", number - 1) if number > 0 else "0x" + "00" * 32,
+            "timestamp": hex(1500000000 + number * 15),
+            "miner": _address("miner"),
+            "gasLimit": hex(8000000),
+            "gasUsed": hex(21000 * self.txs_per_block),
+            "baseFeePerGas": hex(10 ** 9),
+            "transactions": transactions,
+        }
+        return block, receipts
+
+    # hashes are only known once their block has been generated, which is
+    # the only way a client can have learnt them
+
+    def _block_by_hash(self, block_hash):
+        return self._block_hashes.get(block_hash)
+
+    def _tx_location(self, tx_hash):
+        return self._tx_hashes.get(tx_hash, (None, None))
+
+    def eth_blockNumber(self):
+        return hex(self.block_number)
+
+    def eth_getBalance(self, address, block="latest"):
+        number = self._block_param(block)
+        return hex(10 ** 18 + number)
+
+    def eth_getTransactionCount(self, address, block="latest"):
+        self._block_param(block)
+        return hex(self.nonces.get(_data(address).lower(), 0))
+
+    def eth_getCode(self, address, block="latest"):
+        self._block_param(block)
+        if _data(address).lower() in self.contracts:
+            return "0x6080604052"
+        return "0x"
+
+    def eth_getStorageAt(self, address, position, block="latest"):
+        number = self._block_param(block)
+        return "0x{:064x}".format(number)
+
+    def _check_revert(self, callobj):
+        data = self.reverts.get(callobj.get('data', '0x')[:10])
+        if data is not None:
+            raise JsonRPCError(None, 3, "execution reverted", data)
+
+    def eth_call(self, callobj, block="latest"):
+        _object(callobj)
+        number = self._block_param(block)
+        self._check_revert(callobj)
+        return "0x{:064x}".format(number)
+
+    def eth_estimateGas(self, callobj, block="latest"):
+        _object(callobj)
+        self._check_revert(callobj)
+        return hex(21000 + 16 * (len(callobj.get('data', '0x')) - 2) // 2)
+
+    def eth_createAccessList(self, callobj, block="latest"):
+        _object(callobj)
+        number = self._block_param(block)
+        gas = int(self.eth_estimateGas(callobj), 16)
+        access_list = []
+        if callobj.get('to'):
+            access_list.append({"address": callobj['to'], "storageKeys": ["0x{:064x}".format(number)]})
+            gas += 2400 + 1900
+        return {"accessList": access_list, "gasUsed": hex(gas)}
+
+    def eth_sendRawTransaction(self, tx):
+        tx_hash = _hash("sent", tx)
+        self.sent_transactions.append(tx)
+        return tx_hash
+
+    def eth_feeHistory(self, block_count, newest_block, reward_percentiles=None):
+        newest = self._block_param(newest_block)
+        oldest = max(0, newest - _quantity(block_count) + 1)
+        blocks = [self._block(number)[0] for number in range(oldest, newest + 1)]
+        return {
+            "oldestBlock": hex(oldest),
+            "baseFeePerGas": [block['baseFeePerGas'] for block in blocks] + [hex(next_base_fee(blocks[-1]))],
+            "gasUsedRatio": [int(block['gasUsed'], 16) / int(block['gasLimit'], 16) for block in blocks],
+            "reward": [[hex(10 ** 9 + 10 ** 7 * int(p)) for p in reward_percentiles or []] for block in blocks],
+        }
+
+    def eth_getBlockByNumber(self, block, with_transactions=True):
+        try:
+            number = self._block_param(block)
+        except JsonRPCError:
+            return None
+        return self._format_block(number, with_transactions)
+
+    def eth_getBlockByHash(self, block_hash, with_transactions=True):
+        number = self._block_by_hash(block_hash)
+        if number is None:
+            return None
+        return self._format_block(number, with_transactions)
+
+    def _format_block(self, number, with_transactions):
+        block, _ = self._block(number)
+        if not with_transactions:
+            block = dict(block, transactions=[tx['hash'] for tx in block['transactions']])
+        return block
+
+    def eth_getBlockReceipts(self, block):
+        try:
+            number = self._block_param(block)
+        except JsonRPCError:
+            return None
+        return self._block(number)[1]
+
+    def eth_getTransactionByHash(self, tx_hash):
+        number, index = self._tx_location(tx_hash)
+        if number is None:
+            return None
+        return self._block(number)[0]['transactions'][index]
+
+    def eth_getTransactionReceipt(self, tx_hash):
+        number, index = self._tx_location(tx_hash)
+        if number is None:
+            return None
+        return self._block(number)[1][index]
+
+    def eth_getLogs(self, kwargs):
+        _object(kwargs)
+        from_block = self._block_param(kwargs.get('fromBlock'), UNKNOWN_FILTER_BLOCK)
+        to_block = self._block_param(kwargs.get('toBlock'), UNKNOWN_FILTER_BLOCK)
+        addresses = kwargs.get('address')
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if addresses is not None:
+            addresses = set(address.lower() for address in addresses)
+        topics = kwargs.get('topics') or []
+        logs = []
+        for number in range(from_block, to_block + 1):
+            for receipt in self._block(number)[1]:
+                for log in receipt['logs']:
+                    if addresses is not None and log['address'] not in addresses:
+                        continue
+                    if not self._match_topics(log['topics'], topics):
+                        continue
+                    logs.append(log)
+        return logs
+
+    @staticmethod
+    def _match_topics(log_topics, topics):
+        for i, topic in enumerate(topics):
+            if topic is None:
+                continue
+            if i >= len(log_topics):
+                return False
+            options = topic if isinstance(topic, list) else [topic]
+            if log_topics[i] not in options:
+                return False
+        return True
+
+    def eth_newFilter(self, kwargs):
+        _object(kwargs)
+        return self._new_filter({"logs": kwargs, "last_block": self.block_number})
+
+    def eth_newBlockFilter(self):
+        return self._new_filter({"last_block": self.block_number})
+
+    def _new_filter(self, filter):
+        filter_id = hex(len(self._filters) + 1)
+        self._filters[filter_id] = filter
+        return filter_id
+
+    def eth_getFilterChanges(self, filter_id):
+        filter = self._filters.get(filter_id)
+        if filter is None:
+            raise JsonRPCError(None, -32000, "Filter not found", None)
+        from_block, filter['last_block'] = filter['last_block'] + 1, self.block_number
+        if from_block > self.block_number:
+            return []
+        if 'logs' in filter:
+            return self.eth_getLogs(dict(filter['logs'], fromBlock=hex(from_block), toBlock=hex(self.block_number)))
+        return [_hash("block", number) for number in range(from_block, self.block_number + 1)]
+
+    def eth_getFilterLogs(self, filter_id):
+        filter = self._filters.get(filter_id)
+        if filter is None or 'logs' not in filter:
+            raise JsonRPCError(None, -32000, "Filter not found", None)
+        return self.eth_getLogs(filter['logs'])
+
+    def eth_uninstallFilter(self, filter_id):
+        return self._filters.pop(filter_id, None) is not None
+
+    def _trace(self, number, index):
+        tx = self._block(number)[0]['transactions'][index]
+        return {
+            "action": {"callType": "call", "from": tx['from'], "to": tx['to'], "gas": tx['gas'],
+                       "input": tx['input'], "value": tx['value']},
+            "result": {"gasUsed": hex(21000), "output": "0x"},
+            "blockHash": tx['blockHash'], "blockNumber": number,
+            "transactionHash": tx['hash'], "transactionPosition": index,
+            "subtraces": 0, "traceAddress": [], "type": "call",
+        }
+
+    def trace_block(self, block):
+        number = self._block_param(block)
+        return [self._trace(number, index) for index in range(self.txs_per_block)]
+
+    def trace_replayBlockTransactions(self, block, trace_type):
+        number = self._block_param(block)
+        return [self._replay(number, index, trace_type) for index in range(self.txs_per_block)]
+
+    def _replay(self, number, index, trace_type):
+        return {
+            "output": "0x",
+            "trace": [self._trace(number, index)] if 'trace' in trace_type else [],
+            "stateDiff": {} if 'stateDiff' in trace_type else None,
+            "vmTrace": {"code": "0x", "ops": []} if 'vmTrace' in trace_type else None,
+            "transactionHash": _hash("tx", number, index),
+        }
+
+    def trace_transaction(self, tx_hash):
+        number, index = self._tx_location(tx_hash)
+        if number is None:
+            return None
+        return [self._trace(number, index)]
+
+    def trace_replayTransaction(self, tx_hash, trace_type):
+        number, index = self._tx_location(tx_hash)
+        if number is None:
+            raise JsonRPCError(None, -32000, "Transaction not found", None)
+        return self._replay(number, index, trace_type)
+
+    def debug_traceBlockByNumber(self, block, options=None):
+        number = self._block_param(block)
+        return [{"result": self._debug_trace(number, index)} for index in range(self.txs_per_block)]
+
+    def debug_traceTransaction(self, tx_hash, options=None):
+        number, index = self._tx_location(tx_hash)
+        if number is None:
+            raise JsonRPCError(None, -32000, "Transaction not found", None)
+        return self._debug_trace(number, index)
+
+    def _debug_trace(self, number, index):
+        return {"gas": 21000, "failed": False, "returnValue": "", "structLogs": []}
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from asynceth.jsonrpc.errors import RateLimitExceeded
+
+class TokenBucket:
+    """A token bucket refilled at `rate` tokens per second up to `capacity`.
+
+    Tokens are reserved up front, so callers are served in the order they
+    ask, and the bucket may go into debt which later callers wait out."""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+
+    @property
+    def tokens(self):
+        self._refill()
+        return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def reserve(self, amount):
+        """takes `amount` tokens and returns how long to wait before they
+        can be used"""
+        self._refill()
+        self._tokens -= amount
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self.rate
+
+    def refund(self, amount):
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+class RateLimiter:
+    """Limits the rate of requests sent to an endpoint, e.g. to stay
+    within the compute units allowed by a hosted provider.
+
+    `rate` and `burst` are in units of weight per second. Every request
+    weighs `default_weight` unless its method is in `method_weights`,
+    where keys ending with `*` match a method prefix (e.g. `trace_*`). A
+    bulk request weighs the sum of its requests.
+
+    If `max_delay` is set, requests that would have to wait longer than
+    that fail with `RateLimitExceeded` instead of being delayed."""
+
+    def __init__(self, rate, *, burst=None, method_weights=None, default_weight=1, max_delay=None):
+        self.bucket = TokenBucket(rate, burst)
+        self.default_weight = default_weight
+        self.max_delay = max_delay
+        self.method_weights = {}
+        self.prefix_weights = []
+        for method, weight in (method_weights or {}).items():
+            if method.endswith('*'):
+                self.prefix_weights.append((method[:-1], weight))
+            else:
+                self.method_weights[method] = weight
+        # longest prefixes first so the most specific one wins
+        self.prefix_weights.sort(key=lambda pw: len(pw[0]), reverse=True)
+        self._weight_cache = {}
+
+    def method_weight(self, method):
+        try:
+            return self._weight_cache[method]
+        except KeyError:
+            pass
+        weight = self.method_weights.get(method)
+        if weight is None:
+            for prefix, prefix_weight in self.prefix_weights:
+                if method.startswith(prefix):
+                    weight = prefix_weight
+                    break
+            else:
+                weight = self.default_weight
+        self._weight_cache[method] = weight
+        return weight
+
+    def weight(self, data):
+        if isinstance(data, list):
+            return sum(self.method_weight(req['method']) for req in data)
+        return self.method_weight(data['method'])
+
+    async def acquire(self, data):
+        weight = self.weight(data)
+        delay = self.bucket.reserve(weight)
+        if delay > 0:
+            if self.max_delay is not None and delay > self.max_delay:
+                self.bucket.refund(weight)
+                raise RateLimitExceeded(delay)
+            await asyncio.sleep(delay)
@@ -0,0 +1,226 @@
+"""HTTP clients for recording jsonrpc sessions and replaying them offline,
+e.g. for reproducible benchmarks:
+
+    # record a session against a real node
+    client = JsonRPCClient(url, client_cls=RecordingHTTPClient, recording="session.jsonl.gz")
+    ...
+    await client.close()
+
+    # replay it with a simulated latency
+    client = JsonRPCClient(url, client_cls=ReplayHTTPClient, recording="session.jsonl.gz",
+                           latency=lognormal_latency(0.02, 0.5))
+
+Requests are matched on everything but their ids. When the same request
+was recorded more than once the responses are replayed in order, with the
+last one repeated once they run out."""
+
+import asyncio
+import collections
+import gzip
+import json
+import math
+import random
+import time
+
+from asynceth.jsonrpc.errors import HTTPError
+
+RECORDING_VERSION = 1
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def _strip_ids(body):
+    if isinstance(body, list):
+        return [_strip_ids(req) for req in body]
+    return {k: v for k, v in body.items() if k != 'id'}
+
+def request_key(body):
+    return json.dumps(_strip_ids(body), sort_keys=True, separators=(',', ':'))
+
+def _ids_to_indexes(body, response):
+    """replaces the ids in the response with the index of the matching request"""
+    if not isinstance(body, list):
+        return dict(response, id=0) if isinstance(response, dict) and 'id' in response else response
+    indexes = {req.get('id'): i for i, req in enumerate(body)}
+    return [dict(item, id=indexes.get(item.get('id'))) if isinstance(item, dict) and 'id' in item else item
+            for item in response]
+
+def _indexes_to_ids(body, response):
+    if not isinstance(body, list):
+        return dict(response, id=body.get('id')) if isinstance(response, dict) and 'id' in response else response
+    return [dict(item, id=body[item['id']].get('id')) if isinstance(item, dict) and item.get('id') is not None else item
+            for item in response]
+
+def lognormal_latency(median, sigma=0.5):
+    """returns a latency function following a log-normal distribution with
+    the given median (in seconds)"""
+    mu = math.log(median)
+    return lambda: random.lognormvariate(mu, sigma)
+
+class ReplayResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    async def json(self, *, encoding=None, loads=None, content_type=None):
+        return self._body
+
+class Recording:
+    """the responses of a recorded session, keyed by request"""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = collections.defaultdict(list)
+        self._positions = collections.defaultdict(int)
+        with _open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if 'version' in entry:
+                    if entry['version'] != RECORDING_VERSION:
+                        raise ValueError("Unsupported recording version: {}".format(entry['version']))
+                    continue
+                self._entries[entry['key']].append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def next_entry(self, key):
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+        position = self._positions[key]
+        if position < len(entries) - 1:
+            self._positions[key] = position + 1
+        return entries[position]
+
+    def rewind(self):
+        self._positions.clear()
+
+class RecordingWriter:
+    """Appends entries to a recording, shared by all the clients recording
+    to the same path and closed once all of them are closed"""
+
+    def __init__(self, path, flush_every):
+        self.path = path
+        self.flush_every = flush_every
+        self.references = 0
+        self._lines = []
+        self._file = _open(path, 'w')
+        self._file.write(json.dumps({"version": RECORDING_VERSION}) + "\n")
+
+    def write(self, entry):
+        self._lines.append(json.dumps(entry, separators=(',', ':')) + "\n")
+        if len(self._lines) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self._file.write("".join(self._lines))
+            self._lines = []
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+class RecordingHTTPClient:
+    """Passes requests through to the default `HTTPClient` (or
+    `transport_cls`) and appends every request and response to `recording`.
+
+    Entries are written with blocking file I/O on the event loop, so they
+    are buffered and written `flush_every` entries at a time (and when the
+    last client recording to the path is closed). Recording is meant for
+    capturing sessions, not for production traffic."""
+
+    _writers = {}
+
+    def __init__(self, *, recording, transport_cls=None, flush_every=100, **kwargs):
+        if transport_cls is None:
+            from asynceth.jsonrpc.client import default_http_client
+            transport_cls = default_http_client()
+        self._httpclient = transport_cls(**kwargs)
+        self._path = recording
+        writer = self._writers.get(recording)
+        if writer is None:
+            writer = self._writers[recording] = RecordingWriter(recording, flush_every)
+        writer.references += 1
+        self._writer = writer
+
+    def _record(self, entry):
+        self._writer.write(entry)
+
+    async def fetch(self, url, *, method="GET", headers=None, body=None, request_timeout=None):
+        start = time.monotonic()
+        try:
+            resp = await self._httpclient.fetch(url, method=method, headers=headers, body=body,
+                                                request_timeout=request_timeout)
+            rval = await resp.json(content_type=None)
+        except HTTPError as e:
+            self._record({"key": request_key(body), "latency": time.monotonic() - start,
+                          "status": e.status, "message": e.message})
+            raise
+        self._record({"key": request_key(body), "latency": time.monotonic() - start,
+                      "status": resp.status, "response": _ids_to_indexes(body, rval)})
+        return ReplayResponse(resp.status, rval)
+
+    async def close(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.references -= 1
+            if writer.references == 0:
+                if self._writers.get(self._path) is writer:
+                    del self._writers[self._path]
+                writer.close()
+        await self._httpclient.close()
+
+class ReplayHTTPClient:
+    """Serves responses from `recording` without any network access.
+
+    `latency` can be None (respond immediately), "recorded" (use the
+    latency seen while recording), a number of seconds, or a function
+    returning the number of seconds to wait for each request (see
+    `lognormal_latency`)."""
+
+    _recordings = {}
+
+    def __init__(self, *, recording, latency=None, max_clients=None, connect_timeout=None, **kwargs):
+        self._recording = self._recordings.get(recording)
+        if self._recording is None:
+            self._recording = self._recordings[recording] = Recording(recording)
+        self._path = recording
+        self._latency = latency
+
+    def _delay(self, entry):
+        if self._latency is None:
+            return 0
+        if self._latency == "recorded":
+            return entry['latency']
+        if callable(self._latency):
+            return self._latency()
+        return self._latency
+
+    async def fetch(self, url, *, method="GET", headers=None, body=None, request_timeout=None):
+        entry = self._recording.next_entry(request_key(body))
+        if entry is None:
+            # respond with a jsonrpc error so the client doesn't retry
+            error = {"code": -32000, "message": "No recorded response for request"}
+            if isinstance(body, list):
+                return ReplayResponse(200, [{"jsonrpc": "2.0", "id": req.get('id'), "error": error} for req in body])
+            return ReplayResponse(200, {"jsonrpc": "2.0", "id": body.get('id'), "error": error})
+        delay = self._delay(entry)
+        if delay:
+            if request_timeout and delay > request_timeout:
+                await asyncio.sleep(request_timeout)
+                raise HTTPError(599, message="Timeout")
+            await asyncio.sleep(delay)
+        if 'response' not in entry:
+            raise HTTPError(entry['status'], message=entry.get('message'))
+        return ReplayResponse(entry['status'], _indexes_to_ids(body, entry['response']))
+
+    async def close(self):
+        self._recordings.pop(self._path, None)
@@ -0,0 +1,122 @@
+import random
+import time
+
+class RetryBudget:
+    """Limits retries to a fraction of the overall traffic of a client so
+    that an outage doesn't turn every request into a retry storm.
+
+    Every request deposits `ratio` tokens and every retry withdraws one.
+    `min_retries_per_second` tokens are added over time so that clients
+    with little traffic can still retry."""
+
+    def __init__(self, ratio=0.2, min_retries_per_second=10.0, max_balance=None):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        if max_balance is None:
+            max_balance = max(10.0, min_retries_per_second * 10)
+        self.max_balance = max_balance
+        self._balance = min_retries_per_second
+        self._last_refill = time.monotonic()
+
+    @property
+    def balance(self):
+        self._refill()
+        return self._balance
+
+    def _refill(self):
+        now = time.monotonic()
+        self._balance = min(self.max_balance,
+                            self._balance + (now - self._last_refill) * self.min_retries_per_second)
+        self._last_refill = now
+
+    def record_request(self):
+        self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_withdraw(self):
+        self._refill()
+        if self._balance >= 1:
+            self._balance -= 1
+            return True
+        return False
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    `max_attempts` caps the total number of attempts per request (None
+    means retry until the request timeout), and `budget` is an optional
+    `RetryBudget` shared by all requests using this policy."""
+
+    def __init__(self, *, max_attempts=None, base_delay=0.1, max_delay=1.0, budget=None):
+        if max_attempts is not None and max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def record_request(self):
+        if self.budget is not None:
+            self.budget.record_request()
+
+    def should_retry(self, attempts):
+        """attempts is the number of attempts made so far"""
+        if self.max_attempts is not None and attempts >= self.max_attempts:
+            return False
+        if self.budget is not None and not self.budget.try_withdraw():
+            return False
+        return True
+
+    def delay(self, retries):
+        """retries is the number of retries made so far"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retries)))
+
+class CircuitBreaker:
+    """Tracks consecutive failures of a single endpoint.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail fast for `recovery_timeout` seconds, after which a
+    single trial request is let through (half open). A success closes the
+    circuit again, a failure re-opens it."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=5.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+
+    def record_cancelled(self):
+        # a cancelled trial request says nothing about the endpoint
+        self._trial_in_progress = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._trial_in_progress or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial_in_progress = False
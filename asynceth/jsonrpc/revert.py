@@ -0,0 +1,94 @@
+"""decoding of the revert data returned by nodes when a call, gas
+estimate or access list request fails"""
+
+from asynceth.utils import decode_hex
+
+ERROR_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+PANIC_SELECTOR = bytes.fromhex("4e487b71")  # Panic(uint256)
+
+PANIC_CODES = {
+    0x00: "generic compiler inserted panic",
+    0x01: "assertion failed",
+    0x11: "arithmetic overflow or underflow",
+    0x12: "division or modulo by zero",
+    0x21: "invalid enum value",
+    0x22: "invalid storage byte array",
+    0x31: "pop on empty array",
+    0x32: "array index out of bounds",
+    0x41: "out of memory",
+    0x51: "call to zero-initialized internal function",
+}
+
+class RevertReason:
+    """A decoded revert: `name` is "Error", "Panic", the name of a custom
+    error, or None if the data couldn't be decoded, and `args` the decoded
+    error arguments"""
+
+    def __init__(self, name, args, data):
+        self.name = name
+        self.args = args
+        self.data = data
+
+    @property
+    def message(self):
+        if self.name == "Error":
+            return self.args[0]
+        if self.name == "Panic":
+            return "Panic({:#x}): {}".format(self.args[0], PANIC_CODES.get(self.args[0], "unknown panic code"))
+        if self.name is None:
+            return "unknown revert data 0x{}".format(self.data.hex()) if self.data else "reverted without data"
+        return "{}({})".format(self.name, ", ".join(repr(arg) for arg in self.args))
+
+    def __eq__(self, other):
+        return isinstance(other, RevertReason) and (self.name, self.args, self.data) == (other.name, other.args, other.data)
+
+    def __repr__(self):
+        return "RevertReason({!r}, {!r})".format(self.name, self.args)
+
+    def __str__(self):
+        return self.message
+
+def revert_data(error):
+    """returns the revert data of a `JsonRPCError` as bytes, or None if
+    the error has no revert data"""
+    data = getattr(error, '_data', None)
+    if isinstance(data, dict):
+        data = data.get('data')
+    if not isinstance(data, str) or not data.startswith('0x'):
+        return None
+    try:
+        return decode_hex(data)
+    except ValueError:
+        return None
+
+def _decode_error_string(data):
+    offset = int.from_bytes(data[4:36], 'big')
+    length = int.from_bytes(data[4 + offset:36 + offset], 'big')
+    message = data[36 + offset:36 + offset + length]
+    if len(message) != length:
+        raise ValueError("Truncated Error(string) data")
+    return message.decode('utf-8', errors='replace')
+
+def error_reason(error, decode=None):
+    """returns the `RevertReason` of a `JsonRPCError`, decoding its revert
+    data with `decode` (defaults to `decode_revert_reason`), or None if
+    the error isn't a revert"""
+    data = revert_data(error)
+    if data is not None:
+        return (decode or decode_revert_reason)(data)
+    if 'revert' in (getattr(error, 'message', None) or '').lower():
+        return RevertReason(None, (), b'')
+    return None
+
+def decode_revert_reason(data):
+    """decodes `Error(string)` and `Panic(uint256)` revert data"""
+    if isinstance(data, str):
+        data = decode_hex(data)
+    try:
+        if data[:4] == ERROR_SELECTOR and len(data) >= 68:
+            return RevertReason("Error", (_decode_error_string(data),), data)
+        if data[:4] == PANIC_SELECTOR and len(data) == 36:
+            return RevertReason("Panic", (int.from_bytes(data[4:], 'big'),), data)
+    except ValueError:
+        pass
+    return RevertReason(None, (), data)
@@ -0,0 +1,94 @@
+import asyncio
+
+from asynceth.utils import parse_int, validate_hex_int, decode_hex
+
+def _hex_or_none(value):
+    if value is None or value == '':
+        return None
+    return validate_hex_int(value)
+
+class BlockSnapshot:
+    """A read only view of the chain state at a single block.
+
+    Reads made through the snapshot all use the same block and, as the
+    state of a block doesn't change, their results are cached (concurrent
+    identical reads share a single request). Other attributes are taken
+    from the underlying client.
+
+    NOTE: blocks are pinned by number, so the cached results can be
+    stale if the block is reorged."""
+
+    def __init__(self, jsonrpc, block):
+        number = parse_int(block)
+        if number is None:
+            raise TypeError("snapshots require a block number")
+        self.jsonrpc = jsonrpc
+        self.block = number
+        self._cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.clear()
+
+    def __getattr__(self, name):
+        return getattr(self.jsonrpc, name)
+
+    def clear(self):
+        self._cache.clear()
+
+    def _check_block(self, block):
+        if block is not None and block != "latest" and parse_int(block) != self.block:
+            raise ValueError("Snapshot is pinned to block {}".format(self.block))
+
+    def _cached(self, key, fn):
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._cache[key] = future
+
+            def forget_failures(f):
+                if (f.cancelled() or f.exception() is not None) and self._cache.get(key) is f:
+                    del self._cache[key]
+            future.add_done_callback(forget_failures)
+        # shield so a cancelled caller doesn't cancel the shared request
+        return asyncio.shield(future)
+
+    async def eth_call(self, *, to_address, from_address=None, gas=None, gasprice=None, value=None, data=None,
+                       block=None, result_processor=None, as_bytes=False):
+        self._check_block(block)
+        key = ("eth_call", validate_hex_int(to_address), _hex_or_none(from_address), _hex_or_none(gas),
+               _hex_or_none(gasprice), _hex_or_none(value), _hex_or_none(data))
+        result = await self._cached(key, lambda: self.jsonrpc.eth_call(
+            to_address=to_address, from_address=from_address, gas=gas, gasprice=gasprice,
+            value=value, data=data, block=self.block))
+        if result_processor:
+            return result_processor(result)
+        if as_bytes:
+            return decode_hex(result)
+        return result
+
+    def eth_getBalance(self, address, block=None):
+        self._check_block(block)
+        return self._cached(("eth_getBalance", validate_hex_int(address)),
+                            lambda: self.jsonrpc.eth_getBalance(address, self.block))
+
+    def eth_getTransactionCount(self, address, block=None):
+        self._check_block(block)
+        return self._cached(("eth_getTransactionCount", validate_hex_int(address)),
+                            lambda: self.jsonrpc.eth_getTransactionCount(address, self.block))
+
+    def eth_getCode(self, address, block=None):
+        self._check_block(block)
+        return self._cached(("eth_getCode", validate_hex_int(address)),
+                            lambda: self.jsonrpc.eth_getCode(address, self.block))
+
+    def eth_getStorageAt(self, address, position, block=None):
+        self._check_block(block)
+        return self._cached(("eth_getStorageAt", validate_hex_int(address), validate_hex_int(position)),
+                            lambda: self.jsonrpc.eth_getStorageAt(address, position, self.block))
+
+    def eth_getBlock(self, with_transactions=True):
+        return self._cached(("eth_getBlockByNumber", with_transactions),
+                            lambda: self.jsonrpc.eth_getBlockByNumber(self.block, with_transactions))
@@ -8,6 +8,7 @@ except ModuleNotFoundError:
     from tornado.httpclient import AsyncHTTPClient
 
 from asynceth.jsonrpc.errors import HTTPError
+from asynceth.jsonrpc.transport import DEFAULT_TRANSPORT
 
 class HTTPResponse:
     def __init__(self, status, body):
@@ -19,10 +20,13 @@ class HTTPResponse:
 
 class HTTPClient:
 
-    def __init__(self, *, max_clients=100, connect_timeout=20.0, verify_ssl=True, **kwargs):
+    def __init__(self, *, max_clients=100, connect_timeout=20.0, verify_ssl=True, transport=None, **kwargs):
+        if transport is None:
+            transport = DEFAULT_TRANSPORT
         self._httpclient = AsyncHTTPClient(max_clients=max_clients, **kwargs)
         self._connect_timeout = connect_timeout
         self._verify_ssl = verify_ssl
+        self._decompress_response = transport.compression
 
     async def fetch(self, url, *, method="GET", headers=None, body=None, request_timeout=30.0):
         if isinstance(body, (dict, list)):
@@ -38,6 +42,7 @@ class HTTPClient:
                                             validate_cert=self._verify_ssl,
                                             request_timeout=request_timeout,
                                             connect_timeout=self._connect_timeout,
+                                            decompress_response=self._decompress_response,
                                             raise_error=False)
         if resp.code < 200 or resp.code >= 300:
             raise HTTPError(resp.code, message=resp.reason)
@@ -0,0 +1,76 @@
+import logging
+
+JSONRPC_LOG = logging.getLogger("asynceth.jsonrpc.client")
+
+def _has_module(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+class TransportProfile:
+    """Connection settings for the http client used by `JsonRPCClient`.
+
+    http2: use a single multiplexed HTTP/2 connection per host when the
+    httpx backend (`pip install httpx[http2]`) is available
+
+    compression: ask the node for compressed responses (gzip, deflate, and
+    brotli when the `brotli` module is installed). Large responses such as
+    blocks with full transactions compress very well
+
+    keepalive_timeout: seconds to keep idle connections open
+
+    limit_per_host: the maximum number of connections to a single host (0
+    for no limit other than `max_clients`)
+
+    dns_cache_ttl: seconds to cache dns lookups for, or None to disable the
+    dns cache
+
+    TCP_NODELAY is always enabled by the aiohttp, httpx and curl backends."""
+
+    def __init__(self, *, http2=False, compression=True, keepalive_timeout=30.0,
+                 limit_per_host=0, dns_cache_ttl=300):
+        self.http2 = http2
+        self.compression = compression
+        self.keepalive_timeout = keepalive_timeout
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+
+    @property
+    def accept_encoding(self):
+        if not self.compression:
+            return "identity"
+        if _has_module("brotli") or _has_module("brotlicffi"):
+            return "gzip, deflate, br"
+        return "gzip, deflate"
+
+DEFAULT_TRANSPORT = TransportProfile()
+
+def select_http_client(transport=None):
+    """returns the best available `HTTPClient` class for the given profile"""
+    if transport is not None and transport.http2:
+        if _has_module("httpx") and _has_module("h2"):
+            from asynceth.jsonrpc.httpx_client import HTTPClient
+            JSONRPC_LOG.debug("using httpx jsonrpc client")
+            return HTTPClient
+        JSONRPC_LOG.warning("http2 requires httpx and h2 to be installed, falling back to http/1.1")
+    try:
+        from asynceth.jsonrpc.aiohttp_client import HTTPClient
+        JSONRPC_LOG.debug("using aiohttp jsonrpc client")
+        return HTTPClient
+    except ImportError:
+        pass
+    try:
+        from asynceth.jsonrpc.tornado_client import HTTPClient
+        JSONRPC_LOG.debug("using tornado jsonrpc client")
+        return HTTPClient
+    except ImportError:
+        pass
+    try:
+        from asynceth.jsonrpc.httpx_client import HTTPClient
+        JSONRPC_LOG.debug("using httpx jsonrpc client")
+        return HTTPClient
+    except ImportError:
+        pass
+    raise ModuleNotFoundError("JsonRPCClient requires either aiohttp, tornado or httpx")
@@ -1,4 +1,5 @@
-from ethereum.utils import sha3 as keccak256, decode_hex
+from asynceth.crypto import keccak256
+from asynceth.utils import decode_hex
 from asynceth.test.utils import words
 
 async def test_f(jsonrpc, abiv2_contract):
@@ -0,0 +1,127 @@
+from aiohttp import web
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.blocks import is_method_not_found
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.test.utils import create_jsonrpc_app
+
+def make_chain(num_blocks, txs_per_block):
+    blocks = {}
+    receipts = {}
+    for number in range(num_blocks):
+        block_hash = "0x{:064x}".format(number + 1)
+        txs = []
+        for i in range(txs_per_block):
+            tx_hash = "0x{:064x}".format(0x1000 * (number + 1) + i)
+            txs.append({"hash": tx_hash, "blockHash": block_hash})
+            receipts[tx_hash] = {"transactionHash": tx_hash, "blockHash": block_hash,
+                                 "logs": [{"blockHash": block_hash, "logIndex": hex(i)}]}
+        blocks[number] = {"number": hex(number), "hash": block_hash, "transactions": txs}
+    return blocks, receipts
+
+def create_chain_app(blocks, receipts, supports_block_receipts=True, receipts_error=None):
+    requests = []
+
+    def eth_getBlockByNumber(number, full):
+        return blocks.get(int(number, 16))
+
+    def eth_getBlockReceipts(number):
+        if not supports_block_receipts:
+            raise JsonRPCError(None, -32601, "Method not found", None)
+        if receipts_error is not None:
+            raise receipts_error
+        if int(number, 16) not in blocks:
+            return None
+        return [receipts[tx['hash']] for tx in blocks[int(number, 16)]['transactions']]
+
+    def eth_getTransactionReceipt(tx_hash):
+        return receipts[tx_hash]
+
+    app = create_jsonrpc_app(eth_getBlockByNumber=eth_getBlockByNumber,
+                             eth_getBlockReceipts=eth_getBlockReceipts,
+                             eth_getTransactionReceipt=eth_getTransactionReceipt)
+
+    @web.middleware
+    async def count(request, handler):
+        requests.append(await request.json())
+        return await handler(request)
+    app.middlewares.append(count)
+    return app, requests
+
+async def test_fetch_block_bundle(aiohttp_server):
+    blocks, receipts = make_chain(3, 2)
+    app, requests = create_chain_app(blocks, receipts)
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        bundle = await jsonrpc_client.fetch_block_bundle(1)
+        assert bundle.number == 1
+        assert [r['transactionHash'] for r in bundle.receipts] == [tx['hash'] for tx in blocks[1]['transactions']]
+        assert len(bundle.logs) == 2
+        assert len(requests) == 1
+
+        assert await jsonrpc_client.fetch_block_bundle(10) is None
+
+        bundles = [bundle async for bundle in jsonrpc_client.fetch_block_bundles(range(3), prefetch=2)]
+        assert [bundle.number for bundle in bundles] == [0, 1, 2]
+    finally:
+        await jsonrpc_client.close()
+
+async def test_fetch_block_bundle_without_block_receipts(aiohttp_server):
+    blocks, receipts = make_chain(2, 3)
+    app, requests = create_chain_app(blocks, receipts, supports_block_receipts=False)
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        bundle = await jsonrpc_client.fetch_block_bundle(1)
+        assert len(bundle.receipts) == 3
+        assert bundle.is_consistent()
+        # block + eth_getBlockReceipts, then one bulk of receipts
+        assert len(requests) == 2
+        assert len(requests[1]) == 3
+
+        bundle = await jsonrpc_client.fetch_block_bundle(0)
+        assert len(bundle.receipts) == 3
+        # eth_getBlockReceipts isn't tried again
+        assert len(requests[2]) == 1
+    finally:
+        await jsonrpc_client.close()
+
+def test_is_method_not_found():
+    for code, message in [(-32601, "whatever"),
+                          (-32000, "the method eth_getBlockReceipts does not exist/is not available"),
+                          (-32000, "Method not supported"),
+                          (-32602, "unsupported method eth_getBlockReceipts")]:
+        assert is_method_not_found(JsonRPCError(None, code, message, None))
+    for message in ["header not found", "block not found", "execution reverted", None]:
+        assert not is_method_not_found(JsonRPCError(None, -32000, message, None))
+
+async def test_fetch_block_bundle_receipts_errors(aiohttp_server):
+    blocks, receipts = make_chain(2, 1)
+    app, requests = create_chain_app(blocks, receipts,
+                                     receipts_error=JsonRPCError(None, -32000, "header not found", None))
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), should_retry=False)
+    try:
+        try:
+            await jsonrpc_client.bulk().fetch_block_bundle(1)
+        except JsonRPCError as e:
+            assert e.message == "header not found"
+        else:
+            assert False, "expected the error to be raised"
+        # other errors don't disable eth_getBlockReceipts
+        assert jsonrpc_client._block_receipts_supported is None
+    finally:
+        await jsonrpc_client.close()
+
+async def test_block_receipts_support_shared_with_bulk(aiohttp_server):
+    blocks, receipts = make_chain(2, 2)
+    app, requests = create_chain_app(blocks, receipts, supports_block_receipts=False)
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        await jsonrpc_client.bulk().fetch_block_bundle(1)
+        assert jsonrpc_client._block_receipts_supported is False
+        await jsonrpc_client.fetch_block_bundle(0)
+        assert len(requests[-2]) == 1
+    finally:
+        await jsonrpc_client.close()
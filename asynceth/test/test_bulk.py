@@ -0,0 +1,34 @@
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.mock_node import MockNode
+
+async def test_bulk_shares_client(aiohttp_server):
+    node = MockNode(block_number=10)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), concurrency_limiter=True,
+                                   circuit_breaker=True, hedging=True)
+    try:
+        bulk = jsonrpc_client.bulk()
+        assert bulk._httpclient is jsonrpc_client._httpclient
+        assert bulk.middleware is jsonrpc_client.middleware
+        assert bulk.retry_policy is jsonrpc_client.retry_policy
+        assert bulk._concurrency_limiter is jsonrpc_client._concurrency_limiter
+        assert bulk._circuit_breakers is jsonrpc_client._circuit_breakers
+        assert bulk._hedging is jsonrpc_client._hedging
+        assert not jsonrpc_client._bulk_mode
+
+        f1 = bulk.eth_blockNumber()
+        # bulks of bulks are independent
+        inner = bulk.bulk()
+        f2 = inner.eth_getBalance(node.contracts[0])
+        assert len(bulk._bulk_data) == 1
+        await bulk.execute()
+        await inner.execute()
+        assert await f1 == 10
+        assert await f2 == 10 ** 18 + 10
+
+        # closing a bulk leaves the parent's http client open
+        await bulk.close()
+        await inner.close()
+        assert await jsonrpc_client.eth_blockNumber() == 10
+    finally:
+        await jsonrpc_client.close()
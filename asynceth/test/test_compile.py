@@ -0,0 +1,174 @@
+import hashlib
+import os
+import sys
+import pytest
+from asynceth.contract.cache import CompilationCache, source_hashes
+from asynceth.contract.utils import compile_contracts, compile_solidity, solc_version
+
+# a stand in for solc that records its invocations, as solc isn't needed
+# to test when it is run
+FAKE_SOLC = '''#!{python}
+import hashlib, json, os, re, sys
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "invocations"), "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+if sys.argv[1] == "--version":
+    print("solc, the solidity compiler commandline interface")
+    print("Version: 0.8.19+commit.7dd6d404.Linux.g++")
+    sys.exit(0)
+if sys.argv[-1] == "--standard-json":
+    request = json.load(sys.stdin)
+    output = {{"contracts": {{}}, "sources": {{}}}}
+    for path, source in request["sources"].items():
+        if "invalid" in source["content"]:
+            output["errors"] = [{{"severity": "error", "formattedMessage": path + ": invalid source"}}]
+        for name in re.findall(r"contract (\\w+)", source["content"]):
+            code = hashlib.sha256((json.dumps(request["settings"]) + source["content"] + name).encode()).hexdigest()[:16]
+            output["contracts"].setdefault(path, {{}})[name] = {{
+                "abi": [{{"type": "function", "name": "get", "stateMutability": "view", "inputs": [], "outputs": []}}],
+                "evm": {{"bytecode": {{"object": "6080" + code}}, "deployedBytecode": {{"object": code}}}}}}
+    print(json.dumps(output))
+    sys.exit(0)
+filename = sys.argv[-1]
+source = sys.stdin.read() if filename == "<stdin>" else open(filename).read()
+contracts = {{}}
+for name in re.findall(r"contract (\\w+)", source):
+    code = hashlib.sha256((" ".join(sys.argv[1:-1]) + source + name).encode()).hexdigest()[:16]
+    contracts[filename + ":" + name] = {{
+        "abi": [{{"type": "function", "name": "get", "stateMutability": "view", "inputs": [], "outputs": []}}],
+        "bin": "6080" + code, "bin-runtime": code}}
+print(json.dumps({{"contracts": contracts, "version": "0.8.19"}}))
+'''
+
+@pytest.fixture
+def solc(tmp_path):
+    path = tmp_path / "bin" / "solc"
+    path.parent.mkdir()
+    path.write_text(FAKE_SOLC.format(python=sys.executable))
+    path.chmod(0o755)
+    return str(path)
+
+def invocations(solc):
+    with open(os.path.join(os.path.dirname(solc), "invocations")) as f:
+        return [line.split()[-1] if "--standard-json" in line else line.split()[0] for line in f.read().splitlines()]
+
+def test_source_hashes(tmp_path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "Token.sol").write_text('import "./lib/Math.sol";\nimport {Ownable} from "lib/Ownable.sol";\ncontract Token {}')
+    (tmp_path / "lib" / "Math.sol").write_text('import "../Missing.sol";\nlibrary Math {}')
+    (tmp_path / "lib" / "Ownable.sol").write_text('contract Ownable {}')
+    hashes = source_hashes("Token.sol", str(tmp_path))
+    assert hashes == {
+        "Token.sol": hashlib.sha256((tmp_path / "Token.sol").read_bytes()).hexdigest(),
+        "lib/Math.sol": hashlib.sha256((tmp_path / "lib" / "Math.sol").read_bytes()).hexdigest(),
+        "lib/Ownable.sol": hashlib.sha256(b'contract Ownable {}').hexdigest(),
+        "Missing.sol": None,
+    }
+    # sources with missing imports aren't cached
+    assert CompilationCache(str(tmp_path / "cache")).key("0.8.19", {}, hashes) is None
+
+def test_compilation_cache(tmp_path, solc):
+    cwd = tmp_path / "src"
+    cwd.mkdir()
+    (cwd / "Token.sol").write_text('import "./Base.sol";\ncontract Token {}\ncontract Other {}')
+    (cwd / "Base.sol").write_text('contract Base {}')
+    cache = CompilationCache(str(tmp_path / "cache"))
+
+    abi, bytecode = compile_solidity("Token.sol", cwd=str(cwd), solc=solc, cache=cache)
+    assert abi[0]['name'] == "get"
+    assert invocations(solc) == ["--version", "--allow-paths"]
+    for _ in range(10):
+        assert compile_solidity("Token.sol", cwd=str(cwd), solc=solc, cache=cache) == (abi, bytecode)
+    other = compile_solidity("Token.sol", name="Other", cwd=str(cwd), solc=solc, cache=cache)
+    assert other[1] != bytecode
+    assert solc_version(solc) == (0, 8, 19)
+    assert invocations(solc) == ["--version", "--allow-paths"]
+
+    # stored on disk
+    assert compile_solidity("Token.sol", cwd=str(cwd), solc=solc, cache=CompilationCache(str(tmp_path / "cache"))) == (abi, bytecode)
+    assert len(invocations(solc)) == 2
+
+    # changing the compiler settings or an imported source recompiles
+    compile_solidity("Token.sol", cwd=str(cwd), solc=solc, cache=cache, optimize_runs=1000)
+    assert len(invocations(solc)) == 3
+    (cwd / "Base.sol").write_text('contract Base { }')
+    assert compile_solidity("Token.sol", cwd=str(cwd), solc=solc, cache=cache) == (abi, bytecode)
+    assert len(invocations(solc)) == 4
+
+    # sources given directly
+    source = "contract Direct {}"
+    direct = compile_solidity(source, cwd=str(cwd), solc=solc, cache=cache)
+    assert compile_solidity(source, cwd=str(cwd), solc=solc, cache=cache) == direct
+    assert len(invocations(solc)) == 5
+
+    compile_solidity("Token.sol", cwd=str(cwd), solc=solc, cache=False)
+    assert invocations(solc)[-1] == "--allow-paths"
+    assert len(invocations(solc)) == 6
+
+def test_compile_contracts(tmp_path, solc):
+    cwd = tmp_path / "src"
+    cwd.mkdir()
+    (cwd / "Base.sol").write_text('contract Base {}')
+    sources = []
+    for i in range(8):
+        (cwd / "Token{}.sol".format(i)).write_text('import "./Base.sol";\ncontract Token{} {{}}\ncontract Helper{} {{}}'.format(i, i))
+        sources.append("Token{}.sol".format(i))
+    cache = CompilationCache(str(tmp_path / "cache"))
+
+    contracts = compile_contracts(sources, cwd=str(cwd), solc=solc, cache=cache)
+    assert invocations(solc) == ["--version", "--standard-json"]
+    assert list(contracts) == sources
+    assert list(contracts["Token3.sol"]) == ["Token3", "Helper3"]
+    token = contracts["Token3.sol"]["Token3"]
+    assert token["abi"][0]["name"] == "get"
+    assert token["bin"] == "6080" + token["bin-runtime"]
+
+    # the batch feeds the cache used by compile_solidity, including imports
+    assert compile_solidity("Token3.sol", cwd=str(cwd), solc=solc, cache=cache) == (token["abi"], bytes.fromhex(token["bin"]))
+    compile_solidity("Base.sol", cwd=str(cwd), solc=solc, cache=cache)
+    assert compile_contracts(sources, cwd=str(cwd), solc=solc, cache=cache) == contracts
+    assert len(invocations(solc)) == 2
+
+    # only sources that changed are compiled, split between workers
+    for i in range(4):
+        (cwd / "Token{}.sol".format(i)).write_text('contract Token{} {{ }}'.format(i))
+    updated = compile_contracts(sources, cwd=str(cwd), solc=solc, cache=cache, workers=2)
+    assert invocations(solc)[2:] == ["--standard-json", "--standard-json"]
+    assert list(updated["Token0.sol"]) == ["Token0"]
+    assert updated["Token0.sol"] != contracts["Token0.sol"]
+    assert updated["Token7.sol"] == contracts["Token7.sol"]
+
+    (cwd / "Broken.sol").write_text('contract Broken { invalid }')
+    with pytest.raises(Exception, match="Broken.sol: invalid source"):
+        compile_contracts(["Broken.sol"], cwd=str(cwd), solc=solc, cache=cache)
+
+def test_compilation_cache_entries(tmp_path):
+    cache = CompilationCache(str(tmp_path / "cache"), max_memory_entries=2)
+    contracts = {"Token": {"abi": [{"type": "function", "name": "get"}], "bin": "6080", "bin-runtime": "00"}}
+    cache.put("aa" * 32, contracts)
+    # callers can't modify the cached entries
+    contracts["Token"]["abi"].append({"type": "event"})
+    entry = cache.get("aa" * 32)
+    assert entry["Token"]["abi"] == [{"type": "function", "name": "get"}]
+    entry["Token"]["abi"].clear()
+    assert cache.get("aa" * 32)["Token"]["abi"] == [{"type": "function", "name": "get"}]
+
+    cache.put("bb" * 32, {})
+    cache.put("cc" * 32, {})
+    assert list(cache._memory) == ["bb" * 32, "cc" * 32]
+    # evicted entries are still on disk
+    assert cache.get("aa" * 32)["Token"]["bin"] == "6080"
+
+    # failed writes don't leave temporary files behind
+    (tmp_path / "cache" / "dd" / ("dd" * 32 + ".json")).mkdir(parents=True)
+    cache.put("dd" * 32, {})
+    assert os.listdir(str(tmp_path / "cache" / "dd")) == ["dd" * 32 + ".json"]
+    assert cache.get("dd" * 32) == {}
+
+def test_compile_contracts_missing_source(tmp_path, solc):
+    cwd = tmp_path / "src"
+    cwd.mkdir()
+    (cwd / "Token.sol").write_text('contract Token {}')
+    cache = CompilationCache(str(tmp_path / "cache"))
+    with pytest.raises(FileNotFoundError, match="Tokn.sol"):
+        compile_contracts(["Token.sol", "Tokn.sol"], cwd=str(cwd), solc=solc, cache=cache)
+    assert invocations(solc) == ["--version"]
@@ -0,0 +1,76 @@
+import asyncio
+import concurrent.futures
+import threading
+from eth_abi import encode_abi
+from asynceth import JsonRPCClient, Contract
+from asynceth.contract.contract import decode_call_result
+from asynceth.test.utils import create_jsonrpc_app
+
+ADDRESS = "0x" + "11" * 20
+ABI = [
+    {"type": "function", "name": "getStructs", "stateMutability": "view",
+     "inputs": [{"name": "count", "type": "uint256"}],
+     "outputs": [{"name": "", "type": "tuple[]", "components": [
+         {"name": "x", "type": "uint256"}, {"name": "y", "type": "uint256"}]}]},
+]
+
+def structs(count):
+    return tuple((i, i * 2) for i in range(count))
+
+def eth_call(callobj, block):
+    count = int(callobj['data'][10:], 16)
+    return "0x" + encode_abi(["(uint256,uint256)[]"], [structs(count)]).hex()
+
+def test_decode_call_result():
+    data = encode_abi(["(uint256,uint256)[]", "string"], [structs(3), "abc"])
+    assert decode_call_result(["(uint256,uint256)[]", "string"], "0x" + data.hex()) == [structs(3), "abc"]
+    # bytes results are decoded as is
+    assert decode_call_result(["(uint256,uint256)[]"], encode_abi(["(uint256,uint256)[]"], [structs(3)])) == structs(3)
+    assert decode_call_result(["uint256"], "0x") is None
+
+class RecordingExecutor(concurrent.futures.ThreadPoolExecutor):
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.threads = set()
+
+    def submit(self, fn, *args, **kwargs):
+        def run():
+            self.threads.add(threading.get_ident())
+            return fn(*args, **kwargs)
+        return super().submit(run)
+
+async def test_decode_executor(aiohttp_server):
+    server = await aiohttp_server(create_jsonrpc_app(eth_call=eth_call))
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    executor = RecordingExecutor()
+    try:
+        contract = Contract(jsonrpc_client, ABI, address=ADDRESS, decode_executor=executor, decode_threshold=4096)
+        # small results are still decoded on the event loop
+        assert await contract.getStructs(3) == structs(3)
+        assert executor.threads == set()
+
+        assert await contract.getStructs(1000) == structs(1000)
+        assert executor.threads and threading.get_ident() not in executor.threads
+
+        bulk = jsonrpc_client.bulk()
+        futures = [contract.getStructs(count, bulk=bulk) for count in (2, 500, 1000)]
+        await bulk.execute()
+        assert await asyncio.gather(*futures) == [structs(2), structs(500), structs(1000)]
+
+        snapshot = jsonrpc_client.at_block(10)
+        assert await contract.getStructs(200, block=snapshot) == structs(200)
+    finally:
+        executor.shutdown()
+        await jsonrpc_client.close()
+
+async def test_decode_process_pool(aiohttp_server):
+    server = await aiohttp_server(create_jsonrpc_app(eth_call=eth_call))
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+    try:
+        contract = Contract(jsonrpc_client, ABI, address=ADDRESS, decode_executor=executor, decode_threshold=0)
+        assert await contract.getStructs(1000) == structs(1000)
+    finally:
+        executor.shutdown()
+        await jsonrpc_client.close()
@@ -0,0 +1,148 @@
+import pytest
+from asynceth import JsonRPCClient, Contract
+from asynceth.contract.deployment import DeploymentError, DeploymentPlan
+from asynceth.contract.transaction import contract_address
+from asynceth.crypto import private_key_to_address
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.test.utils import create_jsonrpc_app
+
+KEY = bytes.fromhex("46" * 32)
+SENDER = '0x' + private_key_to_address(KEY).hex()
+
+TOKEN_ABI = [{"type": "constructor", "inputs": [{"name": "decimals", "type": "uint8"}]}]
+EXCHANGE_ABI = [{"type": "constructor", "inputs": [{"name": "token", "type": "address"}]}]
+ROUTER_ABI = [{"type": "constructor", "inputs": [{"name": "exchanges", "type": "address[]"}]}]
+
+class Chain:
+    """deploys every transaction it's sent in the next block, which is
+    mined each time the block number is requested"""
+
+    def __init__(self, nonce=3, failing_sends=()):
+        self.nonce = nonce
+        # indexes of eth_sendRawTransaction calls that fail
+        self.failing_sends = set(failing_sends)
+        self.send_count = 0
+        # the block parameters verification was done at
+        self.verified_at = set()
+        self.block_number = 0
+        self.sent = []
+        self.pending = []
+        self.code = {}
+        # constructors calling these addresses can't be estimated until they have code
+        self.calls = set()
+        self.requests = []
+
+    def app(self):
+        def record(method, fn):
+            def handler(*params):
+                self.requests.append(method)
+                return fn(*params)
+            return handler
+        return create_jsonrpc_app(**{method: record(method, fn) for method, fn in {
+            "eth_getTransactionCount": lambda address, block: hex(
+                self.nonce + len(self.pending) + len(self.sent) if block == "pending" else self.nonce + len(self.sent)),
+            "eth_getBalance": lambda address, block: hex(10 ** 18),
+            "eth_gasPrice": lambda: hex(10 ** 9),
+            "eth_estimateGas": self.eth_estimateGas,
+            "eth_sendRawTransaction": self.eth_sendRawTransaction,
+            "eth_blockNumber": self.eth_blockNumber,
+            "eth_getCode": self.eth_getCode,
+        }.items()})
+
+    def eth_estimateGas(self, callobj):
+        for address in self.calls:
+            if address[2:] in callobj['data'] and address not in self.code:
+                raise JsonRPCError(None, 3, "execution reverted", None)
+        return hex(100000)
+
+    def eth_getCode(self, address, block):
+        self.verified_at.add(block)
+        return self.code.get(address, "0x")
+
+    def eth_sendRawTransaction(self, tx):
+        self.send_count += 1
+        if self.send_count - 1 in self.failing_sends:
+            raise JsonRPCError(None, -32000, "nonce too low", None)
+        address = '0x' + contract_address(SENDER, self.nonce + len(self.sent) + len(self.pending)).hex()
+        self.pending.append(address)
+        return '0x' + "00" * 31 + "{:02x}".format(len(self.sent) + len(self.pending))
+
+    def eth_blockNumber(self):
+        if self.pending:
+            self.block_number += 1
+            for address in self.pending:
+                self.code[address] = "0x6080"
+            self.sent.extend(self.pending)
+            self.pending = []
+        return hex(self.block_number)
+
+def plan_system(jsonrpc_client):
+    plan = DeploymentPlan(jsonrpc_client, KEY, poll_interval=0.01, timeout=5)
+    tokens = [plan.add("token{}".format(i), Contract(jsonrpc_client, TOKEN_ABI, bytecode=b"\x60\x80"), 18)
+              for i in range(4)]
+    exchanges = [plan.add("exchange{}".format(i), Contract(jsonrpc_client, EXCHANGE_ABI, bytecode=b"\x60\x81"), token)
+                 for i, token in enumerate(tokens)]
+    plan.add("router", Contract(jsonrpc_client, ROUTER_ABI, bytecode=b"\x60\x82"), exchanges)
+    return plan
+
+async def test_deployment_plan(aiohttp_server):
+    chain = Chain()
+    server = await aiohttp_server(chain.app())
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        plan = plan_system(jsonrpc_client)
+        contracts = await plan.deploy()
+        # everything is sent in dependency order without waiting for blocks
+        assert chain.block_number == 1
+        assert [plan.deployments[name].nonce for name in contracts] == list(range(3, 12))
+        for name, contract in contracts.items():
+            assert contract.address == '0x' + contract_address(SENDER, plan.deployments[name].nonce).hex()
+            assert chain.code[contract.address] == "0x6080"
+        assert chain.requests.count("eth_sendRawTransaction") == 9
+        assert chain.requests.count("eth_getCode") == 9
+        # the code is checked at the block that was just seen
+        assert chain.verified_at == {"0x1"}
+    finally:
+        await jsonrpc_client.close()
+
+async def test_deployment_plan_waits_for_dependencies(aiohttp_server):
+    chain = Chain(nonce=0)
+    server = await aiohttp_server(chain.app())
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        plan = plan_system(jsonrpc_client)
+        # the exchange constructors call their token
+        chain.calls = {'0x' + contract_address(SENDER, i).hex() for i in range(4)}
+        contracts = await plan.deploy()
+        assert chain.block_number == 2
+        assert [plan.deployments[name].nonce for name in contracts] == list(range(9))
+        assert all(contract.address in chain.code for contract in contracts.values())
+    finally:
+        await jsonrpc_client.close()
+
+def test_deployment_plan_errors():
+    plan = DeploymentPlan(None, KEY)
+    a = plan.add("a", Contract(None, EXCHANGE_ABI, bytecode=b"\x60\x80"), None)
+    b = plan.add("b", Contract(None, EXCHANGE_ABI, bytecode=b"\x60\x80"), a)
+    a.args = (b,)
+    with pytest.raises(ValueError, match="Circular dependency"):
+        plan._order()
+    with pytest.raises(ValueError, match="Duplicate"):
+        plan.add("a", Contract(None, EXCHANGE_ABI, bytecode=b"\x60\x80"), None)
+
+async def test_deployment_plan_send_errors(aiohttp_server):
+    chain = Chain(failing_sends={1})
+    server = await aiohttp_server(chain.app())
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        plan = plan_system(jsonrpc_client)
+        with pytest.raises(DeploymentError) as e:
+            await plan.deploy()
+        # the tokens are sent together, and the ones after the failure still go out
+        assert list(e.value.errors) == ["token1"]
+        assert [deployment.name for deployment in e.value.sent] == ["token0", "token2", "token3"]
+        assert plan.deployments["token1"].tx_hash is None
+        assert all(plan.deployments[name].tx_hash is not None for name in ["token0", "token2", "token3"])
+        assert "token1" in str(e.value)
+    finally:
+        await jsonrpc_client.close()
@@ -0,0 +1,119 @@
+import asyncio
+from asynceth import JsonRPCClient, Contract
+from asynceth.contract.transaction import DynamicFeeTransaction
+from asynceth.jsonrpc.fees import next_base_fee
+from asynceth.jsonrpc.mock_node import MockNode
+
+TRANSFER_ABI = [{
+    "type": "function", "name": "transfer", "stateMutability": "nonpayable",
+    "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}],
+    "outputs": [{"name": "", "type": "bool"}],
+}]
+
+KEY = bytes.fromhex("46" * 32)
+
+def test_next_base_fee():
+    block = {"baseFeePerGas": hex(10 ** 9), "gasLimit": hex(30000000), "gasUsed": hex(15000000)}
+    assert next_base_fee(block) == 10 ** 9
+    assert next_base_fee(dict(block, gasUsed=hex(30000000))) == 1125000000
+    assert next_base_fee(dict(block, gasUsed="0x0")) == 875000000
+
+def test_dynamic_fee_transaction():
+    # checked against eth-account
+    tx = DynamicFeeTransaction(1, 3, 2 * 10 ** 9, 30 * 10 ** 9, 50000, "0x" + "35" * 20, 10 ** 17, "0x1234",
+                               [{"address": "0x" + "11" * 20, "storageKeys": ["0x" + "00" * 31 + "01"]}])
+    assert tx.sign(KEY).encode().hex() == (
+        "02f8ae010384773594008506fc23ac0082c35094353535353535353535353535353535353535353588016345785d8a0000"
+        "821234f838f7941111111111111111111111111111111111111111e1a0000000000000000000000000000000000000000000"
+        "000000000000000000000180a0baee3d084325a87e534b4e75ceb31c7debd8131285aa6fdd89ed258b75f29c9da06ba14f2944"
+        "fa0f30e3d9061014df651c87be57e8f3acd9860d842d85de8ffd66")
+
+async def test_fee_oracle(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        oracle = jsonrpc_client.fee_oracle
+        assert jsonrpc_client.bulk().fee_oracle is oracle
+
+        results = await asyncio.gather(*[oracle.fees() for _ in range(10)])
+        assert node.request_counts['eth_feeHistory'] == 1
+        block = node.eth_getBlockByNumber(hex(100))
+        base_fee = next_base_fee(block)
+        priority_fee = 10 ** 9 + 10 ** 7 * 50
+        assert results == [(2 * base_fee + priority_fee, priority_fee)] * 10
+        assert oracle.block_number == 100
+
+        assert await oracle.fees(max_priority_fee_per_gas=5) == (2 * base_fee + 5, 5)
+        assert node.request_counts['eth_feeHistory'] == 1
+
+        # new blocks update the base fee without a request
+        node.mine()
+        block = node.eth_getBlockByNumber(hex(101))
+        oracle.observe_block(dict(block, gasUsed=block['gasLimit']))
+        assert oracle.block_number == 101
+        assert oracle.base_fee == 1125000000
+        assert node.request_counts['eth_feeHistory'] == 1
+        # and the history is fetched again once for the new block
+        await asyncio.gather(*[oracle.fees() for _ in range(10)])
+        await oracle.fees()
+        assert node.request_counts['eth_feeHistory'] == 2
+
+        # without new blocks, stale results are refreshed after max_age
+        oracle.max_age = 0
+        await oracle.fees()
+        assert node.request_counts['eth_feeHistory'] == 3
+    finally:
+        await jsonrpc_client.close()
+
+async def test_eip1559_send(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        token = Contract(jsonrpc_client, TRANSFER_ABI, address=node.contracts[0]).set_signer(KEY)
+        responses = await asyncio.gather(*[token.transfer("0x" + "22" * 20, i, eip1559=True) for i in range(3)])
+        assert [response.nonce for response in responses] == [0, 0, 0]
+        assert all(tx.startswith("0x02") for tx in node.sent_transactions)
+        assert node.request_counts['eth_gasPrice'] == 0
+        assert node.request_counts['eth_chainId'] == 3
+        assert node.request_counts['eth_feeHistory'] == 1
+
+        await token.transfer("0x" + "22" * 20, 1, max_fee_per_gas=10 ** 10, max_priority_fee_per_gas=10 ** 9)
+        assert node.request_counts['eth_feeHistory'] == 1
+
+        await token.transfer("0x" + "22" * 20, 1)
+        assert not node.sent_transactions[-1].startswith("0x02")
+        assert node.request_counts['eth_gasPrice'] == 1
+    finally:
+        await jsonrpc_client.close()
+
+async def test_client_blocks_update_oracles(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        oracle = jsonrpc_client.fee_oracle
+        await oracle.fees()
+        ledger = jsonrpc_client.ledger
+        node.mine()
+        block = await jsonrpc_client.eth_getBlockByNumber("latest")
+        assert oracle.block_number == ledger.block_number == 101
+        assert oracle.base_fee == next_base_fee(block)
+
+        bundle = await jsonrpc_client.bulk().fetch_block_bundle(101)
+        assert bundle.number == 101
+        node.mine()
+        await jsonrpc_client.fetch_block_bundle(102)
+        assert oracle.block_number == ledger.block_number == 102
+
+        # the priority fee is re-sampled for each new block
+        for _ in range(3):
+            await oracle.fees()
+        assert node.request_counts['eth_feeHistory'] == 2
+        node.mine()
+        await jsonrpc_client.eth_getBlockByNumber("latest")
+        await oracle.fees()
+        assert node.request_counts['eth_feeHistory'] == 3
+    finally:
+        await jsonrpc_client.close()
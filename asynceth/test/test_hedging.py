@@ -0,0 +1,47 @@
+import asyncio
+import time
+from aiohttp import web
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.hedging import Hedging, LatencyTracker
+from asynceth.test.utils import create_jsonrpc_app
+
+def test_latency_tracker():
+    tracker = LatencyTracker(90, window=10, refresh=1)
+    for i in range(1, 21):
+        tracker.record(i / 100)
+    # only the last 10 samples (0.11 - 0.20) are kept
+    assert tracker.value == 0.19
+
+def test_hedge_delay():
+    hedging = Hedging(percentile=50, min_samples=3, min_delay=0.01, max_delay=0.5)
+    assert hedging.delay("eth_call") is None
+    for latency in (0.001, 0.002, 0.003):
+        hedging.record("eth_call", latency)
+    assert hedging.delay("eth_call") == 0.01
+    for latency in (1, 2, 3, 4):
+        hedging.record("eth_call", latency)
+    assert hedging.delay("eth_call") == 0.5
+
+async def test_hedged_request(aiohttp_server):
+    slow_app = create_jsonrpc_app(eth_blockNumber=lambda: "0x1")
+
+    @web.middleware
+    async def slow(request, handler):
+        await asyncio.sleep(1)
+        return await handler(request)
+    slow_app.middlewares.append(slow)
+
+    slow_server = await aiohttp_server(slow_app)
+    fast_server = await aiohttp_server(create_jsonrpc_app(eth_blockNumber=lambda: "0x2"))
+
+    jsonrpc_client = JsonRPCClient([str(slow_server.make_url('/')), str(fast_server.make_url('/'))],
+                                   hedging=Hedging(initial_delay=0.05))
+    contexts = []
+    jsonrpc_client.middleware.on_request_end.append(contexts.append)
+    try:
+        start = time.monotonic()
+        assert await jsonrpc_client.eth_blockNumber() == 2
+        assert time.monotonic() - start < 0.5
+    finally:
+        await jsonrpc_client.close()
+    assert contexts[0].hedged
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+def imported_modules(code):
+    output = subprocess.check_output(
+        [sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sys.modules))"])
+    return set(output.decode('utf-8').split())
+
+def test_lazy_imports():
+    modules = imported_modules("import asynceth")
+    assert 'asynceth.jsonrpc.client' not in modules
+    assert 'asynceth.contract.contract' not in modules
+
+    modules = imported_modules("from asynceth import JsonRPCClient")
+    assert 'asynceth.jsonrpc.client' in modules
+    for module in ('ethereum', 'eth_abi', 'rlp', 'aiohttp', 'tornado', 'httpx'):
+        assert module not in modules
+
+    modules = imported_modules("from asynceth import Contract, TransactionResponse")
+    assert 'asynceth.contract.contract' in modules
+    assert 'ethereum' not in modules
+
+def test_no_logging_config():
+    modules = imported_modules("import logging\nfrom asynceth import JsonRPCClient\n"
+                               "assert not logging.getLogger().handlers")
+    assert 'logging' in modules
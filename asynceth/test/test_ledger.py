@@ -0,0 +1,145 @@
+import asyncio
+from asynceth import JsonRPCClient, Contract
+from asynceth.contract.transaction import prepare_transaction
+from asynceth.jsonrpc.ledger import Ledger
+from asynceth.jsonrpc.mock_node import MockNode
+from asynceth.test.utils import PrivateKey, send_transaction
+
+TRANSFER_ABI = [{
+    "type": "function", "name": "transfer", "stateMutability": "nonpayable",
+    "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}],
+    "outputs": [{"name": "", "type": "bool"}],
+}, {
+    "type": "function", "name": "batchTransfer", "stateMutability": "nonpayable",
+    "inputs": [{"name": "to", "type": "address[]"}],
+    "outputs": [],
+}]
+
+KEY = bytes.fromhex("46" * 32)
+
+def test_gas_estimate_cache():
+    ledger = Ledger(None, gas_margin=1.5, max_gas_estimates=2)
+    to = "0x" + "11" * 20
+    assert ledger.gas_estimate(to, "0xa9059cbb" + "00" * 64) is None
+    assert ledger.record_gas_estimate(to, "0xa9059cbb" + "00" * 64, 0, 40000) == 60000
+    # calls with the same shape share estimates
+    assert ledger.gas_estimate(to.upper().replace("0X", "0x"), "0xa9059cbb" + "11" * 64) == 60000
+    assert ledger.gas_estimate(to, "0xa9059cbb" + "00" * 96) is None
+    assert ledger.gas_estimate(to, "0xa9059cbb" + "00" * 64, value=1) is None
+    assert ledger.gas_estimate("0x" + "22" * 20, "0xa9059cbb" + "00" * 64) is None
+    # the largest estimate is kept
+    ledger.record_gas_estimate(to, "0xa9059cbb" + "00" * 64, 0, 30000)
+    assert ledger.gas_estimate(to, "0xa9059cbb" + "00" * 64) == 60000
+    ledger.record_gas_estimate(to, "0x12345678", 0, 21000)
+    ledger.record_gas_estimate(to, "0x87654321", 0, 21000)
+    assert ledger.gas_estimate(to, "0xa9059cbb" + "00" * 64) is None
+
+async def test_ledger_send(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        assert jsonrpc_client.bulk().ledger is jsonrpc_client.ledger
+        token = Contract(jsonrpc_client, TRANSFER_ABI, address=node.contracts[0]).set_signer(KEY, use_ledger=True)
+        node.nonces[token.signer_address] = 5
+
+        responses = await asyncio.gather(*[token.transfer("0x" + "22" * 20, i, eip1559=True) for i in range(5)])
+        assert sorted(response.nonce for response in responses) == [5, 6, 7, 8, 9]
+        counts = dict(node.request_counts)
+
+        # once warmed up only the transaction is sent
+        for i in range(5):
+            response = await token.transfer("0x" + "33" * 20, i, eip1559=True)
+            assert response.nonce == 10 + i
+        assert {method: count - counts.get(method, 0) for method, count in node.request_counts.items()
+                if count != counts.get(method, 0)} == {'eth_sendRawTransaction': 5}
+        assert len(node.sent_transactions) == 10
+
+        # the balance is debited locally
+        account = jsonrpc_client.ledger.account(token.signer_address)
+        max_fee = jsonrpc_client.fee_oracle.base_fee * 2 + jsonrpc_client.fee_oracle.priority_fee
+        data = "0x" + token.transfer.data("0x" + "22" * 20, 1).hex()
+        startgas = int(int(node.eth_estimateGas({'data': data}), 16) * 1.2)
+        assert account.balance == 10 ** 18 + 100 - 10 * startgas * max_fee
+
+        # a different calldata shape needs a new estimate
+        await token.batchTransfer(["0x" + "22" * 20] * 2, eip1559=True)
+        assert node.request_counts['eth_estimateGas'] == counts['eth_estimateGas'] + 1
+
+        # new blocks refresh the account from the node
+        node.nonces[token.signer_address] = 20
+        node.mine()
+        jsonrpc_client.ledger.observe_block(node.eth_getBlockByNumber(hex(101)))
+        response = await token.transfer("0x" + "22" * 20, 1, eip1559=True)
+        assert response.nonce == 20
+        assert account.balance == 10 ** 18 + 101 - startgas * max_fee
+
+        # not using the ledger fetches everything again
+        response = await token.transfer("0x" + "22" * 20, 1, eip1559=True, use_ledger=False)
+        assert response.nonce == 20
+    finally:
+        await jsonrpc_client.close()
+
+async def test_ledger_funds(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), should_retry=False)
+    key = PrivateKey(KEY)
+    try:
+        tx = await prepare_transaction(jsonrpc_client, KEY, key.address, "0x" + "22" * 20, b"",
+                                       value=10 ** 18 // 2, gasprice=10 ** 9, use_ledger=True)
+        assert tx.nonce == 0
+        assert node.request_counts['eth_chainId'] == 1
+        assert node.request_counts['net_version'] == 0
+        try:
+            await prepare_transaction(jsonrpc_client, KEY, key.address, "0x" + "22" * 20, b"",
+                                      value=10 ** 18 // 2, gasprice=10 ** 9, use_ledger=True)
+        except Exception as e:
+            assert str(e) == "Given account doesn't have enough funds"
+        else:
+            assert False, "expected the local balance to be exhausted"
+
+        # failing sends refresh the account
+        node.error_rate = 1.0
+        try:
+            await send_transaction(jsonrpc_client, key, "0x" + "22" * 20, 1, gasprice=10 ** 9, use_ledger=True)
+        except Exception:
+            pass
+        else:
+            assert False, "expected the send to fail"
+        node.error_rate = 0.0
+        assert jsonrpc_client.ledger.account(key.address).is_stale(None, None)
+        await send_transaction(jsonrpc_client, key, "0x" + "22" * 20, 1, gasprice=10 ** 9, use_ledger=True)
+        assert jsonrpc_client.ledger.account(key.address).nonce == 1
+    finally:
+        await jsonrpc_client.close()
+
+async def test_ledger_refresh_keeps_reserved_nonces(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    key = PrivateKey(KEY)
+    try:
+        ledger = jsonrpc_client.ledger
+        tx = await prepare_transaction(jsonrpc_client, KEY, key.address, "0x" + "22" * 20, b"",
+                                       gasprice=10 ** 9, use_ledger=True)
+        # the first transaction hasn't reached the node when the next block is seen
+        node.mine()
+        ledger.observe_block(node.eth_getBlockByNumber(hex(101)))
+        second = await prepare_transaction(jsonrpc_client, KEY, key.address, "0x" + "22" * 20, b"",
+                                           gasprice=10 ** 9, use_ledger=True)
+        assert (tx.nonce, second.nonce) == (0, 1)
+        assert ledger.account(key.address).block_number == 101
+
+        # as well as when the account expires
+        ledger.max_age = 0
+        third = await prepare_transaction(jsonrpc_client, KEY, key.address, "0x" + "22" * 20, b"",
+                                          gasprice=10 ** 9, use_ledger=True)
+        assert third.nonce == 2
+
+        # the node's nonce is used after a failed send
+        ledger.invalidate(key.address)
+        await ledger.sync(key.address)
+        assert ledger.account(key.address).nonce == 0
+    finally:
+        await jsonrpc_client.close()
@@ -0,0 +1,118 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.errors import ConcurrencyLimitExceeded, RateLimitExceeded
+from asynceth.jsonrpc.limiter import AdaptiveConcurrencyLimiter, request_kind
+from asynceth.jsonrpc.ratelimit import RateLimiter
+from asynceth.test.utils import create_jsonrpc_app
+
+async def test_limiter_backpressure():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2, max_queue=1)
+    first = await limiter.acquire()
+    second = await limiter.acquire()
+    assert limiter.in_flight == 2
+
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+    with pytest.raises(ConcurrencyLimitExceeded):
+        await limiter.acquire()
+
+    limiter.release(first)
+    third = await waiting
+    assert limiter.in_flight == 2 and limiter.queued == 0
+    limiter.release(second)
+    limiter.release(third)
+    assert limiter.in_flight == 0
+
+async def test_limiter_aimd():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, min_limit=2, max_limit=100,
+                                          backoff_ratio=0.5, latency_tolerance=1e9)
+    start = await limiter.acquire()
+    limiter.release(start, dropped=True)
+    assert limiter.limit == 5
+    for _ in range(10):
+        start = await limiter.acquire()
+        limiter.release(start, dropped=True)
+    assert limiter.limit == 2
+
+    starts = [await limiter.acquire() for _ in range(2)]
+    for start in starts:
+        limiter.release(start)
+    assert limiter._limit > 2
+
+def test_limiter_mixed_latencies():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=20)
+    latencies = {"eth_blockNumber": 0.002, "eth_call": 0.02, "eth_getLogs": 0.2, "bulk:7": 0.5}
+    # a healthy node, with each kind of request taking its usual time
+    for _ in range(50):
+        for kind, latency in latencies.items():
+            limiter._in_flight += 1
+            limiter.release(time.monotonic() - latency, kind=kind)
+    assert limiter.limit == 20
+
+    # the same requests getting slower still shrink the limit
+    for _ in range(5):
+        limiter._in_flight += 1
+        limiter.release(time.monotonic() - 0.1, kind="eth_call")
+    assert limiter.limit < 20
+
+    assert request_kind({"method": "eth_call"}) == "eth_call"
+    assert request_kind([{"method": "eth_call"}] * 100) == request_kind([{"method": "eth_call"}] * 127) == "bulk:7"
+
+async def test_client_concurrency_limit(aiohttp_server):
+    in_flight = []
+    max_in_flight = []
+
+    app = create_jsonrpc_app(eth_blockNumber=lambda: "0x1")
+
+    @web.middleware
+    async def track(request, handler):
+        in_flight.append(1)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        try:
+            return await handler(request)
+        finally:
+            in_flight.pop()
+    app.middlewares.append(track)
+
+    server = await aiohttp_server(app)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), concurrency_limiter=limiter)
+    try:
+        results = await asyncio.gather(*[jsonrpc_client.eth_blockNumber() for _ in range(20)])
+    finally:
+        await jsonrpc_client.close()
+    assert results == [1] * 20
+    assert max(max_in_flight) <= 3
+    assert limiter.in_flight == 0
+
+def test_rate_limiter_weights():
+    rate_limiter = RateLimiter(10, method_weights={'eth_getLogs': 5, 'trace_*': 20, 'trace_get': 2})
+    assert rate_limiter.weight({'method': 'eth_blockNumber'}) == 1
+    assert rate_limiter.weight({'method': 'eth_getLogs'}) == 5
+    assert rate_limiter.weight({'method': 'trace_block'}) == 20
+    assert rate_limiter.weight({'method': 'trace_get'}) == 2
+    assert rate_limiter.weight([{'method': 'eth_getLogs'}, {'method': 'eth_call'}]) == 6
+
+async def test_rate_limiter_max_delay():
+    rate_limiter = RateLimiter(10, burst=10, max_delay=0.5)
+    await rate_limiter.acquire([{'method': 'eth_call'}] * 10)
+    with pytest.raises(RateLimitExceeded):
+        await rate_limiter.acquire([{'method': 'eth_call'}] * 10)
+    # the failed request should not have used any tokens
+    assert rate_limiter.bucket.tokens > -1
+
+async def test_client_rate_limit(aiohttp_server):
+    server = await aiohttp_server(create_jsonrpc_app(eth_blockNumber=lambda: "0x1"))
+    url = str(server.make_url('/'))
+    jsonrpc_client = JsonRPCClient(url, rate_limiter={url: RateLimiter(100, burst=1)})
+    try:
+        start = time.monotonic()
+        await asyncio.gather(*[jsonrpc_client.eth_blockNumber() for _ in range(6)])
+        assert time.monotonic() - start >= 0.05
+    finally:
+        await jsonrpc_client.close()
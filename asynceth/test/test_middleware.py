@@ -1,5 +1,7 @@
+import pytest
 from asynceth import JsonRPCClient
-from asynceth.test.utils import PrivateKey, send_transaction
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.test.utils import PrivateKey, send_transaction, create_jsonrpc_app
 
 class RequestCounter:
     def __init__(self):
@@ -46,3 +48,88 @@ async def test_middleware(parity):
     assert counter.reqs['eth_gasPrice'] == 1
     assert counter.reqs['eth_estimateGas'] == 1
     assert counter.reqs['net_version'] == 1
+
+class FakeSpan:
+    def __init__(self, name, attributes, start_time):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.start_time = start_time
+        self.end_time = None
+        self.events = []
+        self.exceptions = []
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, attributes=None):
+        self.events.append((name, attributes))
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def set_status(self, status):
+        pass
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, attributes=None, start_time=None):
+        span = FakeSpan(name, attributes, start_time)
+        self.spans.append(span)
+        return span
+
+async def test_request_hooks(aiohttp_server):
+    attempts = []
+
+    def eth_blockNumber():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise JsonRPCError(None, -32000, "Unknown block number", None)
+        return "0x10"
+
+    server = await aiohttp_server(create_jsonrpc_app(eth_blockNumber=eth_blockNumber))
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    tracer = FakeTracer()
+    jsonrpc_client.middleware.add_tracer(tracer)
+    contexts = []
+    jsonrpc_client.middleware.on_request_end.append(contexts.append)
+
+    try:
+        assert await jsonrpc_client.eth_blockNumber() == 16
+        bulk = jsonrpc_client.bulk()
+        bulk.eth_blockNumber()
+        unknown = bulk._fetch("eth_unknownMethod")
+        await bulk.execute()
+        with pytest.raises(JsonRPCError):
+            await unknown
+    finally:
+        await jsonrpc_client.close()
+
+    assert len(contexts) == 2
+    assert contexts[0].method == "eth_blockNumber"
+    assert contexts[0].attempts == 2
+    assert contexts[0].end_time >= contexts[0].start_time
+    assert contexts[0].response['result'] == "0x10"
+    assert contexts[1].method == "bulk"
+
+    assert [span.name for span in tracer.spans] == ["jsonrpc eth_blockNumber", "jsonrpc bulk"]
+    assert tracer.spans[0].events[0][0] == "retry"
+    assert tracer.spans[0].attributes["rpc.jsonrpc.attempts"] == 2
+    assert tracer.spans[1].attributes["rpc.jsonrpc.batch_size"] == 2
+    assert all(span.end_time is not None for span in tracer.spans)
+
+async def test_request_hooks_exception(aiohttp_server):
+    server = await aiohttp_server(create_jsonrpc_app())
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    contexts = []
+    jsonrpc_client.middleware.on_request_end.append(contexts.append)
+    try:
+        with pytest.raises(JsonRPCError):
+            await jsonrpc_client.eth_blockNumber()
+    finally:
+        await jsonrpc_client.close()
+    assert isinstance(contexts[0].exception, JsonRPCError)
@@ -0,0 +1,125 @@
+import asyncio
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.errors import HTTPError
+from asynceth.jsonrpc.mock_node import MockNode
+from asynceth.jsonrpc.retry import RetryPolicy
+
+async def test_mock_node_chain_data(aiohttp_server):
+    node = MockNode(block_number=20, txs_per_block=3, logs_per_tx=2)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        assert await jsonrpc_client.eth_blockNumber() == 20
+
+        bundle = await jsonrpc_client.fetch_block_bundle(10)
+        assert bundle.number == 10
+        assert len(bundle.transactions) == 3
+        assert len(bundle.logs) == 6
+        assert bundle.is_consistent()
+
+        # the same block is always generated the same way
+        other = MockNode(block_number=20, txs_per_block=3, logs_per_tx=2)
+        assert other.eth_getBlockByNumber(hex(10)) == bundle.block
+
+        by_hash = await jsonrpc_client.eth_getBlockByHash(bundle.hash)
+        assert by_hash['number'] == hex(10)
+        tx_hash = bundle.transactions[1]['hash']
+        receipt = await jsonrpc_client.eth_getTransactionReceipt(tx_hash)
+        assert receipt == bundle.receipts[1]
+
+        assert await jsonrpc_client.eth_getBlockByNumber(21) is None
+        node.mine()
+        assert (await jsonrpc_client.eth_getBlockByNumber(21))['number'] == hex(21)
+
+        logs = await jsonrpc_client.eth_getLogs(fromBlock=1, toBlock=5, address=node.contracts[0])
+        assert len(logs) > 0
+        assert all(log['address'] == node.contracts[0] for log in logs)
+        assert all(1 <= int(log['blockNumber'], 16) <= 5 for log in logs)
+
+        bulk = jsonrpc_client.bulk()
+        f1 = bulk.eth_getBalance(node.contracts[0])
+        f2 = bulk.eth_getCode(node.contracts[0])
+        f3 = bulk.trace_block(5)
+        await bulk.execute()
+        assert await f1 > 0
+        assert await f2 != "0x"
+        assert len(await f3) == 3
+        assert node.request_counts['trace_block'] == 1
+    finally:
+        await jsonrpc_client.close()
+
+async def test_mock_node_error_injection(aiohttp_server):
+    node = MockNode(block_number=10, http_error_rate=0.5, error_rate=0.2, seed=1)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')),
+                                   retry_policy=RetryPolicy(base_delay=0.001, max_delay=0.001))
+    try:
+        results = await asyncio.gather(*[jsonrpc_client.eth_getBalance(node.contracts[0], block=5)
+                                         for _ in range(20)])
+        assert results == [10 ** 18 + 5] * 20
+        assert node.http_request_count > 20
+    finally:
+        await jsonrpc_client.close()
+
+    node = MockNode(http_error_rate=1.0, http_error_status=500)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), should_retry=False)
+    try:
+        try:
+            await jsonrpc_client.eth_blockNumber()
+            assert False, "expected HTTPError"
+        except HTTPError as e:
+            assert e.status == 500
+    finally:
+        await jsonrpc_client.close()
+
+async def test_mock_node_start_stop():
+    async with MockNode(block_number=5, latency=0.001, block_time=0.01) as node:
+        jsonrpc_client = JsonRPCClient(node.url)
+        try:
+            assert await jsonrpc_client.eth_blockNumber() >= 5
+            await asyncio.sleep(0.05)
+            assert await jsonrpc_client.eth_blockNumber() > 5
+        finally:
+            await jsonrpc_client.close()
+
+def test_mock_node_params():
+    node = MockNode(block_number=10)
+
+    def error(method, params):
+        response = node.handle_request({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        return response.get('error', {}).get('message')
+
+    assert error("eth_getBalance", ["0x" + "00" * 20, "0x5"]) is None
+    assert error("eth_getBalance", ["0x" + "00" * 20, "latest", "extra"]) == "Invalid params"
+    assert error("eth_getBalance", ["0x" + "00" * 20, "five"]) == "Invalid params"
+    assert error("eth_getCode", [5]) == "Invalid params"
+    assert error("eth_call", ["0x1234"]) == "Invalid params"
+    assert error("eth_feeHistory", ["ten", "latest"]) == "Invalid params"
+    assert error("eth_blockNumber", {}) == "Invalid params"
+
+    # errors in the handlers themselves aren't hidden
+    node.methods["eth_broken"] = lambda: int("broken")
+    try:
+        node.handle_request({"jsonrpc": "2.0", "id": 1, "method": "eth_broken", "params": []})
+    except ValueError:
+        pass
+    else:
+        assert False, "expected the handler's error"
+
+def test_mock_node_bounded_hashes():
+    node = MockNode(block_number=100, txs_per_block=2, max_cached_blocks=4, max_known_blocks=8)
+    for number in range(100):
+        node.eth_getBlockByNumber(hex(number))
+    assert len(node._blocks) == 4
+    assert len(node._block_hashes) == 8
+    assert len(node._tx_hashes) == 16
+    # recent hashes can still be looked up, even when their block data was evicted
+    block = node.eth_getBlockByNumber(hex(93))
+    assert node.eth_getBlockByHash(block['hash'])['number'] == hex(93)
+    assert node.eth_getTransactionReceipt(block['transactions'][1]['hash'])['blockNumber'] == hex(93)
+    assert node.eth_getBlockByHash(node.eth_getBlockByNumber(hex(0))['hash']) is not None
+    # old hashes are forgotten
+    for number in range(50, 60):
+        node.eth_getBlockByNumber(hex(number))
+    assert node.eth_getBlockByHash(block['hash']) is None
@@ -0,0 +1,74 @@
+import time
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.jsonrpc.replay_client import RecordingHTTPClient, ReplayHTTPClient
+from asynceth.test.utils import create_jsonrpc_app
+import pytest
+
+async def test_record_and_replay(aiohttp_server, tmpdir):
+    block_numbers = iter(range(1, 100))
+    server = await aiohttp_server(create_jsonrpc_app(
+        eth_blockNumber=lambda: hex(next(block_numbers)),
+        eth_getBalance=lambda address, block: "0x64",
+    ))
+    url = str(server.make_url('/'))
+    recording = str(tmpdir.join("session.jsonl.gz"))
+
+    jsonrpc_client = JsonRPCClient(url, client_cls=RecordingHTTPClient, recording=recording)
+    try:
+        assert await jsonrpc_client.eth_blockNumber() == 1
+        assert await jsonrpc_client.eth_blockNumber() == 2
+        bulk = jsonrpc_client.bulk()
+        balance = bulk.eth_getBalance("0x" + "00" * 20)
+        block_number = bulk.eth_blockNumber()
+        await bulk.execute()
+        assert await balance == 100
+        assert await block_number == 3
+    finally:
+        await jsonrpc_client.close()
+    await server.close()
+
+    jsonrpc_client = JsonRPCClient(url, client_cls=ReplayHTTPClient, recording=recording, latency=0.05)
+    try:
+        start = time.monotonic()
+        assert await jsonrpc_client.eth_blockNumber() == 1
+        assert time.monotonic() - start >= 0.05
+        assert await jsonrpc_client.eth_blockNumber() == 2
+        # the last recorded response is repeated
+        assert await jsonrpc_client.eth_blockNumber() == 2
+        bulk = jsonrpc_client.bulk()
+        balance = bulk.eth_getBalance("0x" + "00" * 20)
+        block_number = bulk.eth_blockNumber()
+        await bulk.execute()
+        assert await balance == 100
+        assert await block_number == 3
+        with pytest.raises(JsonRPCError):
+            await jsonrpc_client.eth_gasPrice()
+    finally:
+        await jsonrpc_client.close()
+
+async def test_shared_recording(aiohttp_server, tmpdir):
+    server = await aiohttp_server(create_jsonrpc_app(eth_blockNumber=lambda: "0x1"))
+    url = str(server.make_url('/'))
+    recording = str(tmpdir.join("session.jsonl"))
+
+    # separate http clients, so closing one doesn't close the other's session
+    first = JsonRPCClient(url, client_cls=RecordingHTTPClient, recording=recording, flush_every=2,
+                          force_instance=True)
+    second = JsonRPCClient(url, client_cls=RecordingHTTPClient, recording=recording, flush_every=2,
+                           force_instance=True)
+    try:
+        assert await first.eth_blockNumber() == 1
+    finally:
+        # closing one recorder leaves the file open for the others
+        await first.close()
+    try:
+        for _ in range(2):
+            assert await second.eth_blockNumber() == 1
+        # entries are written in batches
+        with open(recording) as f:
+            assert len(f.read().splitlines()) == 3
+    finally:
+        await second.close()
+    with open(recording) as f:
+        assert len(f.read().splitlines()) == 4
@@ -0,0 +1,132 @@
+import time
+import pytest
+from aiohttp import web
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.errors import HTTPError, CircuitOpenError
+from asynceth.jsonrpc.retry import RetryPolicy, RetryBudget, CircuitBreaker
+from asynceth.test.utils import create_jsonrpc_app
+
+def create_failing_app(status=503):
+    requests = []
+
+    async def handler(request):
+        requests.append(await request.json())
+        return web.Response(status=status)
+
+    app = web.Application()
+    app.router.add_post('/', handler)
+    return app, requests
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.1, max_delay=0.5)
+    assert policy.should_retry(1)
+    assert policy.should_retry(2)
+    assert not policy.should_retry(3)
+    for retries in range(10):
+        assert 0 <= policy.delay(retries) <= min(0.5, 0.1 * 2 ** retries)
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0)
+    assert not budget.try_withdraw()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    # recovery_timeout of 0 means the breaker is immediately half open
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+async def test_max_attempts(aiohttp_server):
+    app, requests = create_failing_app()
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')),
+                                   retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01))
+    try:
+        with pytest.raises(HTTPError):
+            await jsonrpc_client.eth_blockNumber()
+    finally:
+        await jsonrpc_client.close()
+    assert len(requests) == 3
+
+async def test_unreachable_node():
+    # nothing listens on port 1, so every attempt fails to connect
+    jsonrpc_client = JsonRPCClient("http://127.0.0.1:1/", request_timeout=0.5)
+    start = time.time()
+    try:
+        with pytest.raises(HTTPError):
+            await jsonrpc_client.eth_blockNumber()
+        bulk = jsonrpc_client.bulk()
+        bulk.eth_blockNumber()
+        with pytest.raises(HTTPError):
+            await bulk.execute()
+    finally:
+        await jsonrpc_client.close()
+    # both requests give up after the request timeout plus at most one backoff
+    assert time.time() - start < 4
+
+async def test_circuit_breaker_fails_fast(aiohttp_server):
+    app, requests = create_failing_app()
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')),
+                                   retry_policy=RetryPolicy(base_delay=0.01),
+                                   circuit_breaker=lambda: CircuitBreaker(failure_threshold=2, recovery_timeout=60))
+    try:
+        with pytest.raises(CircuitOpenError):
+            await jsonrpc_client.eth_blockNumber()
+        assert len(requests) == 2
+        bulk = jsonrpc_client.bulk()
+        bulk.eth_blockNumber()
+        with pytest.raises(CircuitOpenError):
+            await bulk.execute()
+        assert len(requests) == 2
+    finally:
+        await jsonrpc_client.close()
+
+async def test_failover(aiohttp_server):
+    failing_app, failing_requests = create_failing_app(status=502)
+    failing_server = await aiohttp_server(failing_app)
+    server = await aiohttp_server(create_jsonrpc_app(eth_blockNumber=lambda: "0x2"))
+    jsonrpc_client = JsonRPCClient([str(failing_server.make_url('/')), str(server.make_url('/'))],
+                                   retry_policy=RetryPolicy(base_delay=0.01),
+                                   circuit_breaker=lambda: CircuitBreaker(failure_threshold=1, recovery_timeout=60))
+    try:
+        assert await jsonrpc_client.eth_blockNumber() == 2
+        assert await jsonrpc_client.eth_blockNumber() == 2
+    finally:
+        await jsonrpc_client.close()
+    # the second request skips the failed endpoint
+    assert len(failing_requests) == 1
+
+async def test_malformed_responses_are_not_retried(aiohttp_server):
+    requests = []
+
+    async def handler(request):
+        requests.append(await request.json())
+        return web.Response(body=b"{not json", content_type="application/json")
+
+    app = web.Application()
+    app.router.add_post('/', handler)
+    server = await aiohttp_server(app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')),
+                                   retry_policy=RetryPolicy(base_delay=0.001, max_delay=0.001))
+    try:
+        with pytest.raises(ValueError):
+            await jsonrpc_client.eth_blockNumber()
+        assert len(requests) == 1
+        bulk = jsonrpc_client.bulk()
+        bulk.eth_blockNumber()
+        with pytest.raises(ValueError):
+            await bulk.execute()
+        assert len(requests) == 2
+    finally:
+        await jsonrpc_client.close()
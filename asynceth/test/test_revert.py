@@ -0,0 +1,97 @@
+from eth_abi import encode_abi
+from asynceth import JsonRPCClient, Contract
+from asynceth.contract.contract import ContractTranslator
+from asynceth.contract.simulation import simulate
+from asynceth.jsonrpc.errors import JsonRPCError
+from asynceth.jsonrpc.mock_node import MockNode
+from asynceth.jsonrpc.revert import RevertReason
+
+ABI = [{
+    "type": "function", "name": "quote", "stateMutability": "view",
+    "inputs": [{"name": "amount", "type": "uint256"}],
+    "outputs": [{"name": "", "type": "uint256"}],
+}, {
+    "type": "function", "name": "swap", "stateMutability": "nonpayable",
+    "inputs": [{"name": "amount", "type": "uint256"}],
+    "outputs": [],
+}, {
+    "type": "error", "name": "InsufficientOutput",
+    "inputs": [{"name": "expected", "type": "uint256"}, {"name": "actual", "type": "uint256"}],
+}]
+
+KEY = bytes.fromhex("46" * 32)
+
+INSUFFICIENT_OUTPUT = "0x" + (bytes.fromhex("2c19b8b8") + encode_abi(['uint256', 'uint256'], [10, 7])).hex()
+# Error("paused")
+ERROR_DATA = ("0x08c379a0" + "00" * 31 + "20" + "00" * 31 + "06" + b"paused".hex() + "00" * 26)
+
+def selector(contract, name):
+    return "0x" + contract.translator.function_data[name]['prefix'].to_bytes(4, 'big').hex()
+
+def test_decode_error():
+    translator = ContractTranslator(ABI)
+    assert list(translator.error_data) == [bytes.fromhex("2c19b8b8")]
+    reason = translator.decode_error(INSUFFICIENT_OUTPUT)
+    assert reason == RevertReason("InsufficientOutput", (10, 7), bytes.fromhex(INSUFFICIENT_OUTPUT[2:]))
+    assert str(reason) == "InsufficientOutput(10, 7)"
+    assert translator.decode_error(ERROR_DATA).args == ("paused",)
+    # invalid custom error data
+    assert translator.decode_error(INSUFFICIENT_OUTPUT[:-64]).name is None
+
+def test_error_reason():
+    assert JsonRPCError(1, 3, "execution reverted", ERROR_DATA).reason.args == ("paused",)
+    assert JsonRPCError(1, 3, "execution reverted", {"data": ERROR_DATA}).reason.args == ("paused",)
+    assert JsonRPCError(1, -32000, "execution reverted", None).reason == RevertReason(None, (), b'')
+    assert JsonRPCError(1, -32000, "Unknown block number", None).reason is None
+
+async def test_contract_errors(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        pool = Contract(jsonrpc_client, ABI, address=node.contracts[0]).set_signer(KEY)
+        node.reverts[selector(pool, 'quote')] = INSUFFICIENT_OUTPUT
+        node.reverts[selector(pool, 'swap')] = ERROR_DATA
+
+        # the client decodes the standard errors
+        try:
+            await jsonrpc_client.eth_call(to_address=pool.address, data=pool.quote.data(1))
+        except JsonRPCError as e:
+            assert e.reason == RevertReason(None, (), bytes.fromhex(INSUFFICIENT_OUTPUT[2:]))
+        else:
+            assert False, "expected the call to revert"
+
+        # contracts decode their custom errors
+        try:
+            await pool.quote(1)
+        except JsonRPCError as e:
+            assert e.reason.name == "InsufficientOutput"
+            assert e.reason.args == (10, 7)
+        else:
+            assert False, "expected the call to revert"
+
+        bulk = jsonrpc_client.bulk()
+        future = pool.quote(1, bulk=bulk)
+        await bulk.execute()
+        try:
+            await future
+        except JsonRPCError as e:
+            assert e.reason.args == (10, 7)
+        else:
+            assert False, "expected the call to revert"
+
+        for call in (pool.swap.estimate_gas(1), pool.swap(1, gasprice=10 ** 9)):
+            try:
+                await call
+            except JsonRPCError as e:
+                assert e.reason.name == "Error"
+                assert str(e.reason) == "paused"
+            else:
+                assert False, "expected the call to revert"
+
+        simulation, = await simulate(jsonrpc_client, [pool.quote.candidate(1)])
+        assert simulation.reason.name == "InsufficientOutput"
+        # no follow up requests were needed to decode the errors
+        assert node.request_counts['eth_call'] == 4
+    finally:
+        await jsonrpc_client.close()
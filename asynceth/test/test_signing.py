@@ -0,0 +1,68 @@
+import os
+from asynceth import crypto
+from asynceth.contract.contract import ContractTranslator, method_id, event_id
+from asynceth.contract.transaction import Transaction, rlp_encode, contract_address
+
+# from the EIP-155 specification
+EIP155_KEY = bytes.fromhex("46" * 32)
+EIP155_SIGNED = (
+    "f86c098504a817c800825208943535353535353535353535353535353535353535880de0b6b3a76400008025a028ef61340bd"
+    "939bc2195fe537567866003e1a15d3c71ff63e1590620aa636276a067cbe9d8997f761aecb703304b3800ccf555c9f3dc6421"
+    "4b297fb1966a3b6d83")
+
+def test_keccak256():
+    assert crypto.keccak256(b"").hex() == "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+    assert crypto.keccak256("transfer(address,uint256)")[:4].hex() == "a9059cbb"
+
+def test_rlp_encode():
+    assert rlp_encode(b"dog") == b"\x83dog"
+    assert rlp_encode([b"cat", b"dog"]) == b"\xc8\x83cat\x83dog"
+    assert rlp_encode(b"") == b"\x80"
+    assert rlp_encode([]) == b"\xc0"
+    assert rlp_encode(0) == b"\x80"
+    assert rlp_encode(15) == b"\x0f"
+    assert rlp_encode(1024) == b"\x82\x04\x00"
+    assert rlp_encode([[], [[]], [[], [[]]]]) == bytes.fromhex("c7c0c1c0c3c0c1c0")
+    long_string = b"Lorem ipsum dolor sit amet, consectetur adipisicing elit"
+    assert rlp_encode(long_string) == b"\xb8\x38" + long_string
+
+def test_eip155_transaction():
+    tx = Transaction(9, 20 * 10 ** 9, 21000, "0x" + "35" * 20, 10 ** 18, b"")
+    assert tx.signing_hash(1).hex() == "daf5a779ae972f972197303d7b574746c7ef83eadac0f2791ad23db92e4c8e53"
+    signed = tx.sign(EIP155_KEY, network_id=1)
+    assert signed.encode().hex() == EIP155_SIGNED
+    assert signed.sender.hex() == "9d8a62f656a8d1615c1294fd71e9cfb3e4855a4f"
+    assert signed.creates is None
+
+def test_python_signing_matches_coincurve():
+    for _ in range(10):
+        key = os.urandom(32)
+        msghash = os.urandom(32)
+        expected = crypto._python_ecsign(msghash, key)
+        assert expected[0] in (27, 28)
+        assert crypto._python_public_key(key) == crypto.private_key_to_public_key(key)
+        if crypto.coincurve is not None:
+            assert crypto._coincurve_ecsign(msghash, key) == expected
+
+def test_contract_address():
+    sender = "0x6ac7ea33f8831ea9dcc53393aaa88b25a785dbf0"
+    assert contract_address(sender, 0).hex() == "cd234a471b72ba2f1ccf0a70fcaba648a5eecd8d"
+    assert contract_address(sender, 1).hex() == "343c43a37d37dff08ae8c4a11544c718abb4fcf8"
+
+def test_translator_ids():
+    assert method_id("transfer", ["address", "uint"]) == 0xa9059cbb
+    transfer_topic = 0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef
+    assert event_id("Transfer", ["address", "address", "uint256"]) == transfer_topic
+
+    translator = ContractTranslator([
+        {"type": "constructor", "inputs": [{"name": "supply", "type": "uint256"}]},
+        {"type": "event", "name": "Transfer", "anonymous": False, "inputs": [
+            {"name": "from", "type": "address", "indexed": True},
+            {"name": "to", "type": "address", "indexed": True},
+            {"name": "value", "type": "uint256", "indexed": False}]},
+    ])
+    assert translator.encode_constructor_arguments([5]) == (5).to_bytes(32, 'big')
+    event = translator.decode_event(
+        ["0x{:064x}".format(transfer_topic), "0x" + "00" * 12 + "11" * 20, "0x" + "00" * 12 + "22" * 20],
+        "0x{:064x}".format(100))
+    assert event == {"from": "0x" + "11" * 20, "to": "0x" + "22" * 20, "value": 100, "_event_type": "Transfer"}
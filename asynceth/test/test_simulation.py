@@ -0,0 +1,91 @@
+from asynceth import JsonRPCClient, Contract
+from asynceth.contract.simulation import Call, simulate
+from asynceth.jsonrpc.mock_node import MockNode
+from asynceth.jsonrpc.revert import RevertReason, decode_revert_reason
+
+ABI = [{
+    "type": "function", "name": "swap", "stateMutability": "nonpayable",
+    "inputs": [{"name": "to", "type": "address"}, {"name": "amount", "type": "uint256"}],
+    "outputs": [{"name": "amountOut", "type": "uint256"}],
+}, {
+    "type": "function", "name": "withdraw", "stateMutability": "nonpayable",
+    "inputs": [{"name": "value", "type": "uint256"}],
+    "outputs": [],
+}, {
+    "type": "function", "name": "divide", "stateMutability": "nonpayable",
+    "inputs": [{"name": "value", "type": "uint256"}],
+    "outputs": [],
+}]
+
+# Error("insufficient balance")
+ERROR_DATA = ("0x08c379a0"
+              "0000000000000000000000000000000000000000000000000000000000000020"
+              "0000000000000000000000000000000000000000000000000000000000000014"
+              "696e73756666696369656e742062616c616e6365000000000000000000000000")
+# Panic(0x12)
+PANIC_DATA = "0x4e487b71" + "00" * 31 + "12"
+
+def test_decode_revert_reason():
+    reason = decode_revert_reason(ERROR_DATA)
+    assert reason.name == "Error"
+    assert reason.args == ("insufficient balance",)
+    assert str(reason) == "insufficient balance"
+
+    reason = decode_revert_reason(PANIC_DATA)
+    assert reason.name == "Panic"
+    assert reason.args == (0x12,)
+    assert str(reason) == "Panic(0x12): division or modulo by zero"
+
+    reason = decode_revert_reason("0xdeadbeef")
+    assert reason == RevertReason(None, (), bytes.fromhex("deadbeef"))
+    assert str(reason) == "unknown revert data 0xdeadbeef"
+    # truncated data
+    assert decode_revert_reason(ERROR_DATA[:-64]).name is None
+
+async def test_simulate(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        token = Contract(jsonrpc_client, ABI, address=node.contracts[0]).set_signer(b"\x46" * 32)
+        node.reverts["0x" + token.translator.function_data['withdraw']['prefix'].to_bytes(4, 'big').hex()] = ERROR_DATA
+        node.reverts["0x" + token.translator.function_data['divide']['prefix'].to_bytes(4, 'big').hex()] = PANIC_DATA
+
+        calls = [token.swap.candidate("0x" + "22" * 20, i) for i in range(200)]
+        calls.append(token.withdraw.candidate(1))
+        calls.append(token.divide.candidate(0))
+        calls.append(Call(node.contracts[1], "0x12345678"))
+        simulations = await simulate(jsonrpc_client, calls)
+        assert node.http_request_count == 1
+        assert node.request_counts['eth_estimateGas'] == 203
+        assert node.request_counts['eth_call'] == 203
+        assert node.request_counts['eth_createAccessList'] == 203
+
+        swap = simulations[0]
+        assert not swap.reverted
+        assert swap.error is None
+        assert swap.gas == 21000 + 16 * 68
+        assert swap.result == 100
+        assert swap.access_list == [{"address": node.contracts[0], "storageKeys": ["0x{:064x}".format(100)]}]
+        assert swap.access_list_gas == swap.gas + 4300
+
+        withdraw = simulations[200]
+        assert withdraw.reverted
+        assert withdraw.reason.name == "Error"
+        assert withdraw.reason.args == ("insufficient balance",)
+        assert withdraw.gas is None and withdraw.access_list is None
+        assert withdraw.error.code == 3
+
+        assert str(simulations[201].reason) == "Panic(0x12): division or modulo by zero"
+
+        # raw calls aren't decoded
+        assert simulations[202].result == "0x{:064x}".format(100)
+
+        # only gas estimates
+        simulations = await simulate(jsonrpc_client, calls[:10], call=False, access_lists=False)
+        assert node.request_counts['eth_estimateGas'] == 213
+        assert node.request_counts['eth_call'] == 203
+        assert [simulation.gas for simulation in simulations] == [21000 + 16 * 68] * 10
+        assert simulations[0].result is None
+    finally:
+        await jsonrpc_client.close()
@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from asynceth import JsonRPCClient, Contract
+from asynceth.test.utils import create_jsonrpc_app
+
+BALANCE_OF_ABI = [{
+    "type": "function", "name": "balanceOf", "stateMutability": "view",
+    "inputs": [{"name": "owner", "type": "address"}],
+    "outputs": [{"name": "", "type": "uint256"}],
+}]
+
+TOKEN_ADDRESS = "0x" + "11" * 20
+OWNER_ADDRESS = "0x" + "22" * 20
+
+async def test_block_snapshot(aiohttp_server):
+    calls = []
+
+    def eth_call(callobj, block):
+        calls.append((callobj, block))
+        return "0x{:064x}".format(int(block, 16) * 100)
+
+    def eth_getBalance(address, block):
+        calls.append((address, block))
+        return "0x1"
+
+    server = await aiohttp_server(create_jsonrpc_app(eth_call=eth_call, eth_getBalance=eth_getBalance))
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    token = Contract(jsonrpc_client, BALANCE_OF_ABI, address=TOKEN_ADDRESS)
+    try:
+        with jsonrpc_client.at_block(5) as snapshot:
+            results = await asyncio.gather(*[token.balanceOf(OWNER_ADDRESS, block=snapshot) for _ in range(5)])
+            assert results == [500] * 5
+            assert await token.balanceOf(OWNER_ADDRESS, block=snapshot) == 500
+            assert await snapshot.eth_getBalance(OWNER_ADDRESS) == 1
+            assert await snapshot.eth_getBalance(OWNER_ADDRESS) == 1
+            with pytest.raises(ValueError):
+                await snapshot.eth_getBalance(OWNER_ADDRESS, block=6)
+        assert len(calls) == 2
+        assert calls[0][1] == "0x5"
+
+        assert await token.balanceOf(OWNER_ADDRESS, block=7) == 700
+        assert calls[2][1] == "0x7"
+    finally:
+        await jsonrpc_client.close()
@@ -0,0 +1,58 @@
+import asyncio
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.concurrency import map_concurrently
+from asynceth.test.utils import create_jsonrpc_app
+
+async def test_map_concurrently():
+    in_flight = []
+    max_in_flight = []
+
+    async def work(i):
+        in_flight.append(i)
+        max_in_flight.append(len(in_flight))
+        # later items finish first
+        await asyncio.sleep(0.01 * (5 - i % 5))
+        in_flight.remove(i)
+        return i * 2
+
+    results = [r async for r in map_concurrently(work, range(10), concurrency=3)]
+    assert results == [(i, i * 2) for i in range(10)]
+    assert max(max_in_flight) == 3
+
+    results = [r async for r in map_concurrently(work, range(10), concurrency=3, ordered=False)]
+    assert sorted(results) == [(i, i * 2) for i in range(10)]
+    assert results != sorted(results)
+
+async def test_map_concurrently_cancel():
+    cancelled = []
+
+    async def work(i):
+        try:
+            await asyncio.sleep(i)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        return i
+
+    gen = map_concurrently(work, range(4), concurrency=4)
+    async for item, result in gen:
+        break
+    await gen.aclose()
+    await asyncio.sleep(0)
+    assert cancelled == [1, 2, 3]
+
+async def test_trace_blocks(aiohttp_server):
+    server = await aiohttp_server(create_jsonrpc_app(
+        trace_block=lambda block: [{"blockNumber": int(block, 16)}],
+        trace_replayBlockTransactions=lambda block, trace_type: [{"trace": trace_type}],
+    ))
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        results = [r async for r in jsonrpc_client.trace_blocks(5, 9, concurrency=2)]
+        assert results == [(i, [{"blockNumber": i}]) for i in range(5, 10)]
+
+        results = [r async for r in jsonrpc_client.trace_blocks(
+            1, 2, method="trace_replayBlockTransactions", stateDiff=True)]
+        assert results == [(1, [{"trace": ["trace", "stateDiff"]}]), (2, [{"trace": ["trace", "stateDiff"]}])]
+    finally:
+        await jsonrpc_client.close()
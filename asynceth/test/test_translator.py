@@ -0,0 +1,36 @@
+import pytest
+from eth_abi import encode_abi
+from asynceth import Contract
+from asynceth.contract.contract import ContractTranslator, split_tuple_type
+
+def test_argument_validator():
+    assert split_tuple_type("(address,(uint256,bytes)[],uint8[2])") == ["address", "(uint256,bytes)[]", "uint8[2]"]
+    assert split_tuple_type("()") == []
+
+    abi = [{"type": "function", "name": "route", "stateMutability": "nonpayable", "outputs": [], "inputs": [
+        {"name": "path", "type": "address[]"},
+        {"name": "orders", "type": "tuple[]", "components": [
+            {"name": "maker", "type": "address"}, {"name": "amounts", "type": "uint256[2]"},
+            {"name": "data", "type": "bytes"}]},
+        {"name": "data", "type": "bytes"}]}]
+    contract = Contract(None, abi, address="0x" + "33" * 20)
+    translator = contract.translator
+    validator = translator.argument_validator("route")
+    assert translator.argument_validator("route") is validator
+    a, b = bytes.fromhex("11" * 20), bytes.fromhex("22" * 20)
+    assert validator((["0x" + "11" * 20, b], [("0x" + "22" * 20, ["0x10", 2], b"\x01")], b"")) == \
+        [[a, b], [(b, [16, 2], b"\x01")], b""]
+    args = ([a, b], [(b, [16, 2], b"\x01")], b"")
+    expected = bytes.fromhex("64dafd7d") + encode_abi(
+        ["address[]", "(address,uint256[2],bytes)[]", "bytes"], args)
+    assert translator.encode_function_call("route", args) == expected
+    assert contract.route.data(["0x" + "11" * 20, b], [("0x" + "22" * 20, ["0x10", 2], b"\x01")], b"") == expected
+    # already converted arguments can skip validation
+    assert contract.route.data(*args, validate=False) == expected
+
+def test_unknown_function():
+    translator = ContractTranslator([])
+    with pytest.raises(ValueError, match="Unkown function"):
+        translator.argument_validator("transfer")
+    with pytest.raises(ValueError, match="Unkown function"):
+        translator.encode_function_call("transfer", [])
@@ -0,0 +1,62 @@
+import pytest
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.aiohttp_client import HTTPClient
+from asynceth.jsonrpc.errors import HTTPError
+from asynceth.jsonrpc.mock_node import MockNode
+from asynceth.jsonrpc.transport import TransportProfile, select_http_client
+
+REQUEST = {"jsonrpc": "2.0", "id": 1, "method": "eth_getBlockByNumber", "params": ["0x5", True]}
+
+async def test_transport_compression(aiohttp_server):
+    node = MockNode(block_number=10, txs_per_block=20, compression=True)
+    server = await aiohttp_server(node.app)
+    url = str(server.make_url('/'))
+
+    client = HTTPClient(transport=TransportProfile(keepalive_timeout=60, limit_per_host=10))
+    try:
+        resp = await client.fetch(url, method="POST", body=REQUEST)
+        assert resp.headers['Content-Encoding'] in ('gzip', 'deflate', 'br')
+        assert (await resp.json())['result']['number'] == "0x5"
+    finally:
+        await client.close()
+
+    client = HTTPClient(transport=TransportProfile(compression=False))
+    try:
+        resp = await client.fetch(url, method="POST", body=REQUEST)
+        assert 'Content-Encoding' not in resp.headers
+        assert (await resp.json())['result']['number'] == "0x5"
+    finally:
+        await client.close()
+
+async def test_httpx_transport(aiohttp_server):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    from asynceth.jsonrpc.httpx_client import HTTPClient as HttpxClient
+    assert select_http_client(TransportProfile(http2=True)) is HttpxClient
+
+    node = MockNode(block_number=10, txs_per_block=20, compression=True)
+    server = await aiohttp_server(node.app)
+    # without tls http2 can't be negotiated, so this falls back to http/1.1
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), transport=TransportProfile(http2=True))
+    try:
+        assert isinstance(jsonrpc_client._httpclient, HttpxClient)
+        block = await jsonrpc_client.eth_getBlockByNumber(5)
+        assert len(block['transactions']) == 20
+        bulk = jsonrpc_client.bulk()
+        f1 = bulk.eth_blockNumber()
+        f2 = bulk.eth_getBlockByNumber(6)
+        await bulk.execute()
+        assert await f1 == 10
+        assert (await f2)['number'] == "0x6"
+    finally:
+        await jsonrpc_client.close()
+
+    node.http_error_rate = 1.0
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')), transport=TransportProfile(http2=True),
+                                   should_retry=False)
+    try:
+        with pytest.raises(HTTPError) as e:
+            await jsonrpc_client.eth_blockNumber()
+        assert e.value.status == 503
+    finally:
+        await jsonrpc_client.close()
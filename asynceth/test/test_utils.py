@@ -0,0 +1,74 @@
+import pytest
+from asynceth import JsonRPCClient, Contract
+from asynceth.jsonrpc.mock_node import MockNode
+from asynceth.contract.transaction import _access_list
+from asynceth.utils import validate_hex_int, normalize_address, address_to_bytes, encode_hex, decode_hex
+
+ADDRESS = "0x" + "ab" * 20
+
+def test_validate_hex_int():
+    assert validate_hex_int(ADDRESS) is ADDRESS
+    assert validate_hex_int("0X" + "AB" * 20) == "0x" + "AB" * 20
+    assert validate_hex_int(bytes.fromhex("ab" * 20)) == ADDRESS
+    assert validate_hex_int(255) == "0xff"
+    assert validate_hex_int("0x1", length=4) == "0x00000001"
+    assert validate_hex_int(b"\x01", length=4) == "0x00000001"
+    data = "0x" + "12" * 100
+    assert validate_hex_int(data) == data
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            validate_hex_int("0x" + "zz" * 20)
+    with pytest.raises(ValueError):
+        validate_hex_int("0x" + "zz" * 100)
+    with pytest.raises(ValueError):
+        validate_hex_int("0x1234", length=1)
+
+def test_decode_hex():
+    assert decode_hex("0x0102") == b"\x01\x02"
+    assert decode_hex("0X0102") == b"\x01\x02"
+    assert decode_hex("0102") == b"\x01\x02"
+    assert decode_hex(b"\x01") == b"\x01"
+    # truncated values aren't padded
+    for invalid in ("0x102", "0x" + "ab" * 19 + "a"):
+        with pytest.raises(ValueError):
+            decode_hex(invalid)
+    # except for storage keys, which may be given as quantities
+    assert _access_list([(ADDRESS, ["0x1"])]) == [[bytes.fromhex("ab" * 20), [(1).to_bytes(32, 'big')]]]
+
+def test_addresses():
+    assert normalize_address("0x" + "AB" * 20) == ADDRESS
+    # frequently used addresses are interned
+    assert normalize_address("0x" + "AB" * 20) is normalize_address("0x" + "AB" * 20)
+    assert normalize_address(bytes.fromhex("ab" * 20)) == ADDRESS
+    assert address_to_bytes(ADDRESS) == bytes.fromhex("ab" * 20)
+    assert address_to_bytes(ADDRESS) is address_to_bytes(ADDRESS)
+    assert encode_hex(address_to_bytes(ADDRESS)) == ADDRESS
+    for invalid in ("0x1234", "ab" * 20, b"\x01" * 19):
+        with pytest.raises(ValueError):
+            normalize_address(invalid)
+
+async def test_bytes_results(aiohttp_server):
+    node = MockNode(block_number=100)
+    server = await aiohttp_server(node.app)
+    jsonrpc_client = JsonRPCClient(str(server.make_url('/')))
+    try:
+        contract = bytes.fromhex(node.contracts[0][2:])
+        assert await jsonrpc_client.eth_call(to_address=contract, data=b"\x12\x34\x56\x78", as_bytes=True) == \
+            (100).to_bytes(32, 'big')
+        assert await jsonrpc_client.eth_getCode(contract, as_bytes=True) == bytes.fromhex("6080604052")
+        assert await jsonrpc_client.eth_getStorageAt(contract, 0, as_bytes=True) == (100).to_bytes(32, 'big')
+        tx_hash = await jsonrpc_client.eth_sendRawTransaction(b"\x01\x02", as_bytes=True)
+        assert isinstance(tx_hash, bytes) and len(tx_hash) == 32
+        assert node.sent_transactions == ["0x0102"]
+
+        snapshot = jsonrpc_client.at_block(100)
+        assert await snapshot.eth_call(to_address=contract, data=b"\x12\x34\x56\x78", as_bytes=True) == \
+            (100).to_bytes(32, 'big')
+
+        abi = [{"type": "function", "name": "balanceOf", "stateMutability": "view",
+                "inputs": [{"name": "owner", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}]}]
+        token = Contract(jsonrpc_client, abi, address=contract)
+        assert await token.balanceOf(ADDRESS) == 100
+        assert await token.balanceOf(bytes.fromhex("ab" * 20)) == 100
+    finally:
+        await jsonrpc_client.close()
@@ -1,9 +1,8 @@
 import os
 import asyncio
-import rlp
-from ethereum.utils import privtoaddr, encode_hex, sha3 as keccak256, ecsign, zpad, bytearray_to_bytestr, int_to_32bytearray
-from eth_utils import decode_hex
-from asynceth.contract.transaction import Transaction
+from asynceth.crypto import keccak256, ecsign, private_key_to_address
+from asynceth.utils import decode_hex
+from asynceth.contract.transaction import prepare_transaction, send_transaction as send_signed_transaction
 
 class PrivateKey:
     def __init__(self, key=None):
@@ -15,78 +14,29 @@ class PrivateKey:
 
     @property
     def address(self):
-        return '0x' + encode_hex(privtoaddr(self.key))
+        return '0x' + private_key_to_address(self.key).hex()
 
     def sign(self, payload):
         rawhash = keccak256(payload)
 
         v, r, s = ecsign(rawhash, self.key)
-        signature = \
-            zpad(bytearray_to_bytestr(int_to_32bytearray(r)), 32) + \
-            zpad(bytearray_to_bytestr(int_to_32bytearray(s)), 32) + \
-            bytearray_to_bytestr([v])
+        signature = r.to_bytes(32, 'big') + s.to_bytes(32, 'big') + bytes([v])
 
         return signature
 
-async def send_transaction(jsonrpc, key, to, value, startgas=None, gasprice=None, nonce=None, data=b"", network_id=None):
+async def send_transaction(jsonrpc, key, to, value, startgas=None, gasprice=None, nonce=None, data=b"", network_id=None,
+                           max_fee_per_gas=None, max_priority_fee_per_gas=None, eip1559=False, use_ledger=False):
 
     to = decode_hex(to)
     if len(to) not in (20, 0):
         raise Exception('Addresses must be 20 or 0 bytes long (len was {})'.format(len(to)))
 
-    bulk = jsonrpc.bulk()
-    if nonce is None:
-        nonce = bulk.eth_getTransactionCount(key.address)
-    else:
-        nonce_future = asyncio.get_event_loop().create_future()
-        nonce_future.set_result(nonce)
-        nonce = nonce_future
+    tx = await prepare_transaction(jsonrpc, key.key, key.address, to, data, value=value, nonce=nonce,
+                                   gasprice=gasprice, startgas=startgas, network_id=network_id,
+                                   max_fee_per_gas=max_fee_per_gas, max_priority_fee_per_gas=max_priority_fee_per_gas,
+                                   eip1559=eip1559, use_ledger=use_ledger)
 
-    balance = bulk.eth_getBalance(key.address)
-
-    if gasprice is None:
-        gasprice = bulk.eth_gasPrice()
-    else:
-        gasprice_future = asyncio.get_event_loop().create_future()
-        gasprice_future.set_result(gasprice)
-        gasprice = gasprice_future
-
-    if startgas is None:
-        startgas = bulk.eth_estimateGas(
-            key.address, to, data=data, value=value)
-    else:
-        startgas_future = asyncio.get_event_loop().create_future()
-        startgas_future.set_result(startgas)
-        startgas = startgas_future
-
-    if network_id is None:
-        network_id = bulk.net_version()
-    else:
-        if isinstance(network_id, int):
-            network_id = str(network_id)
-        network_id_future = asyncio.get_event_loop().create_future()
-        network_id_future.set_result(network_id)
-        network_id = network_id_future
-
-    await bulk.execute()
-    nonce = await nonce
-    balance = await balance
-    gasprice = await gasprice
-    startgas = await startgas
-    network_id = int(await network_id)
-
-    tx = Transaction(nonce, gasprice, startgas, to, value, data, network_id, 0, 0)
-
-    if balance < (tx.value + (tx.startgas * tx.gasprice)):
-        raise Exception("Address doesn't have enough funds")
-
-    tx = tx.sign(key.key, network_id=network_id)
-
-    tx_encoded = '0x' + encode_hex(rlp.encode(tx, Transaction))
-
-    tx_hash = await jsonrpc.eth_sendRawTransaction(tx_encoded)
-
-    return tx_hash
+    return await send_signed_transaction(jsonrpc, tx, key.address, use_ledger)
 
 def make_word(description: str) -> bytes:
     r"""
@@ -130,3 +80,32 @@ def print_words(data):
         data = decode_hex(data)
     for i in range(0, len(data), 32):
         print(data[i:i + 32].hex())
+
+def create_jsonrpc_app(**methods):
+    """Creates a minimal aiohttp jsonrpc application for tests that don't
+    require a full ethereum node. Each keyword argument maps a jsonrpc
+    method to a function taking the params and returning the result, or
+    raising a `JsonRPCError`"""
+    from aiohttp import web
+    from asynceth.jsonrpc.errors import JsonRPCError
+
+    def handle_one(req):
+        try:
+            if req['method'] not in methods:
+                raise JsonRPCError(req.get('id'), -32601, "Method not found", None)
+            result = methods[req['method']](*req['params'])
+            if asyncio.iscoroutine(result):
+                raise TypeError("test jsonrpc methods must be synchronous")
+            return {"jsonrpc": "2.0", "id": req['id'], "result": result}
+        except JsonRPCError as e:
+            return e.format(req)
+
+    async def handler(request):
+        data = await request.json()
+        if isinstance(data, list):
+            return web.json_response([handle_one(req) for req in data])
+        return web.json_response(handle_one(data))
+
+    app = web.Application()
+    app.router.add_post('/', handler)
+    return app
@@ -1,14 +1,15 @@
-import regex
+import re
 import binascii
+import functools
 
 from decimal import Decimal
 
 str_types = str
 
-HEX_STRING_RE = regex.compile('^(?:0[xX])([0-9a-fA-F]+)$')
-INT_STRING_RE = regex.compile('^(-?(?:0|[1-9][0-9]*))$')
-DECIMAL_STRING_RE = regex.compile('^(-?(0|[1-9][0-9]*)\.[0-9]+)$')
-ETH_ADDRESS_RE = regex.compile('^(?:0[xX])([0-9a-fA-F]{40})$')
+HEX_STRING_RE = re.compile('^(?:0[xX])([0-9a-fA-F]+)$')
+INT_STRING_RE = re.compile('^(-?(?:0|[1-9][0-9]*))$')
+DECIMAL_STRING_RE = re.compile(r'^(-?(0|[1-9][0-9]*)\.[0-9]+)$')
+ETH_ADDRESS_RE = re.compile('^(?:0[xX])([0-9a-fA-F]{40})$')
 
 def validate_address(addr):
     return isinstance(addr, str_types) and ETH_ADDRESS_RE.match(addr) is not None
@@ -71,13 +72,36 @@ def parse_boolean(b):
         return bool(b)
     return None
 
+# addresses, hashes and words are validated repeatedly, so are cached
+_hex_strings = {}
+
+def _validate_short_hex_string(value):
+    digits = _hex_strings.get(value)
+    if digits is None:
+        m = HEX_STRING_RE.match(value)
+        if m is None:
+            raise ValueError("Unable to convert value to valid hex string")
+        digits = m.group(1)
+        if len(_hex_strings) >= 8192:
+            _hex_strings.clear()
+        _hex_strings[value] = digits
+    return digits
+
 def validate_hex_int(value, length=None):
     if isinstance(value, int):
         if value < 0:
             raise ValueError("Negative values are unsupported")
         value = hex(value)[2:]
     elif isinstance(value, bytes):
-        value = binascii.b2a_hex(value).decode('ascii')
+        if not length:
+            return '0x' + value.hex()
+        value = value.hex()
+    elif len(value) <= 66:
+        if not length and value[:2] == '0x':
+            # valid strings are returned unchanged
+            _validate_short_hex_string(value)
+            return value
+        value = _validate_short_hex_string(value)
     else:
         m = HEX_STRING_RE.match(value)
         if m:
@@ -95,3 +119,41 @@ def validate_block_param(param):
     if param not in ("earliest", "latest", "pending"):
         return validate_hex_int(param)
     return param
+
+@functools.lru_cache(maxsize=4096)
+def normalize_address(address):
+    """returns the lowercase 0x prefixed form of `address` (a hex string or
+    20 bytes). Results are cached, so frequently used addresses share a
+    single (already validated) string"""
+    if isinstance(address, bytes):
+        if len(address) != 20:
+            raise ValueError("Addresses must be 20 bytes long")
+        return '0x' + address.hex()
+    if not validate_address(address):
+        raise ValueError("Invalid address: {}".format(address))
+    return address.lower()
+
+@functools.lru_cache(maxsize=4096)
+def address_to_bytes(address):
+    """returns the 20 bytes of `address` (a hex string or bytes), cached
+    like `normalize_address`"""
+    if isinstance(address, bytes):
+        if len(address) != 20:
+            raise ValueError("Addresses must be 20 bytes long")
+        return address
+    return binascii.unhexlify(normalize_address(address)[2:])
+
+def encode_hex(value):
+    """converts bytes to a 0x prefixed hex string"""
+    return '0x' + value.hex()
+
+def decode_hex(value):
+    """converts a hex string (with or without the 0x prefix) to bytes"""
+    if isinstance(value, bytes):
+        return value
+    if value[:2] in ('0x', '0X'):
+        value = value[2:]
+    if len(value) % 2:
+        # e.g. truncated data or addresses
+        raise ValueError("Odd-length hex string")
+    return binascii.unhexlify(value)
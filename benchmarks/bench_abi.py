@@ -0,0 +1,36 @@
+from asynceth import Contract
+from asynceth.contract.contract import ContractTranslator
+from asynceth.utils import parse_int, validate_hex_int
+from conftest import ERC20_ABI, STRUCTS_ABI, ADDRESS
+
+STRUCTS = [(i, i * 2) for i in range(1000)]
+
+def test_encode_function_call(benchmark):
+    translator = ContractTranslator(ERC20_ABI)
+    benchmark(translator.encode_function_call, 'transfer', [bytes.fromhex(ADDRESS[2:]), 10 ** 18])
+
+def test_contract_method_data(benchmark):
+    token = Contract(None, ERC20_ABI, address=ADDRESS)
+    benchmark(lambda: token.transfer.data(ADDRESS, 10 ** 18))
+
+def test_decode_function_result(benchmark):
+    translator = ContractTranslator(ERC20_ABI)
+    data = (10 ** 18).to_bytes(32, 'big')
+    benchmark(translator.decode_function_result, 'balanceOf', data)
+
+def test_decode_struct_array(benchmark):
+    translator = ContractTranslator(STRUCTS_ABI)
+    data = translator.encode_function_call('getStructs', [STRUCTS])[4:]
+    benchmark.extra_info['structs'] = len(STRUCTS)
+    benchmark(translator.decode_function_result, 'getStructs', data)
+
+def test_parse_int(benchmark):
+    benchmark(parse_int, "0xde0b6b3a7640000")
+
+def test_validate_hex_int(benchmark):
+    benchmark(validate_hex_int, ADDRESS)
+
+def test_contract_call_request(benchmark, jsonrpc):
+    # the client side cost of a constant call, without the round trip
+    token = Contract(jsonrpc, ERC20_ABI, address=ADDRESS)
+    benchmark(lambda: token.balanceOf(ADDRESS, bulk=jsonrpc.bulk()))
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+def _import(statement):
+    subprocess.check_call([sys.executable, "-c", statement])
+
+def test_import_interpreter(benchmark):
+    # baseline cost of starting the interpreter
+    benchmark.pedantic(_import, args=("pass",), rounds=10)
+
+def test_import_jsonrpc(benchmark):
+    benchmark.pedantic(_import, args=("from asynceth import JsonRPCClient",), rounds=10)
+
+def test_import_contract(benchmark):
+    benchmark.pedantic(_import, args=("from asynceth import Contract",), rounds=10)
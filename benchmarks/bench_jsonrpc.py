@@ -0,0 +1,62 @@
+import asyncio
+from asynceth import Contract
+from asynceth.contract.simulation import simulate
+from asynceth.jsonrpc.retry import RetryPolicy
+from conftest import ERC20_ABI, ADDRESS
+
+REQUESTS = 100
+
+def test_single_request(benchmark, server_loop, jsonrpc):
+    benchmark(lambda: server_loop.run_until_complete(jsonrpc.eth_blockNumber()))
+
+def test_concurrent_requests(benchmark, server_loop, jsonrpc):
+    async def run():
+        await asyncio.gather(*[jsonrpc.eth_getBalance(ADDRESS) for _ in range(REQUESTS)])
+    benchmark.extra_info['requests'] = REQUESTS
+    benchmark(lambda: server_loop.run_until_complete(run()))
+
+def test_bulk(benchmark, server_loop, jsonrpc):
+    async def run():
+        bulk = jsonrpc.bulk()
+        futures = [bulk.eth_getBalance(ADDRESS) for _ in range(REQUESTS)]
+        await bulk.execute()
+        return await asyncio.gather(*futures)
+    benchmark.extra_info['requests'] = REQUESTS
+    benchmark(lambda: server_loop.run_until_complete(run()))
+
+def test_contract_calls(benchmark, server_loop, jsonrpc):
+    token = Contract(jsonrpc, ERC20_ABI, address=ADDRESS)
+
+    async def run():
+        await asyncio.gather(*[token.balanceOf(ADDRESS) for _ in range(REQUESTS)])
+    benchmark.extra_info['requests'] = REQUESTS
+    benchmark(lambda: server_loop.run_until_complete(run()))
+
+def test_retries(benchmark, server_loop, mock_node, jsonrpc):
+    # about half the requests fail with a retryable error
+    jsonrpc.retry_policy = RetryPolicy(base_delay=0)
+    mock_node.error_rate = 0.5
+
+    async def run():
+        await asyncio.gather(*[jsonrpc.eth_getCode(ADDRESS) for _ in range(REQUESTS)])
+    benchmark.extra_info['requests'] = REQUESTS
+    try:
+        benchmark(lambda: server_loop.run_until_complete(run()))
+    finally:
+        mock_node.error_rate = 0.0
+
+def test_block_bundles(benchmark, server_loop, jsonrpc):
+    async def run():
+        async for bundle in jsonrpc.fetch_block_bundles(range(1, 21)):
+            pass
+    benchmark.extra_info['blocks'] = 20
+    benchmark(lambda: server_loop.run_until_complete(run()))
+
+def test_simulate(benchmark, server_loop, jsonrpc):
+    token = Contract(jsonrpc, ERC20_ABI, address=ADDRESS)
+    calls = [token.balanceOf.candidate("0x{:040x}".format(i), from_address=ADDRESS) for i in range(200)]
+
+    async def run():
+        await simulate(jsonrpc, calls)
+    benchmark.extra_info['candidates'] = len(calls)
+    benchmark(lambda: server_loop.run_until_complete(run()))
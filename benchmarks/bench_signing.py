@@ -0,0 +1,44 @@
+import os
+import pytest
+from asynceth import crypto
+from asynceth.contract.transaction import Transaction
+
+KEY = os.urandom(32)
+TO = os.urandom(20)
+
+def test_sign_transaction(benchmark):
+    def sign():
+        tx = Transaction(1, 10 ** 9, 21000, TO, 10 ** 18, b'', 0, 0, 0)
+        tx = tx.sign(KEY, network_id=1)
+        return tx.encode()
+    benchmark(sign)
+
+def test_sign_transaction_pure_python(benchmark, monkeypatch):
+    # the fallback used when coincurve isn't installed
+    monkeypatch.setattr(crypto, '_ecsign', crypto._python_ecsign)
+    monkeypatch.setattr(crypto, '_public_key', crypto._python_public_key)
+
+    def sign():
+        tx = Transaction(1, 10 ** 9, 21000, TO, 10 ** 18, b'', 0, 0, 0)
+        tx = tx.sign(KEY, network_id=1)
+        return tx.encode()
+    benchmark(sign)
+
+def test_sign_transaction_pyethereum(benchmark):
+    # the previous signing path (with its hotfixed `sign`), for comparison
+    rlp = pytest.importorskip("rlp")
+    transactions = pytest.importorskip("ethereum.transactions")
+    from ethereum import utils
+
+    def sign():
+        tx = transactions.Transaction(1, 10 ** 9, 21000, TO, 10 ** 18, b'', 0, 0, 0)
+        rlpdata = rlp.encode(rlp.infer_sedes(tx).serialize(tx)[:-3] + [1, b'', b''])
+        v, r, s = utils.ecsign(utils.sha3(rlpdata), utils.normalize_key(KEY))
+        tx = tx.copy(v=v + 8 + 1 * 2, r=r, s=s)
+        return rlp.encode(tx, transactions.Transaction)
+    assert sign() == Transaction(1, 10 ** 9, 21000, TO, 10 ** 18, b'').sign(KEY, network_id=1).encode()
+    benchmark(sign)
+
+def test_keccak256(benchmark):
+    data = os.urandom(128)
+    benchmark(crypto.keccak256, data)
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from asynceth import JsonRPCClient
+from asynceth.jsonrpc.mock_node import MockNode
+
+ERC20_ABI = [
+    {"type": "function", "name": "balanceOf", "stateMutability": "view",
+     "inputs": [{"name": "owner", "type": "address"}],
+     "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "transfer", "stateMutability": "nonpayable",
+     "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}],
+     "outputs": [{"name": "", "type": "bool"}]},
+    {"type": "function", "name": "name", "stateMutability": "view",
+     "inputs": [], "outputs": [{"name": "", "type": "string"}]},
+]
+
+# a struct array output similar to `ABIv2Test.testStructArrayInput`
+STRUCTS_ABI = [
+    {"type": "function", "name": "getStructs", "stateMutability": "view",
+     "inputs": [{"name": "t", "type": "tuple[]", "components": [
+         {"name": "x", "type": "uint256"}, {"name": "y", "type": "uint256"}]}],
+     "outputs": [{"name": "", "type": "tuple[]", "components": [
+         {"name": "x", "type": "uint256"}, {"name": "y", "type": "uint256"}]}]},
+]
+
+ADDRESS = "0x" + "11" * 20
+
+@pytest.fixture(scope="module")
+def server_loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+@pytest.fixture(scope="module")
+def mock_node(server_loop):
+    node = MockNode(block_number=1000)
+    server_loop.run_until_complete(node.start())
+    yield node
+    server_loop.run_until_complete(node.stop())
+
+@pytest.fixture
+def jsonrpc(server_loop, mock_node):
+    async def create_client():
+        # the http session must be created within the running loop
+        return JsonRPCClient(mock_node.url)
+    client = server_loop.run_until_complete(create_client())
+    yield client
+    server_loop.run_until_complete(client.close())
@@ -6,12 +6,11 @@ from setuptools import setup
 from setuptools import find_packages
 
 PY_VER = sys.version_info
-if PY_VER < (3, 6):
-    raise RuntimeError("asynceth doesn't support Python version prior 3.6")
+if PY_VER < (3, 7):
+    raise RuntimeError("asynceth doesn't support Python version prior 3.7")
 
 install_requires = [
-    'regex',
-    'ethereum',
+    'pycryptodome',
     'eth_abi>=2.0.0-beta.1'
 ]
 
@@ -22,6 +21,12 @@ tests_require = [
     'testing.parity>=1.0.2'
 ]
 
+extras_require = {
+    'http2': ['httpx[http2]'],
+    'brotli': ['brotli'],
+    'coincurve': ['coincurve'],
+}
+
 def read_version():
     regexp = re.compile(r"^__version__\W*=\W*'([\d.abrc]+)'")
     init_py = os.path.join(os.path.dirname(__file__),
@@ -51,10 +56,12 @@ setup(
         'License :: Public Domain',
         'Operating System :: OS Independent',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
     ],
+    python_requires='>=3.7',
     install_requires=install_requires,
     include_package_data=True,
+    extras_require=extras_require,
     tests_require=tests_require,
     setup_requires=['pytest-runner']
 )